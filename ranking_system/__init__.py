@@ -1,28 +1,79 @@
 """Ranking system package."""
 from .attribute import Attribute
+from .attribute import CurveSweep
+from .attribute import StepValuation
 from .class_size_attribute import ClassSizeAttribute
+from .logging_utils import HOT_LOGGERS
+from .logging_utils import RateLimitFilter
+from .logging_utils import SamplingFilter
 from .logging_utils import setup_logging
+from .math_utils import LinearEfficiency
+from .math_utils import Logistic
+from .math_utils import PiecewiseStep
+from .math_utils import SaturatingTanh
+from .math_utils import SmoothStep
 from .math_utils import smooth_step
-from .plot_utils import dictionary_line_plot
-from .plot_utils import display_attribute
-from .plot_utils import display_ranking_dynamics
-from .plot_utils import display_ranking
-from .plot_utils import display_societal_value
-from .plot_utils import find_values_by_agent
-from .plot_utils import line_plot
-from .plot_utils import list_line_plot
-from .plot_utils import table_column_to_list
+from .math_utils import smooth_step_derivative
+from .math_utils import smooth_step_inverse
+from .objective_cache import ObjectiveCache
+from .optimizers import AnalyticOptimizer
+from .optimizers import BasinHoppingOptimizer
+from .optimizers import DifferentialEvolutionOptimizer
+from .optimizers import GridOptimizer
+from .optimizers import Optimizer
+from .optimizers import PopulationOptimizer
+from .optimizers import SLSQPOptimizer
+from .optimizers import create_optimizer
+from .production_table import ProductionTable
 from .ranking_agent import RankingAgent
 from .ranking_dynamics_volatility import RankingDynamicsVolatility
 from .ranking_model import RankingModel
+from .response_surface import ResponseSurface
 from .spending_per_student_attribute import SpendingPerStudentAttribute
+from .weight_schedule import WeightSchedule
+
+# The plotting functions import matplotlib and IPython, so they are loaded
+# on first use and headless runs never import them.
+_PLOT_UTILS = {"dictionary_line_plot", "display_attribute", "display_ranking",
+              "display_ranking_dynamics", "display_societal_value",
+              "export_figure", "export_figures", "export_model_figures",
+              "find_values_by_agent", "history_array", "history_data_frame",
+              "line_plot", "list_line_plot", "table_column_to_list",
+              "table_slice"}
+
+
+def __getattr__(name):
+    """Load the plotting functions on first use.
+
+    :param name: The attribute name.
+    :return: The plotting function.
+    :raises AttributeError: If the package has no such attribute.
+    """
+
+    if name in _PLOT_UTILS:
+        from . import plot_utils
+        return getattr(plot_utils, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__,
+                                                                   name))
+
 
 __all__ = ["Attribute", "ClassSizeAttribute", "setup_logging",
+           "AnalyticOptimizer", "BasinHoppingOptimizer",
+           "DifferentialEvolutionOptimizer", "GridOptimizer", "ObjectiveCache",
+           "Optimizer", "PopulationOptimizer",
+           "SLSQPOptimizer", "create_optimizer",
            "dictionary_line_plot", "display_attribute", "display_ranking",
            "display_ranking_dynamics", "display_societal_value",
            "find_values_by_agent", "line_plot", "list_line_plot", "smooth_step",
            "table_column_to_list", "RankingAgent", "RankingDynamicsVolatility",
-           "RankingModel", "SpendingPerStudentAttribute"]
+           "RankingModel", "ResponseSurface", "SpendingPerStudentAttribute",
+           "StepValuation", "ProductionTable", "WeightSchedule",
+           "smooth_step_derivative", "smooth_step_inverse",
+           "LinearEfficiency", "Logistic", "PiecewiseStep", "SaturatingTanh",
+           "SmoothStep", "history_array", "history_data_frame",
+           "export_figure", "export_figures", "export_model_figures",
+           "table_slice", "CurveSweep", "HOT_LOGGERS", "RateLimitFilter",
+           "SamplingFilter"]
 
 __title__ = "ranking_system"
 __author__ = "David Balash"
@@ -0,0 +1,29 @@
+"""Run a ranking model experiment, see ranking_system.cli."""
+import sys
+from ranking_system.cli import main
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
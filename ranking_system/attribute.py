@@ -1,7 +1,10 @@
 """The Attribute class represents a purchasable attribute
    in the ranking system."""
 import logging
-import matplotlib.pyplot as plt
+from collections import namedtuple
+import numpy as np
+from ranking_system.math_utils import PiecewiseStep
+from ranking_system.production_table import ProductionTable
 
 __author__ = "David Balash"
 __copyright__ = "Copyright 2019, Agent Based Models"
@@ -12,18 +15,42 @@ __status__ = "Prototype"
 
 LOGGER = logging.getLogger('ranking_system.attribute')
 
+# The production, valuation and weighted score of an attribute over funding
+# levels, with a row per efficiency for a grid of efficiencies.
+CurveSweep = namedtuple('CurveSweep', ['funding', 'efficiency', 'production',
+                                       'valuation', 'score'])
+
+
+class StepValuation(PiecewiseStep):
+    """A step valuation defined by a table of breakpoints and values.
+
+    See math_utils.PiecewiseStep for the breakpoints and the direction.
+    """
+
 
 class Attribute:
-    """The Attribute class."""
+    """The Attribute class.
+
+    An attribute is a shared definition of a purchasable attribute, used by
+    all the agents. The agents keep the amounts they produce themselves.
+    """
 
+    # pylint: disable=too-many-arguments
     def __init__(self, name, weightage_function, valuation_function,
-                 production_function):
+                 production_function, production_derivative=None,
+                 valuation_derivative=None):
         """Initialize the attribute.
 
         :param name: The name of the attribute.
         :param weightage_function: Function used to provide the ranking weight.
         :param valuation_function: Function used to provide a valuation.
         :param production_function: Function used to produce the attribute.
+        :param production_derivative: Optional derivative of the production
+        function with respect to the funds allocated, by default the
+        derivative of a math_utils curve.
+        :param valuation_derivative: Optional derivative of the valuation
+        function with respect to the value, by default the derivative of a
+        math_utils curve other than a step valuation.
         """
 
         LOGGER.debug('name = %s', name)
@@ -32,55 +59,341 @@ class Attribute:
         LOGGER.debug('production_function = %s', production_function.__name__)
 
         self.name = name
-        self.value = 0
         self._valuation_function = valuation_function
         self._weightage_function = weightage_function
         self._production_function = production_function
+        self._production_derivative = production_derivative or getattr(
+            production_function, 'derivative', None)
+
+        # Step valuations have zero derivatives, which are of no use to the
+        # gradient based optimizers.
+        if valuation_derivative is None \
+                and not isinstance(valuation_function, PiecewiseStep):
+            valuation_derivative = getattr(valuation_function, 'derivative',
+                                           None)
+        self._valuation_derivative = valuation_derivative
+
+        # Whether each function accepts arrays, found on its first array call.
+        self._vectorized = {}
+
+        # Production tables by efficiency, None while they are disabled.
+        self._production_tables = None
+        self._production_table_options = {}
 
     def production(self, funding_allocated, production_efficiency):
         """The production function for this attribute.
 
+        The funds and efficiency may be scalars or arrays, which are
+        broadcast against each other and evaluated element-wise. With
+        production tables enabled the production is looked up in the tables.
+
         :param funding_allocated: Funds allocated to producing the attribute.
         :param production_efficiency: Percent efficiency between [0, 1).
         :return: The amount of the attribute produced given the funds allocated.
         """
 
-        LOGGER.debug('funding_allocated = %f', funding_allocated)
-        LOGGER.debug('production_efficiency = %f', production_efficiency)
-        amount_produced = self._production_function(funding_allocated,
-                                                    production_efficiency)
-        LOGGER.debug('amount_produced = %f', amount_produced)
+        if self._production_tables is not None:
+            amount_produced = self._table_production(funding_allocated,
+                                                     production_efficiency)
+        else:
+            amount_produced = self._evaluate(self._production_function,
+                                             funding_allocated,
+                                             production_efficiency)
+        LOGGER.debug('funding_allocated = %s  production_efficiency = %s  '
+                     'amount_produced = %s', funding_allocated,
+                     production_efficiency, amount_produced)
         return amount_produced
 
+    @property
+    def differentiable(self):
+        """Whether the attribute has production and valuation derivatives.
+
+        :return: True if both derivatives are available.
+        """
+
+        return (self._production_derivative is not None
+                and self._valuation_derivative is not None)
+
+    def production_derivative(self, funding_allocated, production_efficiency):
+        """The derivative of the production with respect to the funds.
+
+        :param funding_allocated: Funds allocated to producing the attribute.
+        :param production_efficiency: Percent efficiency between [0, 1).
+        :return: The derivative of the amount produced.
+        :raises ValueError: If the attribute has no production derivative.
+        """
+
+        if self._production_derivative is None:
+            raise ValueError('No production derivative for ' + self.name)
+        return self._evaluate(self._production_derivative, funding_allocated,
+                              production_efficiency)
+
+    def valuation_derivative(self, value):
+        """The derivative of the valuation with respect to the value.
+
+        :param value: The value on which to obtain the derivative.
+        :return: The derivative of the valuation.
+        :raises ValueError: If the attribute has no valuation derivative.
+        """
+
+        if self._valuation_derivative is None:
+            raise ValueError('No valuation derivative for ' + self.name)
+        return self._evaluate(self._valuation_derivative, value)
+
+    def enable_production_tables(self, max_funding, tolerance=1e-3):
+        """Serve the production from a lookup table for each efficiency.
+
+        The tables are built on the first production with each efficiency
+        and interpolate the production on [0, max_funding] to within the
+        tolerance of the exact production function.
+
+        :param max_funding: The funding at the end of the tables.
+        :param tolerance: The interpolation error bound.
+        """
+
+        LOGGER.debug('max_funding = %s  tolerance = %s', max_funding,
+                     tolerance)
+        self._production_tables = {}
+        self._production_table_options = {'max_funding': max_funding,
+                                          'tolerance': tolerance}
+
+    @property
+    def production_table_max_funding(self):
+        """The funding at the end of the production tables.
+
+        :return: The maximum funding, or None while the tables are disabled.
+        """
+
+        return self._production_table_options.get('max_funding')
+
+    def production_table(self, production_efficiency):
+        """Get the production table for the production efficiency.
+
+        :param production_efficiency: Percent efficiency between [0, 1).
+        :return: The ProductionTable, built on the first call.
+        """
+
+        if self._production_tables is None:
+            raise ValueError('Production tables are not enabled for '
+                             + self.name)
+        table = self._production_tables.get(production_efficiency)
+        if table is None:
+            table = ProductionTable(
+                lambda funding: self._evaluate_array(
+                    self._production_function, funding,
+                    production_efficiency),
+                **self._production_table_options)
+            self._production_tables[production_efficiency] = table
+        return table
+
+    def production_inverse(self, production, production_efficiency):
+        """Find the least funding that produces at least the amount.
+
+        :param production: The scalar or array target amount produced.
+        :param production_efficiency: Percent efficiency between [0, 1).
+        :return: The funding, or infinity where the amount is not reached
+        within the production table and the production has no exact inverse.
+        """
+
+        # Curves from math_utils have exact inverses, used without production
+        # tables and past the end of the tables.
+        exact = hasattr(self._production_function, 'inverse')
+        if self._production_tables is None and exact:
+            return self._production_function.inverse(production,
+                                                     production_efficiency)
+        funding = self.production_table(production_efficiency).inverse(
+            production)
+        if exact and np.any(np.isinf(funding)):
+            funding = np.where(np.isinf(funding),
+                               self._production_function.inverse(
+                                   np.asarray(production, dtype=float),
+                                   production_efficiency),
+                               funding)[()]
+        return funding
+
     def valuation(self, value):
         """The true value of this attribute.
 
+        The value may be a scalar or an array, evaluated element-wise.
+
         :param value: The value on which to obtain the valuation.
         :return: The valuation function applied to the value.
         """
 
-        LOGGER.debug('value = %f', value)
-        valuation = self._valuation_function(value)
-        LOGGER.debug('valuation = %f', valuation)
+        valuation = self._evaluate(self._valuation_function, value)
+        LOGGER.debug('value = %s  valuation = %s', value, valuation)
         return valuation
 
+    @property
+    def valuation_breakpoints(self):
+        """The breakpoints of a StepValuation valuation function.
+
+        :return: The breakpoints, or None for other valuation functions.
+        """
+
+        return getattr(self._valuation_function, 'breakpoints', None)
+
+    def valuation_level(self, value):
+        """Get the StepValuation interval that contains the value.
+
+        :param value: The scalar or array value.
+        :return: The interval index, an array for array values.
+        """
+
+        return self._valuation_function.level(value)
+
+    def production_array(self, funding_allocated, production_efficiency):
+        """The production function applied element-wise to arrays.
+
+        :param funding_allocated: Array of funds allocated to the attribute.
+        :param production_efficiency: Efficiency or array of efficiencies.
+        :return: Array of the amounts produced given the funds allocated.
+        """
+
+        if self._production_tables is not None:
+            return np.asarray(self._table_production(funding_allocated,
+                                                     production_efficiency),
+                              dtype=float)
+        return self._evaluate_array(self._production_function,
+                                    funding_allocated, production_efficiency)
+
+    def _table_production(self, funding_allocated, production_efficiency):
+        """Look up the production in the table of each efficiency.
+
+        :param funding_allocated: The scalar or array funds allocated.
+        :param production_efficiency: The efficiency or array of
+        efficiencies, broadcast against the funds.
+        :return: The amount or array of the amounts produced.
+        """
+
+        if not isinstance(production_efficiency, (list, tuple, np.ndarray)) \
+                or np.ndim(production_efficiency) == 0:
+            return self.production_table(float(production_efficiency))(
+                funding_allocated)
+
+        funding, efficiency = np.broadcast_arrays(
+            np.asarray(funding_allocated, dtype=float),
+            np.asarray(production_efficiency, dtype=float))
+        amounts = np.empty(funding.shape)
+        for value in np.unique(efficiency):
+            selected = efficiency == value
+            amounts[selected] = self.production_table(
+                float(value)).lookup_array(funding[selected])
+        return amounts
+
+    def valuation_array(self, values):
+        """The valuation function applied element-wise to an array of values.
+
+        :param values: Array of values on which to obtain the valuations.
+        :return: Array of the valuation function applied to the values.
+        """
+
+        return self._evaluate_array(self._valuation_function, values)
+
+    def sweep(self, funding, production_efficiency=1, time_step=0,
+              weight=None):
+        """Evaluate the attribute's curves over funding levels in one call.
+
+        An array of efficiencies gives a grid, with a row of production,
+        valuation and score per efficiency and a column per funding level.
+
+        :param funding: The array of funding levels.
+        :param production_efficiency: The efficiency, or an array of
+        efficiencies for a grid.
+        :param time_step: The time step of the weight.
+        :param weight: The weight of the score, by default the weightage at
+        the time step.
+        :return: The CurveSweep of the funding, efficiency, production,
+        valuation and score arrays.
+        """
+
+        funding = np.asarray(funding, dtype=float)
+        efficiency = np.asarray(production_efficiency, dtype=float)
+        if efficiency.ndim:
+            efficiency = efficiency.reshape(-1, *[1] * funding.ndim)
+        if weight is None:
+            weight = self.weightage(time_step)
+
+        production = self.production_array(funding, efficiency)
+        valuation = self.valuation_array(production)
+        return CurveSweep(funding, efficiency, production, valuation,
+                          weight * valuation)
+
     def weightage(self, time_step):
         """The weight given to this attribute in the ranking at this time step.
 
+        The time step may be a scalar or an array, evaluated element-wise.
+
         :param time_step: The current time step.
         :return: The weightage for this attribute at this time step.
         """
 
-        LOGGER.debug('time_step = %f', time_step)
-        weight = self._weightage_function(time_step)
-        LOGGER.debug('weight = %f', weight)
+        weight = self._evaluate(self._weightage_function, time_step)
+        LOGGER.debug('time_step = %s  weight = %s', time_step, weight)
         return weight
 
+    def _evaluate(self, function, *values):
+        """Evaluate a function on scalars directly and on arrays element-wise.
+
+        :param function: The function to evaluate.
+        :param values: The scalar or array arguments of the function.
+        :return: The function result.
+        """
+
+        if not any(isinstance(value, (list, tuple, np.ndarray))
+                   and np.ndim(value) > 0 for value in values):
+            return function(*values)
+        return self._evaluate_array(function, *values)
+
+    def _evaluate_array(self, function, *values):
+        """Evaluate a function element-wise on broadcast array arguments.
+
+        The function is called with the whole arrays. Functions written for
+        scalars, for example if/elif chains, fail or return the wrong shape.
+        Those are remembered and evaluated one element at a time instead.
+
+        :param function: The function to evaluate.
+        :param values: The array arguments of the function.
+        :return: Array of the function results.
+        """
+
+        values = [np.asarray(value, dtype=float) for value in values]
+        if self._vectorized.get(function, True):
+            shape = np.broadcast(*values).shape
+            try:
+                result = np.asarray(function(*values), dtype=float)
+                if result.shape == shape:
+                    self._vectorized[function] = True
+                    return result
+            except (TypeError, ValueError):
+                pass
+            LOGGER.debug('%s is not vectorized, evaluating element-wise',
+                         function.__name__)
+            self._vectorized[function] = False
+
+        return np.vectorize(function, otypes=[float])(*values)
+
+    def __getstate__(self):
+        """Get the state to pickle, without the production tables.
+
+        The production tables are rebuilt when they are first used after
+        unpickling, which keeps pickles small and leaves out the table
+        closures.
+
+        :return: The state dictionary.
+        """
+
+        state = self.__dict__.copy()
+        if self._production_tables is not None:
+            state['_production_tables'] = {}
+        return state
+
     def display_production(self, production_efficiency, display_range):
-        productions = []
-        for amount in range(display_range):
-            productions.append(self._production_function(amount,
-                                                         production_efficiency))
+        # Imported here so the models run without matplotlib.
+        import matplotlib.pyplot as plt
+
+        productions = self.production_array(np.arange(display_range),
+                                            production_efficiency)
 
         _, axes = plt.subplots()
         axes.plot(productions)
@@ -93,7 +406,7 @@ class Attribute:
         :return: The string representation of the Attribute class.
         """
 
-        return 'Attribute[name={}, value={}]'.format(self.name, self.value)
+        return 'Attribute[name={}]'.format(self.name)
 
 
 # Agent based models
@@ -3,6 +3,8 @@
 import logging
 import numpy as np
 from ranking_system import Attribute
+from ranking_system import StepValuation
+from ranking_system.math_utils import SaturatingTanh
 
 __author__ = "David Balash"
 __copyright__ = "Copyright 2019, Agent Based Models"
@@ -14,57 +16,19 @@ __status__ = "Prototype"
 LOGGER = logging.getLogger('ranking_system.class_size_attribute')
 
 
-def _production_function(funding_allocated, production_efficiency):
-    """The production function for this attribute.
+# The average class size falls from 200 along a tanh as the funding grows,
+# up to a funding of 15,000. The production efficiency scales the steepness.
+_production_function = SaturatingTanh(200, 0, 15_000, 3)
 
-    :param funding_allocated: Funds allocated to producing the attribute.
-    :param production_efficiency: Percent efficiency between [0, 1).
-    :return: The amount of the attribute produced given the funds allocated.
-    """
-
-    LOGGER.debug('funding_allocated = %f', funding_allocated)
-    LOGGER.debug('production_efficiency = %f', production_efficiency)
-
-    max_value = 15_000
-    steepness = 3 * production_efficiency
-    amount_produced = 200 - (200 * np.tanh(np.interp(funding_allocated,
-                                                     [0, max_value],
-                                                     [0, steepness])))
-
-    LOGGER.debug('amount_produced = %f', amount_produced)
 
-    return amount_produced
-
-
-def _valuation_function(average_class_size):
-    """Valuation given to the average class size attribute.
-
-    :param average_class_size: The value on which to obtain the valuation.
-    :return: The valuation function applied to the value.
-    """
-
-    LOGGER.debug('average_class_size = %f', average_class_size)
-
-    # Step like function for average class size
-    if average_class_size < 20:
-        # Classes with fewer than 20 students receive the most credit
-        valuation = 100
-    elif average_class_size < 30:
-        # Classes with 20 to 29 students score second highest
-        valuation = 75
-    elif average_class_size < 40:
-        # Classes with 30 to 39 students score third highest
-        valuation = 50
-    elif average_class_size < 50:
-        # Classes with 40 to 49 students score fourth highest
-        valuation = 25
-    else:
-        # Classes that are 50 or more students receive no credit
-        valuation = 0
-
-    LOGGER.debug('valuation = %f', valuation)
-
-    return valuation
+# Step like function for average class size
+# Classes with fewer than 20 students receive the most credit
+# Classes with 20 to 29 students score second highest
+# Classes with 30 to 39 students score third highest
+# Classes with 40 to 49 students score fourth highest
+# Classes that are 50 or more students receive no credit
+_valuation_function = StepValuation([20, 30, 40, 50], [100, 75, 50, 25, 0],
+                                    direction='below')
 
 
 def _weightage_function(time_step):
@@ -74,15 +38,15 @@ def _weightage_function(time_step):
     :return: The weightage for this attribute at this time step.
     """
 
-    LOGGER.debug('time_step = %f', time_step)
-
     # Increases at time t greater than 5.
-    if time_step < 5:
+    if isinstance(time_step, np.ndarray):
+        weight = np.where(time_step < 5, 0.3, 0.4)
+    elif time_step < 5:
         weight = 0.3
     else:
         weight = 0.4
 
-    LOGGER.debug('weight = %f', weight)
+    LOGGER.debug('time_step = %s  weight = %s', time_step, weight)
 
     return weight
 
@@ -0,0 +1,321 @@
+"""Command line entry point to run ranking model experiments.
+
+An experiment config file, in JSON, YAML or TOML, describes the number of
+agents and steps, the model settings, the attributes, the optimizer and the
+outputs, for example in JSON::
+
+    {"agents": 2, "steps": 10, "random_seed": 12345,
+     "settings": {"expenditure_min": 5000, "expenditure_max": 15000},
+     "optimizer": {"name": "grid", "options": {"resolution": 200}},
+     "attributes": ["spending_per_student", "class_size"],
+     "outputs": {"directory": "results", "tables": ["ranking"],
+                 "figures": true, "format": "png"}}
+
+Attributes are the names of the built-in attributes, or dictionaries with a
+name, a constant weight and the valuation and production curves from
+math_utils, for example::
+
+    {"name": "Spending", "weight": 0.5,
+     "valuation": {"type": "PiecewiseStep", "breakpoints": [5000],
+                   "values": [0, 100]},
+     "production": {"type": "LinearEfficiency"}}
+
+Replicate i runs with the random seed plus i, which seeds both the model
+and the optimizers' random draws, so runs with a seed are reproducible
+unless the optimizers have a max_time budget. Each replicate writes its
+tables as CSV files to its own subdirectory of the output directory.
+Headless runs never import the plotting modules.
+
+Usage::
+
+    python -m ranking_system experiment.json --replicates 8 --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from ranking_system import math_utils
+from ranking_system.attribute import Attribute
+from ranking_system.class_size_attribute import ClassSizeAttribute
+from ranking_system.ranking_model import RankingModel
+from ranking_system.spending_per_student_attribute import \
+    SpendingPerStudentAttribute
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+LOGGER = logging.getLogger('ranking_system.cli')
+
+BUILT_IN_ATTRIBUTES = {'spending_per_student': SpendingPerStudentAttribute,
+                       'class_size': ClassSizeAttribute}
+
+CURVES = {'LinearEfficiency': math_utils.LinearEfficiency,
+          'Logistic': math_utils.Logistic,
+          'PiecewiseStep': math_utils.PiecewiseStep,
+          'SaturatingTanh': math_utils.SaturatingTanh,
+          'SmoothStep': math_utils.SmoothStep}
+
+
+def load_config(path):
+    """Load an experiment config file.
+
+    :param path: The path of the JSON, YAML or TOML config file.
+    :return: The config dictionary.
+    :raises ValueError: If the file extension is not supported.
+    :raises ImportError: If the YAML or TOML parser is not installed.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path) as config_file:
+            return json.load(config_file)
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError as exception:
+            raise ImportError('Reading {} needs the PyYAML package.'
+                              .format(path)) from exception
+        with open(path) as config_file:
+            return yaml.safe_load(config_file)
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError as exception:
+                raise ImportError('Reading {} needs Python 3.11 or the tomli '
+                                  'package.'.format(path)) from exception
+        with open(path, 'rb') as config_file:
+            return tomllib.load(config_file)
+    raise ValueError('Unsupported config file {}, expected .json, .yaml, '
+                     '.yml or .toml'.format(path))
+
+
+class _ConstantWeight:
+    """Weightage function with the same weight at every time step."""
+
+    __name__ = 'constant_weight'
+
+    def __init__(self, weight):
+        """Initialize the weightage function.
+
+        :param weight: The weight.
+        """
+
+        self.weight = weight
+
+    def __call__(self, _time_step):
+        """Get the weight at the time step.
+
+        :param _time_step: The time step.
+        :return: The weight.
+        """
+
+        return self.weight
+
+
+def _create_curve(spec):
+    """Create a math_utils curve from its config.
+
+    :param spec: The dictionary with the curve 'type' and its arguments.
+    :return: The curve.
+    :raises ValueError: If the curve type is unknown.
+    """
+
+    spec = dict(spec)
+    curve_type = spec.pop('type')
+    if curve_type not in CURVES:
+        raise ValueError('Unknown curve {}, expected one of {}.'
+                         .format(curve_type, sorted(CURVES)))
+    return CURVES[curve_type](**spec)
+
+
+def create_attribute(spec):
+    """Create an attribute from its config.
+
+    :param spec: The name of a built-in attribute, or a dictionary with the
+    'name', 'weight', 'valuation' and 'production' of the attribute.
+    :return: The attribute.
+    :raises ValueError: If the built-in attribute is unknown.
+    """
+
+    if isinstance(spec, str):
+        if spec not in BUILT_IN_ATTRIBUTES:
+            raise ValueError('Unknown attribute {}, expected one of {}.'
+                             .format(spec, sorted(BUILT_IN_ATTRIBUTES)))
+        return BUILT_IN_ATTRIBUTES[spec]()
+
+    return Attribute(spec['name'],
+                     _ConstantWeight(spec['weight']),
+                     _create_curve(spec['valuation']),
+                     _create_curve(spec['production']))
+
+
+def create_model(config, random_seed=None):
+    """Create a ranking model from an experiment config.
+
+    :param config: The config dictionary.
+    :param random_seed: The seed for the random number generator.
+    :return: The ranking model.
+    """
+
+    settings = dict(config.get('settings', {}))
+    optimizer = config.get('optimizer')
+    if isinstance(optimizer, dict):
+        settings['optimizer'] = optimizer['name']
+        settings['optimizer_options'] = optimizer.get('options', {})
+    elif optimizer is not None:
+        settings['optimizer'] = optimizer
+
+    attributes = [create_attribute(spec) for spec in
+                  config.get('attributes', list(BUILT_IN_ATTRIBUTES))]
+    return RankingModel(config.get('agents', 2), attributes, settings,
+                        random_seed=random_seed)
+
+
+def run_replicate(config, replicate, headless=False):
+    """Run one replicate of an experiment and write its outputs.
+
+    :param config: The config dictionary.
+    :param replicate: The replicate number, added to the config's random
+    seed.
+    :param headless: Skip the figures and never import the plotting modules.
+    :return: The summary dictionary of the replicate.
+    """
+
+    random_seed = config.get('random_seed')
+    if random_seed is not None:
+        random_seed += replicate
+
+    start = time.perf_counter()
+    model = create_model(config, random_seed)
+    model.run(config.get('steps', 10))
+    run_time = time.perf_counter() - start
+
+    societal_values = model.data_collector.tables['societal_value']
+    summary = {'replicate': replicate, 'random_seed': random_seed,
+               'run_time': round(run_time, 3),
+               'societal_value': round(sum(societal_values['societal_value']),
+                                       model.DECIMAL_PLACES)}
+
+    outputs = config.get('outputs', {})
+    directory = outputs.get('directory')
+    if directory is not None:
+        directory = os.path.join(directory,
+                                 'replicate_{}'.format(replicate))
+        os.makedirs(directory, exist_ok=True)
+        for table_name in outputs.get('tables',
+                                      model.data_collector.tables):
+            table = model.data_collector.get_table_dataframe(table_name)
+            table.to_csv(os.path.join(directory, table_name + '.csv'),
+                         index=False)
+
+        if outputs.get('figures', False) and not headless:
+            from ranking_system.plot_utils import export_model_figures
+            export_model_figures(model, directory,
+                                 outputs.get('format', 'png'), workers=1)
+
+    LOGGER.debug('summary = %s', summary)
+    return summary
+
+
+def run_experiment(config, replicates=1, workers=None, headless=False):
+    """Run the replicates of an experiment, in parallel across processes.
+
+    :param config: The config dictionary.
+    :param replicates: The number of replicates.
+    :param workers: The number of worker processes, by default the number
+    of CPUs. With one worker the replicates run in this process.
+    :param headless: Skip the figures and never import the plotting modules.
+    :return: The list of the replicate summaries, in replicate order.
+    """
+
+    if workers == 1 or replicates <= 1:
+        return [run_replicate(config, replicate, headless)
+                for replicate in range(replicates)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_replicate, [config] * replicates,
+                                 range(replicates), [headless] * replicates))
+
+
+def parse_arguments(arguments=None):
+    """Parse the command line arguments.
+
+    :param arguments: The list of arguments, by default sys.argv.
+    :return: The argparse namespace.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python -m ranking_system',
+        description='Run a ranking model experiment from a config file.')
+    parser.add_argument('config', help='the JSON, YAML or TOML config file')
+    parser.add_argument('--replicates', type=int,
+                        help='the number of replicates, by default the '
+                             "config's replicates or 1")
+    parser.add_argument('--workers', type=int,
+                        help="the number of worker processes, by default the "
+                             "config's workers or the number of CPUs")
+    parser.add_argument('--steps', type=int,
+                        help="the number of steps, overriding the config's")
+    parser.add_argument('--seed', type=int,
+                        help="the random seed, overriding the config's")
+    parser.add_argument('--output',
+                        help="the output directory, overriding the config's")
+    parser.add_argument('--headless', action='store_true',
+                        help='skip the figures and never import matplotlib')
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    """Run an experiment from the command line.
+
+    :param arguments: The list of arguments, by default sys.argv.
+    :return: The exit status.
+    """
+
+    arguments = parse_arguments(arguments)
+    config = load_config(arguments.config)
+    if arguments.steps is not None:
+        config['steps'] = arguments.steps
+    if arguments.seed is not None:
+        config['random_seed'] = arguments.seed
+    if arguments.output is not None:
+        config.setdefault('outputs', {})['directory'] = arguments.output
+
+    replicates = arguments.replicates
+    if replicates is None:
+        replicates = config.get('replicates', 1)
+
+    workers = arguments.workers
+    if workers is None:
+        workers = config.get('workers')
+
+    summaries = run_experiment(config, replicates, workers,
+                               arguments.headless)
+    for summary in summaries:
+        print('replicate {replicate}  seed {random_seed}  societal value '
+              '{societal_value}  run time {run_time}s'.format(**summary))
+    return 0
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
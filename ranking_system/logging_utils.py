@@ -1,13 +1,141 @@
 """Logging utilities used to setup the logger configuration."""
+import atexit
+import copy
 import logging
 import logging.handlers
 import os
+import queue
+import threading
+import time
 
+# The loggers called from the objective function and the attribute curves,
+# which log several debug records per objective evaluation.
+HOT_LOGGERS = ('ranking_system.attribute', 'ranking_system.ranking_agent')
 
-def setup_logging(logger_name=None):
+
+class SamplingFilter(logging.Filter):
+    """Pass one in every n records below a level, and all records above."""
+
+    def __init__(self, every, level=logging.WARNING):
+        """Initialize the filter.
+
+        :param every: Pass one record in every this many records.
+        :param level: The records at or above this level always pass.
+        """
+
+        super().__init__()
+        self.every = every
+        self.level = level
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        """Sample the record.
+
+        :param record: The log record.
+        :return: True if the record is logged.
+        """
+
+        if record.levelno >= self.level:
+            return True
+        with self._lock:
+            self._count += 1
+            return (self._count - 1) % self.every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass at most a number of records per second below a level."""
+
+    def __init__(self, rate, level=logging.WARNING, clock=time.monotonic):
+        """Initialize the filter.
+
+        :param rate: The most records per second.
+        :param level: The records at or above this level always pass.
+        :param clock: The function returning the time in seconds.
+        """
+
+        super().__init__()
+        self.rate = rate
+        self.level = level
+        self.dropped = 0
+        self._clock = clock
+        self._tokens = rate
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        """Pass the record if the rate allows it.
+
+        The rate is enforced with a token bucket holding up to one second
+        of records.
+
+        :param record: The log record.
+        :return: True if the record is logged.
+        """
+
+        if record.levelno >= self.level:
+            return True
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.rate, self._tokens
+                               + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.dropped += 1
+            return False
+
+
+class _MessageQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves the formatting to the listener thread."""
+
+    def prepare(self, record):
+        """Prepare the record for the queue.
+
+        Only the message arguments are merged, so later changes to them do
+        not reach the log, and the formatting is left to the listener.
+
+        :param record: The log record.
+        :return: The record to put on the queue.
+        """
+
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """Queue listener that can be stopped more than once."""
+
+    def stop(self):
+        """Stop the listener thread, after it handles the queued records."""
+
+        if self._thread is not None:
+            super().stop()
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def setup_logging(logger_name=None, level=logging.ERROR, use_queue=False,
+                  sample_every=None, rate_limits=None):
     """Setup the logging format, logger, console handler, and file handler.
 
+    With use_queue the logger only puts the records on a queue, and a
+    QueueListener thread formats them and writes them to the console and
+    file handlers, so the logging calls do not block on I/O. The listener
+    is stopped, flushing the queue, at exit or when its stop method is
+    called.
+
     :param logger_name: The name of the logger.
+    :param level: The level of the logger and handlers.
+    :param use_queue: Hand the records to the handlers through a queue.
+    :param sample_every: Dictionary mapping logger names, such as those in
+    HOT_LOGGERS, to n, to pass one in every n of their records below a
+    warning.
+    :param rate_limits: Dictionary mapping logger names, such as those in
+    HOT_LOGGERS, to the most records per second below a warning.
+    :return: The started QueueListener with use_queue, otherwise None.
     """
 
     # If no logger name is provided use the package name.
@@ -18,21 +146,22 @@ def setup_logging(logger_name=None):
     logger_filename = logger_name + '.log'
 
     # Create a logging formatter
-    time = '%(asctime)s'
+    time_format = '%(asctime)s'
     details = '[%(filename)s:%(lineno)s:%(funcName)s:%(threadName)s]'
-    level = '%(levelname)s'
+    level_format = '%(levelname)s'
     message = '%(message)s'
-    logging_format = time + ' ' + details + ' ' + level + ' - ' + message
+    logging_format = (time_format + ' ' + details + ' ' + level_format
+                      + ' - ' + message)
     date_format = '%Y-%m-%d %H:%M:%S'
     formatter = logging.Formatter(logging_format, date_format)
 
     # Create a logger
     logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.ERROR)
+    logger.setLevel(level)
 
     # Create a console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.ERROR)
+    console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
 
     # Create a file handler
@@ -44,9 +173,26 @@ def setup_logging(logger_name=None):
         # This will start a new log file each run of the program.
         file_handler.doRollover()
 
-    file_handler.setLevel(logging.ERROR)
+    file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
 
-    # Add the handlers to the logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Sample and rate limit the records of the hot loggers.
+    for name, every in (sample_every or {}).items():
+        logging.getLogger(name).addFilter(SamplingFilter(every))
+    for name, rate in (rate_limits or {}).items():
+        logging.getLogger(name).addFilter(RateLimitFilter(rate))
+
+    if not use_queue:
+        # Add the handlers to the logger
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        return None
+
+    # Hand the records to a listener thread that formats and writes them.
+    record_queue = queue.SimpleQueue()
+    logger.addHandler(_MessageQueueHandler(record_queue))
+    listener = _QueueListener(record_queue, console_handler, file_handler,
+                              respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,5 +1,13 @@
-"""Math related utility functions."""
+"""Math related utility functions.
+
+The production and valuation curves are array-native building blocks for
+attributes, each with its derivative and inverse.
+"""
+import bisect
+import math
 import numpy as np
+from scipy.special import expit
+from scipy.special import logit
 
 
 def smooth_step(value, value_range, output_range):
@@ -12,7 +20,505 @@ def smooth_step(value, value_range, output_range):
     :return: The smooth step value
     """
 
+    # A tanh over [-6, 6] rescaled from the value range onto the output
+    # range, in one expression.
+    interp_range = [-6, 6]
+    position = np.clip((value - value_range[0])
+                       / (value_range[1] - value_range[0]), 0, 1)
+    tanh = np.tanh(interp_range[0]
+                   + position * (interp_range[1] - interp_range[0]))
+    return output_range[0] + (tanh + 1) / 2 * (output_range[1]
+                                               - output_range[0])
+
+
+def smooth_step_derivative(value, value_range, output_range):
+    """The derivative of the smooth step function with respect to the value.
+
+    :param value: The value to be smoothed.
+    :param value_range: The range of input values.
+    :param output_range: The range of output values.
+    :return: The smooth step derivative, zero outside the value range.
+    """
+
     interp_range = [-6, 6]
-    tanh_range = [-1, 1]
-    return np.interp(np.tanh(np.interp(value, value_range, interp_range)),
-                     tanh_range, output_range)
+    position = (value - value_range[0]) / (value_range[1] - value_range[0])
+    tanh = np.tanh(interp_range[0] + np.clip(position, 0, 1)
+                   * (interp_range[1] - interp_range[0]))
+    derivative = ((output_range[1] - output_range[0]) / 2
+                  * (1 - tanh ** 2)
+                  * (interp_range[1] - interp_range[0])
+                  / (value_range[1] - value_range[0]))
+    return derivative * ((position > 0) & (position < 1))
+
+
+def smooth_step_inverse(output, value_range, output_range):
+    """The value at which the smooth step function reaches the output.
+
+    :param output: The smooth step output.
+    :param value_range: The range of input values.
+    :param output_range: The range of output values.
+    :return: The value, clipped to the value range.
+    """
+
+    interp_range = [-6, 6]
+    tanh = np.clip(2 * (output - output_range[0])
+                   / (output_range[1] - output_range[0]) - 1, -1, 1)
+    with np.errstate(divide='ignore'):
+        position = np.clip(np.arctanh(tanh), *interp_range)
+    return value_range[0] + ((position - interp_range[0])
+                             / (interp_range[1] - interp_range[0])
+                             * (value_range[1] - value_range[0]))
+
+
+class Curve:
+    """Base class of the production and valuation curves.
+
+    Production curves are called with the funding and the production
+    efficiency, and valuation curves with the value. Curves accept scalars
+    and arrays, and provide their derivative and inverse with the same
+    arguments.
+    """
+
+    @property
+    def __name__(self):
+        """The name used when logging the curve."""
+
+        return self.__class__.__name__
+
+    def __repr__(self):
+        """The representation function will return the string representation.
+
+        :return: The string representation of the curve.
+        """
+
+        return '{}[{}]'.format(self.__class__.__name__, ', '.join(
+            '{}={}'.format(name, value) for name, value in vars(self).items()
+            if not name.startswith('_')))
+
+
+class LinearEfficiency(Curve):
+    """Production proportional to the funding and the efficiency."""
+
+    def __init__(self, slope=1):
+        """Initialize the curve.
+
+        :param slope: The production per dollar at full efficiency.
+        """
+
+        self.slope = slope
+
+    def __call__(self, funding, efficiency):
+        """The amount produced.
+
+        :param funding: The funding.
+        :param efficiency: The production efficiency.
+        :return: The amount produced.
+        """
+
+        return funding * (self.slope * efficiency)
+
+    def derivative(self, funding, efficiency):
+        """The derivative of the amount produced with respect to the funding.
+
+        :param funding: The funding.
+        :param efficiency: The production efficiency.
+        :return: The derivative.
+        """
+
+        return np.zeros(np.shape(funding)) + self.slope * efficiency
+
+    def inverse(self, production, efficiency):
+        """The least funding that produces at least the amount.
+
+        :param production: The amount produced.
+        :param efficiency: The production efficiency.
+        :return: The funding.
+        """
+
+        return np.maximum(production / (self.slope * efficiency), 0)
+
+
+class SaturatingTanh(Curve):
+    """Production that saturates along a tanh up to a maximum funding.
+
+    The amount produced starts at the initial amount and moves towards the
+    final amount as tanh(funding / max_funding * steepness * efficiency).
+    Funding beyond the maximum funding produces no more.
+    """
+
+    def __init__(self, initial, final, max_funding, steepness):
+        """Initialize the curve.
+
+        :param initial: The amount produced without funding.
+        :param final: The amount approached with unlimited steepness.
+        :param max_funding: The funding beyond which nothing more is produced.
+        :param steepness: The tanh argument at the maximum funding and full
+        efficiency.
+        """
+
+        self.initial = initial
+        self.final = final
+        self.max_funding = max_funding
+        self.steepness = steepness
+
+    def __call__(self, funding, efficiency):
+        """The amount produced.
+
+        :param funding: The funding.
+        :param efficiency: The production efficiency.
+        :return: The amount produced.
+        """
+
+        funding = np.minimum(np.maximum(funding, 0), self.max_funding)
+        return self.initial + (self.final - self.initial) * np.tanh(
+            funding * (self.steepness * efficiency / self.max_funding))
+
+    def derivative(self, funding, efficiency):
+        """The derivative of the amount produced with respect to the funding.
+
+        :param funding: The funding.
+        :param efficiency: The production efficiency.
+        :return: The derivative, zero where the funding is clipped.
+        """
+
+        rate = self.steepness * efficiency / self.max_funding
+        clipped = np.minimum(np.maximum(funding, 0), self.max_funding)
+        inside = (np.asarray(funding) > 0) & (clipped < self.max_funding)
+        return ((self.final - self.initial) * rate
+                * (1 - np.tanh(clipped * rate) ** 2) * inside)
+
+    def inverse(self, production, efficiency):
+        """The least funding that produces at least the amount.
+
+        :param production: The amount produced.
+        :param efficiency: The production efficiency.
+        :return: The funding, or infinity if the amount is not produced
+        within the maximum funding.
+        """
+
+        fraction = np.clip((production - self.initial)
+                           / (self.final - self.initial), 0, 1)
+        with np.errstate(divide='ignore'):
+            funding = np.arctanh(fraction) * (
+                self.max_funding / (self.steepness * efficiency))
+        return np.where(funding > self.max_funding, np.inf, funding)[()]
+
+
+class Logistic(Curve):
+    """Production along a logistic curve between a lower and upper amount.
+
+    The efficiency scales the steepness of the curve around its midpoint.
+    """
+
+    def __init__(self, lower, upper, midpoint, steepness):
+        """Initialize the curve.
+
+        :param lower: The amount approached without funding.
+        :param upper: The amount approached with unlimited funding.
+        :param midpoint: The funding halfway between the amounts.
+        :param steepness: The logistic rate per dollar at full efficiency.
+        """
+
+        self.lower = lower
+        self.upper = upper
+        self.midpoint = midpoint
+        self.steepness = steepness
+
+    def _sigmoid(self, funding, efficiency):
+        """The logistic sigmoid of the funding."""
+
+        return expit((funding - self.midpoint) * (self.steepness * efficiency))
+
+    def __call__(self, funding, efficiency):
+        """The amount produced.
+
+        :param funding: The funding.
+        :param efficiency: The production efficiency.
+        :return: The amount produced.
+        """
+
+        return self.lower + (self.upper - self.lower) * self._sigmoid(
+            funding, efficiency)
+
+    def derivative(self, funding, efficiency):
+        """The derivative of the amount produced with respect to the funding.
+
+        :param funding: The funding.
+        :param efficiency: The production efficiency.
+        :return: The derivative.
+        """
+
+        sigmoid = self._sigmoid(funding, efficiency)
+        return ((self.upper - self.lower) * self.steepness * efficiency
+                * sigmoid * (1 - sigmoid))
+
+    def inverse(self, production, efficiency):
+        """The funding that produces the amount.
+
+        :param production: The amount produced, between the lower and upper
+        amounts.
+        :param efficiency: The production efficiency.
+        :return: The funding, infinite beyond the lower and upper amounts.
+        """
+
+        fraction = np.clip((production - self.lower)
+                           / (self.upper - self.lower), 0, 1)
+        with np.errstate(divide='ignore'):
+            return self.midpoint + logit(fraction) / (self.steepness
+                                                      * efficiency)
+
+
+class SmoothStep(Curve):
+    """Valuation along the smooth step function (see smooth_step)."""
+
+    def __init__(self, value_range, output_range):
+        """Initialize the curve.
+
+        :param value_range: The range of input values.
+        :param output_range: The range of output values.
+        """
+
+        self.value_range = tuple(value_range)
+        self.output_range = tuple(output_range)
+
+    def __call__(self, value):
+        """The valuation of the value.
+
+        :param value: The value.
+        :return: The valuation.
+        """
+
+        return smooth_step(value, self.value_range, self.output_range)
+
+    def derivative(self, value):
+        """The derivative of the valuation with respect to the value.
+
+        :param value: The value.
+        :return: The derivative.
+        """
+
+        return smooth_step_derivative(value, self.value_range,
+                                      self.output_range)
+
+    def inverse(self, valuation):
+        """The value with the valuation.
+
+        :param valuation: The valuation.
+        :return: The value, clipped to the value range.
+        """
+
+        return smooth_step_inverse(valuation, self.value_range,
+                                   self.output_range)
+
+
+class PiecewiseStep(Curve):
+    """A piecewise step valuation defined by breakpoints and values.
+
+    The breakpoints split the values being valued into intervals, and each
+    interval has its own valuation. The direction sets which interval a
+    value exactly on a breakpoint belongs to: with 'above' a value has to be
+    strictly above a breakpoint to pass it, as in "spending more than
+    10,000", and with 'below' it has to be strictly below a breakpoint to
+    stay under it, as in "fewer than 20 students".
+    """
+
+    DIRECTIONS = ('above', 'below')
+
+    def __init__(self, breakpoints, values, direction='above'):
+        """Initialize the step valuation.
+
+        :param breakpoints: The breakpoints in increasing order.
+        :param values: The valuation of each interval, one more than the
+        number of breakpoints, starting below the first breakpoint.
+        :param direction: Either 'above' or 'below'.
+        """
+
+        if len(values) != len(breakpoints) + 1:
+            raise ValueError('Expected {} values for {} breakpoints, got {}.'
+                             .format(len(breakpoints) + 1, len(breakpoints),
+                                     len(values)))
+        if list(breakpoints) != sorted(breakpoints):
+            raise ValueError('Breakpoints must be in increasing order.')
+        if direction not in self.DIRECTIONS:
+            raise ValueError('Direction must be one of {}.'
+                             .format(self.DIRECTIONS))
+
+        self.breakpoints = tuple(breakpoints)
+        self.values = tuple(values)
+        self.direction = direction
+        self._side = 'left' if direction == 'above' else 'right'
+        self._values = np.asarray(values)
+
+    def level(self, value):
+        """Get the index of the interval that contains the value.
+
+        :param value: The scalar or array value.
+        :return: The interval index, an array for array values.
+        """
+
+        if np.ndim(value) == 0:
+            if self._side == 'left':
+                return bisect.bisect_left(self.breakpoints, value)
+            return bisect.bisect_right(self.breakpoints, value)
+        return np.searchsorted(self.breakpoints, value, side=self._side)
+
+    def __call__(self, value):
+        """Get the valuation of the value.
+
+        :param value: The scalar or array value.
+        :return: The valuation, an array for array values.
+        """
+
+        if np.ndim(value) == 0:
+            return self.values[self.level(value)]
+        return self._values[self.level(value)]
+
+    def derivative(self, value):
+        """The derivative of the valuation, zero between the breakpoints.
+
+        :param value: The scalar or array value.
+        :return: The derivative.
+        """
+
+        return np.zeros(np.shape(value))[()]
+
+    def inverse(self, valuation):
+        """The breakpoint beyond which values score at least the valuation.
+
+        With 'above' it is the breakpoint values have to be above, and with
+        'below' the breakpoint values have to be below, to score at least
+        the valuation. The valuation is expected to improve from the lowest
+        values with 'above' and from the highest values with 'below'.
+
+        :param valuation: The scalar or array valuation.
+        :return: The breakpoint, -inf or inf if every value scores at least
+        the valuation, and nan if no value does.
+        """
+
+        bounds = np.concatenate([[-np.inf], self.breakpoints, [np.inf]])
+        valuation = np.asarray(valuation, dtype=float)
+        if self.direction == 'above':
+            reached = np.maximum.accumulate(self._values)
+            index = np.searchsorted(reached, valuation, side='left')
+            result = bounds[np.minimum(index, len(self.values) - 1)]
+        else:
+            reached = np.maximum.accumulate(self._values[::-1])
+            index = np.searchsorted(reached, valuation, side='left')
+            result = bounds[::-1][np.minimum(index, len(self.values) - 1)]
+        return np.where(index < len(self.values), result, np.nan)[()]
+
+    def __repr__(self):
+        """The representation function will return the string representation.
+
+        :return: The string representation of the step valuation.
+        """
+
+        return '{}[breakpoints={}, values={}, direction={}]'.format(
+            self.__class__.__name__, self.breakpoints, self.values,
+            self.direction)
+
+
+def sample_budget_simplex(budget, dimension, size=None, rng=None):
+    """Sample allocations uniformly from the budget simplex.
+
+    The allocations are drawn from a flat Dirichlet distribution, so each one
+    is non-negative and spends the whole budget.
+
+    :param budget: The budget to allocate.
+    :param dimension: The number of values in each allocation.
+    :param size: The number of allocations, or None for a single allocation.
+    :param rng: The numpy random generator, by default the global one.
+    :return: The allocation, or a (size x dimension) array of allocations.
+    """
+
+    rng = np.random if rng is None else rng
+    return rng.dirichlet(np.ones(dimension), size) * budget
+
+
+def budget_lattice(budget, resolution, dimension):
+    """Get every allocation on a lattice that is within the budget.
+
+    :param budget: The budget.
+    :param resolution: The spacing of the lattice.
+    :param dimension: The number of values in each allocation.
+    :return: A (k x dimension) array of the k lattice allocations.
+    """
+
+    steps = int(budget // resolution)
+
+    # Build the lattice one dimension at a time, keeping only the points whose
+    # steps sum to at most the number of steps in the budget.
+    lattice = np.zeros((1, 0), dtype=int)
+    for _ in range(dimension):
+        remaining = steps - lattice.sum(axis=1)
+        counts = remaining + 1
+        points = np.repeat(lattice, counts, axis=0)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        values = np.arange(counts.sum()) - offsets
+        lattice = np.column_stack([points, values])
+
+    return lattice * resolution
+
+
+def budget_lattice_size(budget, resolution, dimension):
+    """Get the number of allocations on the lattice within the budget.
+
+    :param budget: The budget.
+    :param resolution: The spacing of the lattice.
+    :param dimension: The number of values in each allocation.
+    :return: The number of lattice allocations.
+    """
+
+    return math.comb(int(budget // resolution) + dimension, dimension)
+
+
+def budget_lattice_chunks(budget, resolution, dimension, max_points):
+    """Get the lattice within the budget in chunks of bounded size.
+
+    Lattices larger than max_points are split by the value of the first
+    dimension, so a chunk can only be larger than max_points when a single
+    value of the first dimension has more allocations than that.
+
+    :param budget: The budget.
+    :param resolution: The spacing of the lattice.
+    :param dimension: The number of values in each allocation.
+    :param max_points: The largest number of allocations in a chunk.
+    :return: Generator of (k x dimension) arrays of lattice allocations.
+    """
+
+    if dimension == 1 or budget_lattice_size(budget, resolution,
+                                             dimension) <= max_points:
+        yield budget_lattice(budget, resolution, dimension)
+        return
+
+    for step in range(int(budget // resolution) + 1):
+        first = step * resolution
+        rest = budget_lattice(budget - first, resolution, dimension - 1)
+        yield np.column_stack([np.full(len(rest), first), rest])
+
+
+def project_to_budget_simplex(values, budget):
+    """Project values onto the budget simplex.
+
+    The budget simplex is the set of non-negative allocations that sum to at
+    most the budget. The projection is the closest allocation in the simplex
+    in the Euclidean distance.
+
+    :param values: The values to project.
+    :param budget: The budget.
+    :return: The projected values.
+    """
+
+    values = np.asarray(values, dtype=float)
+    clipped = np.maximum(values, 0)
+    if clipped.sum() <= budget:
+        return clipped
+
+    # Project onto the face of the simplex where the allocation sums to the
+    # budget by subtracting the same threshold from every value.
+    descending = np.sort(values)[::-1]
+    cumulative = np.cumsum(descending) - budget
+    indices = np.arange(1, len(values) + 1)
+    rho = np.flatnonzero(descending - cumulative / indices > 0)[-1]
+    threshold = cumulative[rho] / (rho + 1)
+    return np.maximum(values - threshold, 0)
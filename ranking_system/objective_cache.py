@@ -0,0 +1,91 @@
+"""Least recently used cache of objective function results."""
+from collections import OrderedDict
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+class ObjectiveCache:
+    """Bounded cache that evicts the least recently used result when full."""
+
+    def __init__(self, maxsize=100_000):
+        """Initialize the cache.
+
+        :param maxsize: The maximum number of results held in the cache.
+        """
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def get(self, key):
+        """Get a cached result and count the hit or miss.
+
+        :param key: The key of the result.
+        :return: The cached result or None if the key is not in the cache.
+        """
+
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._results.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        """Add a result to the cache.
+
+        :param key: The key of the result.
+        :param result: The result to cache.
+        """
+
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        """Remove all results and reset the hit and miss counters."""
+
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """The number of cached results.
+
+        :return: The number of cached results.
+        """
+
+        return len(self._results)
+
+    def __repr__(self):
+        """The representation function will return the string representation.
+
+        :return: The string representation of the ObjectiveCache class.
+        """
+
+        return 'ObjectiveCache[size={}, hits={}, misses={}]'.format(
+            len(self), self.hits, self.misses)
+
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -0,0 +1,850 @@
+"""Optimizer strategies used by the ranking agents to choose an attribute mix.
+
+Each strategy searches for the funding allocation that minimizes the agent's
+objective function subject to the agent's budget. A strategy can be limited
+to a wall-clock time budget and/or a number of objective evaluations per
+agent per step, in which case the best feasible allocation found before the
+budget ran out is used.
+"""
+import logging
+import math
+import time
+import numpy as np
+from scipy.optimize import basinhopping
+from scipy.optimize import differential_evolution
+from scipy.optimize import minimize
+
+from .math_utils import budget_lattice
+from .math_utils import budget_lattice_size
+from .math_utils import project_to_budget_simplex
+from .math_utils import sample_budget_simplex
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+LOGGER = logging.getLogger('ranking_system.optimizers')
+
+
+class BudgetExhausted(Exception):
+    """Raised when an optimizer has used up its time or evaluation budget."""
+
+
+# pylint: disable=protected-access
+class BudgetedObjective:
+    """Objective function wrapper that enforces the optimizer budget.
+
+    The wrapper counts objective evaluations, keeps track of the best feasible
+    allocation evaluated so far, and raises BudgetExhausted once the time or
+    evaluation budget has been used up. Single allocations are projected onto
+    the budget simplex before they are evaluated, so optimizers that step
+    outside the budget still evaluate a feasible allocation.
+    """
+
+    def __init__(self, agent, max_time=None, max_evaluations=None):
+        """Initialize the budgeted objective.
+
+        :param agent: The agent whose objective function is wrapped.
+        :param max_time: The wall-clock budget in seconds, or None.
+        :param max_evaluations: The objective evaluation budget, or None.
+        """
+
+        self._agent = agent
+        self._max_time = max_time
+        self._max_evaluations = max_evaluations
+        self._start_time = time.perf_counter()
+        self.evaluations = 0
+        self.gradient_evaluations = 0
+        self.accepted_steps = 0
+        self.total_steps = 0
+        self.best_x = None
+        self.best_value = np.inf
+
+    def _check_budget(self):
+        """Raise BudgetExhausted if the budget has been used up."""
+
+        if (self._max_evaluations is not None
+                and self.evaluations >= self._max_evaluations):
+            raise BudgetExhausted('evaluation budget exhausted')
+        if (self._max_time is not None
+                and time.perf_counter() - self._start_time >= self._max_time):
+            raise BudgetExhausted('time budget exhausted')
+
+    @property
+    def wall_time(self):
+        """The wall-clock time in seconds since the search started."""
+
+        return time.perf_counter() - self._start_time
+
+    def count_step(self, x, value, accepted):
+        """Basin hopping callback used to count the accepted steps.
+
+        :param x: The allocation after the step.
+        :param value: The objective function result after the step.
+        :param accepted: True if the step was accepted.
+        """
+
+        LOGGER.debug('x = %s  value = %f  accepted = %s', x, value, accepted)
+        self.total_steps += 1
+        if accepted:
+            self.accepted_steps += 1
+
+    def __call__(self, variables):
+        """Evaluate the objective function for a single allocation.
+
+        :param variables: The allocation to evaluate.
+        :return: The objective function result.
+        """
+
+        self._check_budget()
+        self.evaluations += 1
+        variables = project_to_budget_simplex(variables, self._agent._budget)
+        value = self._agent.objective_function(variables)
+        if value < self.best_value:
+            self.best_value = value
+            self.best_x = variables
+        return value
+
+    def gradient(self, variables):
+        """Evaluate the analytic gradient of the objective function.
+
+        The objective evaluates the allocation projected onto the budget
+        simplex, so the gradient is taken through the projection: clipped
+        values do not change the objective, and on the face of the simplex
+        where the budget is spent the values can only move against each
+        other. Gradient evaluations are counted separately from objective
+        evaluations.
+
+        :param variables: The allocation.
+        :return: The gradient of the objective function result.
+        """
+
+        self._check_budget()
+        self.gradient_evaluations += 1
+        variables = np.asarray(variables, dtype=float)
+        projected = project_to_budget_simplex(variables, self._agent._budget)
+        gradient = self._agent.objective_gradient(projected)
+        if np.maximum(variables, 0).sum() <= self._agent._budget:
+            return np.where(variables >= 0, gradient, 0)
+
+        active = projected > 0
+        return np.where(active, gradient - gradient[active].mean(), 0)
+
+    def jacobian(self):
+        """Get the analytic jacobian for scipy when the agent has one.
+
+        :return: The gradient method, or None to approximate the gradient
+        by finite differences.
+        """
+
+        return self.gradient if self._agent.differentiable else None
+
+    def batch(self, allocations):
+        """Evaluate the objective function for a batch of allocations.
+
+        :param allocations: A (k x M) array of allocations.
+        :return: An array of the k objective function results.
+        """
+
+        self._check_budget()
+        allocations = np.atleast_2d(np.asarray(allocations, dtype=float))
+        if self._max_evaluations is not None:
+            remaining = self._max_evaluations - self.evaluations
+            allocations = allocations[:remaining]
+        self.evaluations += len(allocations)
+        values = self._agent.batch_objective_function(allocations)
+        feasible = ((allocations >= 0).all(axis=1)
+                    & (allocations.sum(axis=1) <= self._agent._budget))
+        if feasible.any():
+            index = np.flatnonzero(feasible)[np.argmin(values[feasible])]
+            if values[index] < self.best_value:
+                self.best_value = values[index]
+                self.best_x = allocations[index].copy()
+        return values
+
+
+class Optimizer:
+    """The optimizer strategy base class."""
+
+    def __init__(self, max_time=None, max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        self.max_time = max_time
+        self.max_evaluations = max_evaluations
+
+    def prepare(self, agents):
+        """Prepare the optimizer before the agents step.
+
+        The model calls this once per step with all of its agents. Optimizers
+        that work on the whole population at once override it.
+
+        :param agents: The agents that are about to step.
+        """
+
+    def optimize(self, agent):
+        """Find the attribute mix for the agent.
+
+        The optimizer statistics for the search are appended to the agent's
+        optimizer stats list.
+
+        :param agent: The agent to optimize.
+        :return: The funding allocation as a list of whole dollar amounts.
+        """
+
+        objective = BudgetedObjective(agent, self.max_time,
+                                      self.max_evaluations)
+        solutions = []
+        try:
+            self._search(agent, objective, solutions)
+        except BudgetExhausted as exception:
+            LOGGER.debug('agent = %s  %s after %d evaluations', agent,
+                         exception, objective.evaluations)
+
+        # Each search solution is one restart. The best allocation evaluated
+        # is also a candidate when the budget ran out part way through.
+        number_of_restarts = len(solutions)
+        if objective.best_x is not None:
+            solutions.append(objective.best_x)
+
+        # Funding is allocated in whole dollars. Truncating the projected
+        # solution keeps the allocation within the budget.
+        best_attribute_mix = [0] * len(agent._inventory)
+        best_result = agent.objective_function(best_attribute_mix)
+        best_restart = None
+        restart_values = []
+        for index, solution in enumerate(solutions):
+            solution = project_to_budget_simplex(solution, agent._budget)
+            attribute_mix = [int(amount) for amount in solution]
+            result = agent.objective_function(attribute_mix)
+            if index < number_of_restarts:
+                restart_values.append(result)
+            if result < best_result:
+                best_result = result
+                best_attribute_mix = attribute_mix
+                best_restart = index if index < number_of_restarts else None
+
+        LOGGER.debug('Best mix = %s', best_attribute_mix)
+
+        acceptance_rate = None
+        if objective.total_steps > 0:
+            acceptance_rate = objective.accepted_steps / objective.total_steps
+        agent.optimizer_stats.append({'evaluations': objective.evaluations,
+                                      'acceptance_rate': acceptance_rate,
+                                      'restart_values': restart_values,
+                                      'best_restart': best_restart,
+                                      'wall_time': objective.wall_time,
+                                      'skipped': False})
+
+        return best_attribute_mix
+
+    def _search(self, agent, objective, solutions):
+        """Search for solutions, appending each one to the solutions list.
+
+        :param agent: The agent to optimize.
+        :param objective: The budgeted objective function.
+        :param solutions: The list of solutions found so far.
+        """
+
+        raise NotImplementedError
+
+    @staticmethod
+    def _random_initial_value(agent):
+        """Get a random allocation that spends the whole budget.
+
+        :param agent: The agent to optimize.
+        :return: The random allocation.
+        """
+
+        return sample_budget_simplex(agent._budget, len(agent._inventory),
+                                     rng=agent.model.rng)
+
+
+class SimplexStep:
+    """Basin hopping step that stays within the budget simplex.
+
+    The step is a random displacement followed by a projection onto the
+    budget simplex, so no iterations are spent on rejected steps. Basin
+    hopping adjusts the stepsize attribute to reach its target acceptance
+    rate.
+    """
+
+    def __init__(self, budget, stepsize, rng=None):
+        """Initialize the step.
+
+        :param budget: The budget of the agent.
+        :param stepsize: The largest displacement of each value.
+        :param rng: The numpy random generator, by default the global one.
+        """
+
+        self.budget = budget
+        self.stepsize = stepsize
+        self.rng = np.random if rng is None else rng
+
+    def __call__(self, x):
+        """Take a step from x.
+
+        :param x: The current allocation.
+        :return: The new allocation.
+        """
+
+        displacement = self.rng.uniform(-self.stepsize, self.stepsize,
+                                        np.shape(x))
+        return project_to_budget_simplex(x + displacement, self.budget)
+
+
+class BasinHoppingOptimizer(Optimizer):
+    """Basin hopping from several random initial values.
+
+    With warm starting the first initial value is the agent's previous
+    allocation scaled to its new budget. For every consecutive step in which
+    the previous optimum is found again, the number of restarts and the
+    iterations per restart are halved, down to the configured minimums. The
+    iterations saved are recorded by the agent.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(self, number_of_initial_values=5, temperature=10,
+                 step_size=100, niter=2_000, local_method='BFGS',
+                 warm_start=False, min_initial_values=1, min_niter=100,
+                 stability_tolerance=0.05, max_time=None,
+                 max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param number_of_initial_values: The number of random restarts.
+        :param temperature: The basin hopping temperature.
+        :param step_size: The basin hopping step size.
+        :param niter: The number of basin hopping iterations per restart.
+        :param local_method: The local minimization method.
+        :param warm_start: Seed the search with the previous allocation.
+        :param min_initial_values: The fewest restarts when warm starting.
+        :param min_niter: The fewest iterations per restart when warm starting.
+        :param stability_tolerance: The largest change in allocation, as a
+        fraction of the budget, for which the optimum is considered stable.
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        super().__init__(max_time, max_evaluations)
+        self.number_of_initial_values = number_of_initial_values
+        self.temperature = temperature
+        self.step_size = step_size
+        self.niter = niter
+        self.local_method = local_method
+        self.warm_start = warm_start
+        self.min_initial_values = min_initial_values
+        self.min_niter = min_niter
+        self.stability_tolerance = stability_tolerance
+
+    def optimize(self, agent):
+        if not self.warm_start:
+            return super().optimize(agent)
+
+        x0 = agent._scaled_previous_allocation()
+        attribute_mix = super().optimize(agent)
+
+        # The optimum is stable when the search ends close to the scaled
+        # previous allocation.
+        if x0 is not None and (np.abs(np.asarray(attribute_mix) - x0).sum()
+                               <= self.stability_tolerance * agent._budget):
+            agent._stable_steps += 1
+        else:
+            agent._stable_steps = 0
+
+        return attribute_mix
+
+    def _effort(self, agent):
+        """Get the number of restarts and iterations for this search.
+
+        :param agent: The agent to optimize.
+        :return: The number of initial values and iterations per restart.
+        """
+
+        if not self.warm_start or agent._scaled_previous_allocation() is None:
+            return self.number_of_initial_values, self.niter
+
+        number_of_initial_values = max(self.min_initial_values,
+                                       self.number_of_initial_values
+                                       >> agent._stable_steps)
+        niter = max(self.min_niter, self.niter >> agent._stable_steps)
+        return number_of_initial_values, niter
+
+    def _search(self, agent, objective, solutions):
+        number_of_initial_values, niter = self._effort(agent)
+        if self.warm_start:
+            saved_iterations = (self.number_of_initial_values * self.niter
+                                - number_of_initial_values * niter)
+            agent.warm_start_savings.append(saved_iterations)
+
+        # Optimize multiple times with random initialization values, starting
+        # with the warm start value when there is one.
+        initial_values = [self._random_initial_value(agent)
+                          for _ in range(number_of_initial_values)]
+        if self.warm_start and agent._scaled_previous_allocation() is not None:
+            initial_values[0] = agent._scaled_previous_allocation()
+
+        for x0 in initial_values:
+            LOGGER.debug('Initial x0 = %s', x0)
+            take_step = SimplexStep(agent._budget, self.step_size,
+                                    agent.model.rng)
+            solution = basinhopping(objective, x0, T=self.temperature,
+                                    take_step=take_step,
+                                    callback=objective.count_step,
+                                    minimizer_kwargs={
+                                        'method': self.local_method,
+                                        'jac': objective.jacobian()},
+                                    niter=niter, seed=agent.model.rng)
+            solutions.append(solution.x)
+
+
+class SLSQPOptimizer(Optimizer):
+    """Sequential Least Squares Programming from random initial values."""
+
+    def __init__(self, number_of_initial_values=5, max_time=None,
+                 max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param number_of_initial_values: The number of random restarts.
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        super().__init__(max_time, max_evaluations)
+        self.number_of_initial_values = number_of_initial_values
+
+    def _search(self, agent, objective, solutions):
+        constraints = {'type': 'ineq', 'fun': agent._constraint_function}
+        for _ in range(self.number_of_initial_values):
+            x0 = self._random_initial_value(agent)
+            solution = minimize(objective, x0, method='SLSQP',
+                                jac=objective.jacobian(),
+                                bounds=agent._bounds(),
+                                constraints=constraints)
+            solutions.append(solution.x)
+
+
+class DifferentialEvolutionOptimizer(Optimizer):
+    """Differential evolution over the budget constrained allocations."""
+
+    def __init__(self, maxiter=100, popsize=15, max_time=None,
+                 max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param maxiter: The maximum number of generations.
+        :param popsize: The population size multiplier.
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        super().__init__(max_time, max_evaluations)
+        self.maxiter = maxiter
+        self.popsize = popsize
+
+    def _search(self, agent, objective, solutions):
+        # The objective projects every candidate onto the budget simplex, so
+        # the population starts on the simplex instead of the box, where
+        # most candidates overspend with many attributes.
+        dimension = len(agent._inventory)
+        population = sample_budget_simplex(
+            agent._budget, dimension, max(self.popsize * dimension, 5),
+            rng=agent.model.rng)
+        solution = differential_evolution(objective, agent._bounds(),
+                                          maxiter=self.maxiter,
+                                          init=population, polish=False,
+                                          seed=agent.model.rng)
+        solutions.append(solution.x)
+
+
+class GridOptimizer(Optimizer):
+    """Search over a lattice of allocations within the budget.
+
+    The search is the agent's grid solver (see
+    RankingAgent.grid_attribute_mix), exhaustive in exact mode and coarse to
+    fine otherwise.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, resolution=100, exact=True, max_points=100_000,
+                 refinement_factor=10, max_time=None, max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param resolution: The spacing of the lattice in dollars.
+        :param exact: Score the whole lattice instead of refining.
+        :param max_points: The most allocations scored at once.
+        :param refinement_factor: The ratio between successive spacings.
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        super().__init__(max_time, max_evaluations)
+        self.resolution = resolution
+        self.exact = exact
+        self.max_points = max_points
+        self.refinement_factor = refinement_factor
+
+    def _search(self, agent, objective, solutions):
+        solutions.append(agent.grid_attribute_mix(self.resolution, self.exact,
+                                                  self.max_points,
+                                                  self.refinement_factor,
+                                                  objective.batch))
+
+
+class AnalyticOptimizer(Optimizer):
+    """Breakpoint enumeration for piecewise constant attribute scores.
+
+    With step valuations each attribute's score only changes at a few funding
+    levels. The optimum spends the least funding that reaches a score level
+    of each attribute, so it is found by locating those funding levels and
+    choosing the best combination of them within the budget.
+
+    For a StepValuation the funding levels are found by bisecting for the
+    funding at which the production crosses each breakpoint, which assumes
+    the production is monotone in the funding. Other valuations are scanned
+    for the funding levels at which the score changes.
+    """
+
+    def __init__(self, samples=1_000, resolution=1, max_budget_steps=100_000,
+                 max_time=None, max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param samples: The number of funding levels scanned per attribute to
+        find where the attribute score changes.
+        :param resolution: The budget step of the dynamic program in dollars.
+        :param max_budget_steps: The most budget steps of the dynamic
+        program. Larger budgets use a coarser step than the resolution.
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        super().__init__(max_time, max_evaluations)
+        self.samples = samples
+        self.resolution = resolution
+        self.max_budget_steps = max_budget_steps
+
+    @staticmethod
+    def _attribute_score(agent, attribute, funding):
+        """Get the valuation of an attribute for an array of funding levels.
+
+        :param agent: The agent to optimize.
+        :param attribute: The attribute.
+        :param funding: The array of funding levels.
+        :return: The array of valuations.
+        """
+
+        efficiency = agent._production_efficiencies[attribute.name]
+        return attribute.valuation_array(attribute.production_array(
+            funding, efficiency))
+
+    def _funding_levels(self, agent, attribute):
+        """Find the least whole dollar funding for each attribute score.
+
+        :param agent: The agent to optimize.
+        :param attribute: The attribute.
+        :return: The list of funding levels, starting with zero.
+        """
+
+        budget = int(agent._budget)
+        if attribute.valuation_breakpoints is not None:
+            return self._breakpoint_funding_levels(agent, attribute, budget)
+
+        funding = np.unique(np.linspace(0, budget, self.samples).astype(int))
+        scores = self._attribute_score(agent, attribute, funding)
+        levels = [0]
+        for index in np.flatnonzero(np.diff(scores) != 0):
+            # Bisect for the first dollar amount with the new score.
+            low, high = funding[index], funding[index + 1]
+            while high - low > 1:
+                middle = (low + high) // 2
+                score = self._attribute_score(agent, attribute, [middle])[0]
+                if score == scores[index]:
+                    low = middle
+                else:
+                    high = middle
+            levels.append(int(high))
+        return levels
+
+    @staticmethod
+    def _breakpoint_funding_levels(agent, attribute, budget):
+        """Find the least whole dollar funding that crosses each breakpoint.
+
+        :param agent: The agent to optimize.
+        :param attribute: The attribute with a StepValuation.
+        :param budget: The whole dollar budget.
+        :return: The list of funding levels, starting with zero.
+        """
+
+        efficiency = agent._production_efficiencies[attribute.name]
+
+        def level(funding):
+            return attribute.valuation_level(attribute.production(
+                funding, efficiency))
+
+        start_level = level(0)
+        end_level = level(budget)
+        levels = [0]
+        for breakpoint_index in range(min(start_level, end_level),
+                                      max(start_level, end_level)):
+            # Bisect for the first dollar amount on the other side of the
+            # breakpoint from zero funding.
+            low, high = 0, budget
+            while high - low > 1:
+                middle = (low + high) // 2
+                if ((level(middle) > breakpoint_index)
+                        != (start_level > breakpoint_index)):
+                    high = middle
+                else:
+                    low = middle
+            levels.append(high)
+        return sorted(set(levels))
+
+    def _search(self, agent, objective, solutions):
+        # Choose one funding level per attribute to maximize the weighted
+        # score within the whole dollar budget. This is a multiple choice
+        # knapsack problem solved by dynamic programming over the budget in
+        # steps of at least the resolution. Each funding level costs its
+        # funding rounded up to a whole step, so the allocation stays within
+        # the budget.
+        budget = int(agent._budget)
+        step = max(self.resolution, math.ceil(budget / self.max_budget_steps))
+        steps = budget // step
+        best_scores = np.zeros(steps + 1)
+        levels_by_attribute = []
+        costs_by_attribute = []
+        choices = []
+        weights = agent.model.attribute_weights()
+        for index, attribute in enumerate(agent._inventory):
+            levels = np.array(self._funding_levels(agent, attribute))
+            costs = -(-levels // step)
+            weight = weights[index]
+            scores = weight * self._attribute_score(agent, attribute, levels)
+            candidates = np.full((len(levels), steps + 1), -np.inf)
+            for choice, (cost, score) in enumerate(zip(costs, scores)):
+                if cost <= steps:
+                    candidates[choice, cost:] = best_scores[:steps + 1 - cost]
+                    candidates[choice, cost:] += score
+            levels_by_attribute.append(levels)
+            costs_by_attribute.append(costs)
+            choices.append(candidates.argmax(axis=0))
+            best_scores = candidates.max(axis=0)
+
+        # Walk back through the choices to recover the allocation.
+        allocation = np.zeros(len(agent._inventory))
+        remaining = steps
+        for index in reversed(range(len(agent._inventory))):
+            choice = choices[index][remaining]
+            allocation[index] = levels_by_attribute[index][choice]
+            remaining -= int(costs_by_attribute[index][choice])
+
+        objective.batch(allocation)
+        solutions.append(allocation)
+
+
+class PopulationOptimizer(Optimizer):
+    """Search a shared set of candidate allocations for all agents at once.
+
+    The candidates are either a lattice of allocations within the largest
+    agent budget or random allocations drawn from its budget simplex. The
+    scores of every agent for every candidate are evaluated as an (agents x
+    candidates) array and each agent takes its best candidate within its own
+    budget. The model prepares the allocations for all agents before they
+    step.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, resolution=100, number_of_candidates=None,
+                 max_candidates=1_000_000, max_time=None,
+                 max_evaluations=None):
+        """Initialize the optimizer.
+
+        :param resolution: The spacing of the candidate lattice in dollars.
+        :param number_of_candidates: The number of random candidates, or None
+        to use the lattice.
+        :param max_candidates: The most lattice candidates. The lattice
+        spacing is doubled from the resolution until the lattice fits this
+        and the evaluation budget.
+        :param max_time: Wall-clock budget in seconds per agent per step.
+        :param max_evaluations: Objective evaluation budget per agent per step.
+        """
+
+        super().__init__(max_time, max_evaluations)
+        self.resolution = resolution
+        self.number_of_candidates = number_of_candidates
+        self.max_candidates = max_candidates
+        self._allocations = {}
+
+    def prepare(self, agents):
+        start_time = time.perf_counter()
+        allocations, evaluations = self.optimize_population(agents)
+        wall_time = (time.perf_counter() - start_time) / len(agents)
+        for agent, allocation in zip(agents, allocations):
+            self._allocations[agent.unique_id] = (allocation, evaluations,
+                                                  wall_time)
+
+    def optimize(self, agent):
+        if agent.unique_id not in self._allocations:
+            self.prepare([agent])
+
+        allocation, evaluations, wall_time =\
+            self._allocations.pop(agent.unique_id)
+        agent.optimizer_stats.append({'evaluations': evaluations,
+                                      'acceptance_rate': None,
+                                      'restart_values': [],
+                                      'best_restart': None,
+                                      'wall_time': wall_time,
+                                      'skipped': False})
+        return allocation
+
+    def _candidates(self, agents):
+        """Get the shared candidate allocations.
+
+        :param agents: The agents to optimize.
+        :return: A (candidates x attributes) array of allocations.
+        """
+
+        max_budget = max(agent._budget for agent in agents)
+        dimension = len(agents[0]._inventory)
+        max_candidates = self.max_candidates
+        if self.max_evaluations is not None:
+            max_candidates = min(max_candidates, self.max_evaluations)
+
+        if self.number_of_candidates is None:
+            # Coarsen the lattice until it fits, since a prefix of the
+            # lattice would only cover small values of the first attribute.
+            resolution = self.resolution
+            while budget_lattice_size(max_budget, resolution,
+                                      dimension) > max_candidates:
+                resolution *= 2
+            LOGGER.debug('resolution = %s', resolution)
+            candidates = budget_lattice(max_budget, resolution, dimension)
+        else:
+            # Sampling with an extra slack value spreads the candidates over
+            # allocations that spend less than the whole budget. The zero
+            # allocation is always a candidate so every agent has one within
+            # its budget.
+            candidates = sample_budget_simplex(
+                max_budget, dimension + 1,
+                max(min(self.number_of_candidates, max_candidates - 1), 0),
+                rng=agents[0].model.rng)
+            candidates = np.vstack([np.zeros(dimension),
+                                    candidates[:, :dimension]])
+        return candidates.astype(float)
+
+    def _scores(self, agents, candidates, time_step):
+        """Get the score of every agent for every candidate.
+
+        :param agents: The agents to optimize.
+        :param candidates: A (candidates x attributes) array of allocations.
+        :param time_step: The current time step.
+        :return: An (agents x candidates) array of scores.
+        """
+
+        scores = np.zeros((len(agents), len(candidates)))
+        weights = agents[0].model.attribute_weights(time_step)
+        for index, attribute in enumerate(agents[0]._inventory):
+            weight = weights[index]
+
+            # Production depends on each agent's efficiency, but only on the
+            # distinct funding amounts of this attribute. Broadcasting the
+            # efficiencies against the amounts evaluates every agent at once.
+            amounts, inverse = np.unique(candidates[:, index],
+                                         return_inverse=True)
+            efficiencies = np.array([
+                agent._production_efficiencies[attribute.name]
+                for agent in agents])
+            productions = attribute.production_array(
+                amounts[np.newaxis, :], efficiencies[:, np.newaxis])
+            valuations = attribute.valuation_array(productions)
+            scores += weight * valuations[:, inverse.ravel()]
+        return scores
+
+    def optimize_population(self, agents):
+        """Find the attribute mix for every agent.
+
+        :param agents: The agents to optimize.
+        :return: The list of funding allocations, in whole dollars, and the
+        number of candidates evaluated for each agent.
+        """
+
+        start_time = time.perf_counter()
+        candidates = self._candidates(agents)
+        budgets = np.array([agent._budget for agent in agents])
+        time_step = agents[0].model.schedule.time
+
+        # Evaluate the candidates in chunks so the time budget can be checked.
+        chunk_size = 10_000
+        best_scores = np.full(len(agents), -np.inf)
+        best_allocations = np.zeros((len(agents), candidates.shape[1]))
+        evaluations = 0
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            scores = self._scores(agents, chunk, time_step)
+            evaluations += len(chunk)
+
+            # Mask the candidates that are over each agent's budget.
+            feasible = chunk.sum(axis=1)[np.newaxis, :]\
+                <= budgets[:, np.newaxis]
+            scores = np.where(feasible, scores, -np.inf)
+            best = scores.argmax(axis=1)
+            improved = scores[np.arange(len(agents)), best] > best_scores
+            best_scores[improved] = scores[improved, best[improved]]
+            best_allocations[improved] = chunk[best[improved]]
+
+            if (self.max_time is not None and time.perf_counter() - start_time
+                    >= self.max_time * len(agents)):
+                LOGGER.debug('time budget exhausted after %d evaluations',
+                             evaluations)
+                break
+
+        allocations = [[int(amount) for amount in allocation]
+                       for allocation in best_allocations]
+        return allocations, evaluations
+
+
+OPTIMIZERS = {'basinhopping': BasinHoppingOptimizer,
+              'slsqp': SLSQPOptimizer,
+              'differential_evolution': DifferentialEvolutionOptimizer,
+              'grid': GridOptimizer,
+              'analytic': AnalyticOptimizer,
+              'population': PopulationOptimizer}
+
+
+def create_optimizer(optimizer=None, **options):
+    """Create an optimizer strategy.
+
+    :param optimizer: The optimizer name, an Optimizer instance or None for
+    the default basin hopping optimizer.
+    :param options: Keyword arguments passed to the optimizer constructor.
+    :return: The optimizer.
+    """
+
+    if optimizer is None:
+        optimizer = 'basinhopping'
+    if isinstance(optimizer, Optimizer):
+        return optimizer
+    if optimizer not in OPTIMIZERS:
+        raise ValueError('Unknown optimizer {}, expected one of {}.'
+                         .format(optimizer, sorted(OPTIMIZERS)))
+    return OPTIMIZERS[optimizer](**options)
+
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -1,9 +1,95 @@
 """Utility functions used to plot."""
+import bisect
 import itertools
+import numbers
+import os
+import re
+import weakref
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
 from IPython.display import display
 
+# The table data frames and histories by model, kept until the model steps
+# or a table grows.
+_HISTORY_CACHE = weakref.WeakKeyDictionary()
+
+
+def _model_cache(model):
+    """Get the history cache of the model for its current step.
+
+    :param model: The ranking model.
+    :return: The cache dictionary.
+    """
+
+    cache = _HISTORY_CACHE.get(model)
+    if cache is None or cache['time'] != model.schedule.time:
+        cache = {'time': model.schedule.time, 'tables': {}, 'histories': {}}
+        _HISTORY_CACHE[model] = cache
+    return cache
+
+
+def _table_data_frame(model, table_name):
+    """Get the table data frame, built once per model step.
+
+    The data frame is shared by the callers, so it must not be modified.
+
+    :param model: The ranking model.
+    :param table_name: The name of the table.
+    :return: The table data frame.
+    """
+
+    cache = _model_cache(model)
+    table = model.data_collector.tables[table_name]
+    rows = len(next(iter(table.values()), []))
+    cached = cache['tables'].get(table_name)
+    if cached is None or cached[0] != rows:
+        cached = (rows, pd.DataFrame(table))
+        cache['tables'][table_name] = cached
+        cache['histories'] = {key: history for key, history
+                              in cache['histories'].items()
+                              if key[0] != table_name}
+    return cached[1]
+
+
+def history_data_frame(model, table_name, value):
+    """Get a table column as a wide element by period data frame.
+
+    The table is pivoted in one pass, and the result is cached until the
+    model steps, so repeated plots of the same history do not rebuild it.
+    The data frame is shared by the callers, so it must not be modified.
+
+    :param model: The ranking model.
+    :param table_name: The table used to find the values.
+    :param value: The value to find.
+    :return: The data frame with a row per element and a column per period.
+    """
+
+    table = _table_data_frame(model, table_name)
+    cache = _model_cache(model)
+    key = (table_name, value)
+    history = cache['histories'].get(key)
+    if history is None:
+        history = table.pivot(index='element', columns='period', values=value)
+        cache['histories'][key] = history
+    return history
+
+
+def history_array(model, table_name, value):
+    """Get a table column as an element by period array.
+
+    :param model: The ranking model.
+    :param table_name: The table used to find the values.
+    :param value: The value to find.
+    :return: The (elements x periods) array, with the elements and periods
+    in sorted order.
+    """
+
+    return history_data_frame(model, table_name, value).to_numpy()
+
 
 def find_values_by_agent(model, table_name, value):
     """Find the values by agent dictionary from the model.
@@ -14,12 +100,10 @@ def find_values_by_agent(model, table_name, value):
     :return: The values by agent dictionary.
     """
 
-    table = model.data_collector.get_table_dataframe(table_name)
+    history = history_data_frame(model, table_name, value)
     value_by_agent = {}
-    for agent, data_frame in table.groupby('element'):
-        value_by_agent[agent] = [None]
-        for _, row in data_frame.iterrows():
-            value_by_agent[agent].append(row[value])
+    for agent, values in zip(history.index, history.to_numpy().tolist()):
+        value_by_agent[agent] = [None] + values
 
     return value_by_agent
 
@@ -37,147 +121,505 @@ def table_column_to_list(model, table_name, column_name, start_list=None):
     if start_list is None:
         start_list = []
 
-    table = model.data_collector.get_table_dataframe(table_name)
+    table = _table_data_frame(model, table_name)
     column_as_list = table[column_name].tolist()
 
     return start_list + column_as_list
 
 
-def display_ranking(model, max_rows=None, all_rows=False):
-    """Display the ranking data frame.
+def _table_rows(model, table_name, periods=None, agents=None):
+    """Find the rows of a collector table in the periods and for the agents.
 
-    :param model: The model to display.
+    The rows are collected in period order, so the periods bound a
+    contiguous block of rows that is found by bisection.
+
+    :param model: The ranking model.
+    :param table_name: The name of the table.
+    :param periods: A period or an iterable of periods, by default all.
+    :param agents: An iterable of agent unique ids, by default all.
+    :return: The sequence of row positions.
+    :raises ValueError: If agents are given for a table without agents.
+    """
+
+    table = model.data_collector.tables[table_name]
+    period_column = table['period']
+    rows = range(len(period_column))
+    if periods is not None:
+        periods = {periods} if isinstance(periods, numbers.Integral) \
+            else set(periods)
+        if not periods:
+            return range(0)
+        first, last = min(periods), max(periods)
+        start = bisect.bisect_left(period_column, first)
+        rows = range(start, bisect.bisect_right(period_column, last, lo=start))
+        if len(periods) != last - first + 1:
+            rows = [row for row in rows if period_column[row] in periods]
+    if agents is not None:
+        if 'element' not in table:
+            raise ValueError('Table {} has no agents'.format(table_name))
+        agents = set(agents)
+        element_column = table['element']
+        rows = [row for row in rows if element_column[row] in agents]
+    return rows
+
+
+def table_slice(model, table_name, periods=None, agents=None, offset=0,
+                limit=None):
+    """Get a page of a collector table as a data frame.
+
+    Only the rows of the page are copied out of the data collector, so
+    showing a few rows of a long run does not build the whole table.
+
+    :param model: The ranking model.
+    :param table_name: The name of the table.
+    :param periods: A period or an iterable of periods, by default all.
+    :param agents: An iterable of agent unique ids, by default all.
+    :param offset: The number of matching rows to skip.
+    :param limit: The maximum number of rows, by default all.
+    :return: The data frame indexed by the table row positions.
+    """
+
+    rows = _table_rows(model, table_name, periods, agents)
+    rows = rows[offset:None if limit is None else offset + limit]
+    table = model.data_collector.tables[table_name]
+    return pd.DataFrame({column: [values[row] for row in rows]
+                         for column, values in table.items()},
+                        index=pd.Index(list(rows)))
+
+
+def _display_table(model, table_name, column_names, max_rows, all_rows,
+                   periods, agents, offset, limit, total_column=None):
+    """Display a page of a collector table with readable column names.
+
+    :param model: The ranking model.
+    :param table_name: The name of the table.
+    :param column_names: The display names of the table columns.
     :param max_rows: The maximum number of rows to display.
     :param all_rows: All rows boolean flag.
+    :param periods: A period or an iterable of periods, by default all.
+    :param agents: An iterable of agent unique ids, by default all.
+    :param offset: The number of matching rows to skip.
+    :param limit: The maximum number of rows, by default all matching rows.
+    :param total_column: The column to total over the matching rows.
     """
 
-    ranking = model.data_collector.get_table_dataframe('ranking')
-    ranking.columns = ['University', 'Time', 'Rank', 'Score',
-                       'Normalized Score']
+    page = table_slice(model, table_name, periods, agents, offset, limit)
+    page.columns = column_names
+
+    if total_column is not None:
+        # Total over every matching row, straight from the collector.
+        table = model.data_collector.tables[table_name]
+        total = sum(table[total_column][row] for row in
+                    _table_rows(model, table_name, periods, agents))
+        total_row = dict.fromkeys(column_names, '')
+        total_name = column_names[list(table).index(total_column)]
+        total_row[total_name] = round(total, model.DECIMAL_PLACES)
+        page = pd.concat([page, pd.DataFrame(total_row, index=['Total'])])
 
     if all_rows:
-        display(ranking)
+        display(page)
     elif max_rows is not None:
         with pd.option_context('display.max_rows', max_rows):
-            display(ranking)
+            display(page)
     else:
         with pd.option_context('display.max_rows', len(model.agents) * 4):
-            display(ranking)
+            display(page)
+
 
+def display_ranking(model, max_rows=None, all_rows=False, periods=None,
+                    agents=None, offset=0, limit=None):
+    """Display the ranking data frame.
 
-def display_attribute(model, attribute_name, max_rows=None, all_rows=False):
+    :param model: The model to display.
+    :param max_rows: The maximum number of rows to display.
+    :param all_rows: All rows boolean flag.
+    :param periods: A period or an iterable of periods, by default all.
+    :param agents: An iterable of agent unique ids, by default all.
+    :param offset: The number of matching rows to skip.
+    :param limit: The maximum number of rows to display.
+    """
+
+    _display_table(model, 'ranking', ['University', 'Time', 'Rank', 'Score',
+                                      'Normalized Score'],
+                   max_rows, all_rows, periods, agents, offset, limit)
+
+
+def display_attribute(model, attribute_name, max_rows=None, all_rows=False,
+                      periods=None, agents=None, offset=0, limit=None):
     """Display the attribute data frame.
 
     :param model: The model with attributes to display.
     :param attribute_name: The name of the attribute to display.
     :param max_rows: The maximum number of rows to display.
     :param all_rows: All rows boolean flag.
+    :param periods: A period or an iterable of periods, by default all.
+    :param agents: An iterable of agent unique ids, by default all.
+    :param offset: The number of matching rows to skip.
+    :param limit: The maximum number of rows to display.
     """
 
-    attributes = model.data_collector.get_table_dataframe(attribute_name)
-    attributes.columns = ['University', 'Time', 'Funding', 'Production',
-                          'Valuation', 'Weight', 'Score']
-    if all_rows:
-        display(attributes)
-    elif max_rows is not None:
-        with pd.option_context('display.max_rows', max_rows):
-            display(attributes)
-    else:
-        with pd.option_context('display.max_rows', len(model.agents) * 4):
-            display(attributes)
+    _display_table(model, attribute_name, ['University', 'Time', 'Funding',
+                                           'Production', 'Valuation',
+                                           'Weight', 'Score'],
+                   max_rows, all_rows, periods, agents, offset, limit)
 
 
-def display_societal_value(model, max_rows=None, all_rows=False):
+def display_societal_value(model, max_rows=None, all_rows=False, periods=None,
+                           offset=0, limit=None):
     """Display the societal value data frame.
 
+    The total row sums the societal value over all the periods displayed on
+    every page.
+
     :param model: The model with attributes to display.
     :param max_rows: The maximum number of rows to display.
     :param all_rows: All rows boolean flag.
+    :param periods: A period or an iterable of periods, by default all.
+    :param offset: The number of matching rows to skip.
+    :param limit: The maximum number of rows to display.
     """
 
-    societal_values = model.data_collector.get_table_dataframe('societal_value')
-    societal_values.columns = ['Time', 'Societal Value']
-
-    societal_values.loc['Total', 'Time'] = ''
-
-    societal_values.loc['Total', 'Societal Value'] =\
-        round(societal_values['Societal Value'].sum(), model.DECIMAL_PLACES)
-
-    if all_rows:
-        display(societal_values)
-    elif max_rows is not None:
-        with pd.option_context('display.max_rows', max_rows):
-            display(societal_values)
-    else:
-        with pd.option_context('display.max_rows', len(model.agents) * 4):
-            display(societal_values)
+    _display_table(model, 'societal_value', ['Time', 'Societal Value'],
+                   max_rows, all_rows, periods, None, offset, limit,
+                   total_column='societal_value')
 
 
-def display_ranking_dynamics(model, max_rows=None, all_rows=False):
+def display_ranking_dynamics(model, max_rows=None, all_rows=False,
+                             periods=None, offset=0, limit=None):
     """Display the ranking dynamics data frame.
 
     :param model: The model with table to display.
     :param max_rows: The maximum number of rows to display.
     :param all_rows: All rows boolean flag.
+    :param periods: A period or an iterable of periods, by default all.
+    :param offset: The number of matching rows to skip.
+    :param limit: The maximum number of rows to display.
     """
 
-    ranking_dynamics =\
-        model.data_collector.get_table_dataframe('ranking_dynamics')
-    ranking_dynamics.columns = ['Time', 'Distance', 'Society Value Change',
-                                'Gamma']
-    if all_rows:
-        display(ranking_dynamics)
-    elif max_rows is not None:
-        with pd.option_context('display.max_rows', max_rows):
-            display(ranking_dynamics)
+    _display_table(model, 'ranking_dynamics', ['Time', 'Distance',
+                                               'Society Value Change',
+                                               'Gamma'],
+                   max_rows, all_rows, periods, None, offset, limit)
+
+
+def lttb_indices(x_values, y_values, threshold):
+    """Downsample a series with the largest triangle three buckets method.
+
+    The first and last points are kept, and the points in between are split
+    into threshold - 2 buckets. From each bucket the point that forms the
+    largest triangle with the point kept from the previous bucket and the
+    average of the next bucket is kept.
+
+    :param x_values: The array of x values, in increasing order.
+    :param y_values: The array of y values.
+    :param threshold: The number of points to keep.
+    :return: The array of the indices of the points kept.
+    """
+
+    length = len(x_values)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, threshold - 1).astype(int)
+
+    # The averages of each bucket and of the last point, the next bucket of
+    # the last bucket.
+    sizes = np.append(np.diff(edges), 1)
+    average_x = np.add.reduceat(x_values, edges) / sizes
+    average_y = np.add.reduceat(y_values, edges) / sizes
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = length - 1
+    kept = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Twice the triangle areas, up to a term that is the same for every
+        # point in the bucket.
+        delta_x = x_values[kept] - average_x[bucket + 1]
+        delta_y = average_y[bucket + 1] - y_values[kept]
+        areas = np.abs(delta_x * y_values[start:end]
+                       + delta_y * x_values[start:end]
+                       - (delta_x * y_values[kept]
+                          + delta_y * x_values[kept]))
+        kept = start + np.argmax(areas)
+        indices[bucket + 1] = kept
+    return indices
+
+
+def min_max_indices(y_values, buckets):
+    """Downsample a series to the minimum and maximum of each bucket.
+
+    :param y_values: The array of y values.
+    :param buckets: The number of buckets, for example one per pixel.
+    :return: The array of the indices of the points kept, in order.
+    """
+
+    length = len(y_values)
+    if 2 * buckets >= length:
+        return np.arange(length)
+
+    # Pad the values to equal sized buckets, one bucket per row. The padding
+    # is never the minimum or maximum of a row.
+    size = -(-length // buckets)
+    rows = -(-length // size)
+    low = np.full(rows * size, np.inf)
+    low[:length] = y_values
+    high = np.full(rows * size, -np.inf)
+    high[:length] = y_values
+    offsets = np.arange(rows) * size
+    return np.unique(np.concatenate([
+        offsets + low.reshape(rows, size).argmin(axis=1),
+        offsets + high.reshape(rows, size).argmax(axis=1)]))
+
+
+def select_series(data, top=None, sample=None, random_seed=None):
+    """Select the series to plot from a dictionary of series.
+
+    :param data: The dictionary of series by label.
+    :param top: Keep the series with the top last values.
+    :param sample: Keep a random sample of this many series.
+    :param random_seed: The seed of the random sample.
+    :return: The dictionary of the selected series, in the original order.
+    """
+
+    labels = list(data)
+    if top is not None:
+        def last_value(label):
+            values = [value for value in data[label] if value is not None
+                      and not np.isnan(value)]
+            return values[-1] if values else -np.inf
+        labels = sorted(labels, key=last_value, reverse=True)[:top]
+    if sample is not None and sample < len(labels):
+        generator = np.random.default_rng(random_seed)
+        labels = list(generator.choice(labels, sample, replace=False))
+    selected = set(labels)
+    return {label: values for label, values in data.items()
+            if label in selected}
+
+
+def _downsample(y_values, max_points, downsample):
+    """Downsample a series for plotting.
+
+    Missing values, None or NaN, are left out of downsampled series.
+
+    :param y_values: The list of y values, plotted against their index.
+    :param max_points: The most points to plot.
+    :param downsample: 'lttb', 'min_max' or None to plot every point.
+    :return: The x values and y values to plot.
+    """
+
+    y_values = np.array([np.nan if value is None else value
+                         for value in y_values], dtype=float)
+    x_values = np.arange(len(y_values))
+    if downsample is None or len(y_values) <= max_points:
+        return x_values, y_values
+
+    present = ~np.isnan(y_values)
+    x_values, y_values = x_values[present], y_values[present]
+    if downsample == 'lttb':
+        indices = lttb_indices(x_values, y_values, max_points)
+    elif downsample == 'min_max':
+        indices = min_max_indices(y_values, max_points // 2)
     else:
-        with pd.option_context('display.max_rows', len(model.agents) * 4):
-            display(ranking_dynamics)
+        raise ValueError('Unknown downsample method ' + str(downsample))
+    return x_values[indices], y_values[indices]
+
+
+def _figure_width_pixels(axes):
+    """The width of the axes' figure in pixels.
+
+    :param axes: The axes.
+    :return: The width in pixels.
+    """
+
+    figure = axes.get_figure()
+    return int(figure.get_figwidth() * figure.dpi)
 
 
 # pylint: disable=too-many-arguments
 def line_plot(data, xlabel, ylabel, title, xlim_left=None, xlim_right=None,
-              ylim_bottom=None, ylim_top=None):
-    """Line plot function."""
+              ylim_bottom=None, ylim_top=None, **options):
+    """Line plot function.
+
+    :param options: The downsampling, series selection and marker options
+    of list_line_plot and dictionary_line_plot.
+    """
 
     if isinstance(data, list):
         list_line_plot(data, xlabel, ylabel, title, xlim_left=xlim_left,
                        xlim_right=xlim_right, ylim_bottom=ylim_bottom,
-                       ylim_top=ylim_top)
+                       ylim_top=ylim_top, **options)
     elif isinstance(data, dict):
         dictionary_line_plot(data, xlabel, ylabel, title,
                              xlim_left=xlim_left, xlim_right=xlim_right,
-                             ylim_bottom=ylim_bottom, ylim_top=ylim_top)
+                             ylim_bottom=ylim_bottom, ylim_top=ylim_top,
+                             **options)
 
 
 def list_line_plot(data, xlabel, ylabel, title, xlim_left=None, xlim_right=None,
-                   ylim_bottom=None, ylim_top=None):
-    """Plot the total volatility over time."""
+                   ylim_bottom=None, ylim_top=None, max_points=None,
+                   downsample='lttb', marker_threshold=100, axes=None):
+    """Plot the total volatility over time.
+
+    :param max_points: The most points to plot, by default the figure width
+    in pixels. Longer series are downsampled.
+    :param downsample: 'lttb', 'min_max' or None to plot every point.
+    :param marker_threshold: Markers are left out above this many points.
+    :param axes: The axes to plot on, by default a new pyplot figure.
+    """
 
-    _, axes = plt.subplots()
-    axes.plot(data, marker='s', fillstyle='full', markerfacecolor='w',
-              markeredgecolor='grey')
+    if axes is None:
+        _, axes = plt.subplots()
+    max_points = max_points or _figure_width_pixels(axes)
+    x_values, y_values = _downsample(data, max_points, downsample)
+    marker = 's' if len(x_values) <= marker_threshold else None
+    axes.plot(x_values, y_values, marker=marker, fillstyle='full',
+              markerfacecolor='w', markeredgecolor='grey')
     axes.set(xlabel=xlabel, ylabel=ylabel, title=title)
-    plt.xlim(xlim_left, xlim_right)
-    plt.ylim(ylim_bottom, ylim_top)
-    plt.tick_params(direction='in', top=True, right=True)
+    axes.set_xlim(xlim_left, xlim_right)
+    axes.set_ylim(ylim_bottom, ylim_top)
+    axes.tick_params(direction='in', top=True, right=True)
 
 
 def dictionary_line_plot(data, xlabel, ylabel, title, xlim_left=None,
-                         xlim_right=None, ylim_bottom=None, ylim_top=None):
-    """Plot the agent volatility over time."""
+                         xlim_right=None, ylim_bottom=None, ylim_top=None,
+                         max_points=None, downsample='lttb',
+                         marker_threshold=100, top=None, sample=None,
+                         random_seed=None, max_legend_entries=20, axes=None):
+    """Plot the agent volatility over time.
+
+    :param max_points: The most points to plot per series, by default the
+    figure width in pixels. Longer series are downsampled.
+    :param downsample: 'lttb', 'min_max' or None to plot every point.
+    :param marker_threshold: Markers are left out above this many points in
+    a series.
+    :param top: Plot the series with the top last values.
+    :param sample: Plot a random sample of this many series.
+    :param random_seed: The seed of the random sample.
+    :param max_legend_entries: The legend is left out above this many series.
+    :param axes: The axes to plot on, by default a new pyplot figure.
+    """
 
-    _, axes = plt.subplots()
+    if axes is None:
+        _, axes = plt.subplots()
+    max_points = max_points or _figure_width_pixels(axes)
+    data = select_series(data, top, sample, random_seed)
     marker = itertools.cycle(('o', 's', 'h', 'd', 'p', 'v', '^', '<', '>', 'H',
                               'D', '*', '|', 'x', '1', '2', '3', '4'))
     legend_labels = []
     for label, y_values in data.items():
         legend_labels.append(label)
-        axes.plot(y_values, label=label, marker=next(marker), fillstyle='full',
-                  markerfacecolor='w', markeredgecolor='grey')
+        x_values, y_values = _downsample(y_values, max_points, downsample)
+        series_marker = next(marker)
+        if len(x_values) > marker_threshold:
+            series_marker = None
+        axes.plot(x_values, y_values, label=label, marker=series_marker,
+                  fillstyle='full', markerfacecolor='w',
+                  markeredgecolor='grey')
 
     axes.set(xlabel=xlabel, ylabel=ylabel, title=title)
-    axes.legend(labels=legend_labels, fontsize='small')
-    plt.xlim(xlim_left, xlim_right)
-    plt.ylim(ylim_bottom, ylim_top)
-    plt.tick_params(direction='in', top=True, right=True)
+    if len(legend_labels) <= max_legend_entries:
+        axes.legend(labels=legend_labels, fontsize='small')
+    axes.set_xlim(xlim_left, xlim_right)
+    axes.set_ylim(ylim_bottom, ylim_top)
+    axes.tick_params(direction='in', top=True, right=True)
+
+
+def model_charts(model):
+    """Get the line plot charts of a model run for exporting.
+
+    :param model: The ranking model.
+    :return: The list of chart dictionaries with the line_plot arguments.
+    """
+
+    charts = [{'data': find_values_by_agent(model, 'ranking',
+                                            'normalized_score'),
+               'xlabel': 'time', 'ylabel': 'normalized score',
+               'title': 'Normalized scores over time'},
+              {'data': find_values_by_agent(model, 'ranking', 'score'),
+               'xlabel': 'time', 'ylabel': 'score',
+               'title': 'Scores over time'}]
+    for attribute in model.attributes:
+        charts.append({'data': find_values_by_agent(model, attribute.name,
+                                                    'funding'),
+                       'xlabel': 'time', 'ylabel': 'funding',
+                       'title': attribute.name + ' funding over time'})
+    charts.append({'data': table_column_to_list(model, 'societal_value',
+                                                'societal_value', [None]),
+                   'xlabel': 'time', 'ylabel': 'societal value',
+                   'title': 'Societal value over time'})
+    return charts
+
+
+def export_figure(chart, path, figsize=None, dpi=100):
+    """Render a chart to an image file with the Agg backend.
+
+    The figure is created without pyplot, so no pyplot state is shared and
+    no display is needed. The file format follows the path extension, for
+    example png or svg.
+
+    :param chart: The chart dictionary with the line_plot arguments.
+    :param path: The path of the image file.
+    :param figsize: The figure size in inches, by default the rc setting.
+    :param dpi: The figure resolution in dots per inch.
+    :return: The path of the image file.
+    """
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    line_plot(axes=figure.add_subplot(), **chart)
+    figure.savefig(path)
+    return path
+
+
+def _export_figure(arguments):
+    """Export one figure in a worker process.
+
+    :param arguments: The export_figure positional arguments.
+    :return: The path of the image file.
+    """
+
+    return export_figure(*arguments)
+
+
+def export_figures(charts, paths, figsize=None, dpi=100, workers=None):
+    """Render charts to image files, in parallel across processes.
+
+    Each chart is rendered by export_figure, one figure per task, so the
+    workers share no pyplot state.
+
+    :param charts: The list of chart dictionaries.
+    :param paths: The list of image file paths, one per chart.
+    :param figsize: The figure size in inches, by default the rc setting.
+    :param dpi: The figure resolution in dots per inch.
+    :param workers: The number of worker processes, by default the number
+    of CPUs. With one worker the figures are rendered in this process.
+    :return: The list of the image file paths.
+    """
+
+    tasks = [(chart, path, figsize, dpi) for chart, path in zip(charts, paths)]
+    if workers == 1 or len(tasks) <= 1:
+        return [_export_figure(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_export_figure, tasks))
+
+
+def export_model_figures(model, directory, image_format='png', workers=None,
+                         **options):
+    """Export the line plots of a model run as image files.
+
+    :param model: The ranking model.
+    :param directory: The directory of the image files, created if needed.
+    :param image_format: The image file format, for example png or svg.
+    :param workers: The number of worker processes.
+    :param options: The figsize and dpi options of export_figures.
+    :return: The list of the image file paths.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    charts = model_charts(model)
+    paths = [os.path.join(directory, '{}.{}'.format(
+        re.sub(r'[^a-z0-9]+', '_', chart['title'].lower()).strip('_'),
+        image_format)) for chart in charts]
+    return export_figures(charts, paths, workers=workers, **options)
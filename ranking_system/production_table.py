@@ -0,0 +1,181 @@
+"""Dense production lookup table for one production efficiency.
+
+The production functions are smooth in the funding, so for a fixed
+production efficiency they are served by linear interpolation on a uniform
+funding grid. The grid is refined until the interpolation error against the
+exact production function is within a tolerance. Funding outside the grid
+falls back to the exact production function, with a warning the first time
+funding is past the end of the grid.
+"""
+import logging
+import numpy as np
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+LOGGER = logging.getLogger('ranking_system.production_table')
+
+
+class ProductionTable:
+    """Production by funding on a uniform grid, served by interpolation."""
+
+    def __init__(self, production_function, max_funding, tolerance=1e-3,
+                 size=257, max_size=2**20 + 1):
+        """Build the production table.
+
+        The grid is doubled until the largest difference between the
+        interpolated and the exact production at the grid midpoints is
+        within the tolerance, or the grid reaches the maximum size.
+
+        :param production_function: Function of an array of funding that
+        returns the array of the amounts produced.
+        :param max_funding: The funding at the end of the grid.
+        :param tolerance: The interpolation error bound.
+        :param size: The initial number of funding grid points.
+        :param max_size: The maximum number of funding grid points.
+        """
+
+        self.max_funding = max_funding
+        self.tolerance = tolerance
+        self._production_function = production_function
+        self._warned = False
+
+        funding = np.linspace(0, max_funding, size)
+        values = production_function(funding)
+        while True:
+            # Compare the interpolation at the midpoints with the exact
+            # production, and reuse the midpoints when the grid is refined.
+            midpoints = (funding[:-1] + funding[1:]) / 2
+            exact = production_function(midpoints)
+            self.max_error = float(np.max(np.abs(
+                (values[:-1] + values[1:]) / 2 - exact)))
+            if self.max_error <= tolerance or 2 * size - 1 > max_size:
+                break
+            size = 2 * size - 1
+            funding = np.linspace(0, max_funding, size)
+            refined = np.empty(size)
+            refined[0::2] = values
+            refined[1::2] = exact
+            values = refined
+
+        LOGGER.debug('max_funding = %s  size = %d  max_error = %s',
+                     max_funding, size, self.max_error)
+
+        self.funding = funding
+        self.values = values
+        self._step = max_funding / (size - 1)
+        self._last = size - 1
+
+        # Python lists are faster than arrays for single element lookups.
+        self._value_list = values.tolist()
+        self._difference_list = np.diff(values).tolist()
+
+        # The best production reached with at most the funding at each grid
+        # point, in the direction the production improves, for the inverse.
+        self._increasing = values[-1] >= values[0]
+        direction = 1 if self._increasing else -1
+        self._reached = np.maximum.accumulate(direction * values)
+
+    def __call__(self, funding):
+        """Look up the amount produced for the funding.
+
+        :param funding: The scalar or array funding.
+        :return: The interpolated amount produced.
+        """
+
+        if isinstance(funding, (list, tuple, np.ndarray)) \
+                and np.ndim(funding) > 0:
+            return self.lookup_array(funding)
+
+        position = funding / self._step
+        if not 0 <= position < self._last:
+            if position == self._last:
+                return self._value_list[-1]
+            return float(self._exact_production(np.asarray(funding)))
+        index = int(position)
+        return (self._value_list[index]
+                + (position - index) * self._difference_list[index])
+
+    def lookup_array(self, funding):
+        """Look up the amounts produced for an array of funding.
+
+        :param funding: The array of funding.
+        :return: The array of interpolated amounts produced.
+        """
+
+        funding = np.asarray(funding, dtype=float)
+        amounts = np.interp(funding, self.funding, self.values)
+        outside = (funding < 0) | (funding > self.max_funding)
+        if outside.any():
+            amounts[outside] = self._exact_production(funding[outside])
+        return amounts
+
+    def _exact_production(self, funding):
+        """Evaluate the exact production for funding outside the grid.
+
+        :param funding: The array of funding outside the grid.
+        :return: The array of the amounts produced.
+        """
+
+        if not self._warned and np.any(funding > self.max_funding):
+            self._warned = True
+            LOGGER.warning('Funding %s is past the end of the production '
+                           'table at %s, using the exact production.',
+                           np.max(funding), self.max_funding)
+        return self._production_function(funding)
+
+    def inverse(self, target):
+        """Find the least funding that produces at least the target amount.
+
+        At least means at least as good, which is less for a decreasing
+        production such as the class size.
+
+        :param target: The scalar or array target amount.
+        :return: The funding, or infinity where the target is not reached
+        within the table's maximum funding.
+        """
+
+        direction = 1 if self._increasing else -1
+        target = direction * np.asarray(target, dtype=float)
+        index = np.searchsorted(self._reached, target, side='left')
+
+        # The target is first reached on the grid segment ending at index.
+        segment = np.clip(index, 1, self._last)
+        start = direction * self.values[segment - 1]
+        end = direction * self.values[segment]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.clip((target - start) / (end - start), 0, 1)
+        funding = (segment - 1 + fraction) * self._step
+        funding = np.where(index == 0, 0.0, funding)
+        funding = np.where(index > self._last, np.inf, funding)
+        return funding if funding.ndim else float(funding)
+
+    def __repr__(self):
+        """The representation function will return the string representation.
+
+        :return: The string representation of the ProductionTable class.
+        """
+
+        return 'ProductionTable[max_funding={}, size={}, max_error={}]'.format(
+            self.max_funding, self._last + 1, self.max_error)
+
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
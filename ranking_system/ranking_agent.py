@@ -1,9 +1,14 @@
 """Ranking agent class file."""
-import copy
 import logging
+import time
 import numpy as np
 from mesa import Agent
-from scipy.optimize import basinhopping
+
+from .math_utils import budget_lattice
+from .math_utils import budget_lattice_chunks
+from .math_utils import budget_lattice_size
+from .math_utils import project_to_budget_simplex
+from .objective_cache import ObjectiveCache
 
 __author__ = "David Balash"
 __copyright__ = "Copyright 2019, Agent Based Models"
@@ -34,8 +39,10 @@ class RankingAgent(Agent):
                                            model.settings['expenditure_max'])
         LOGGER.debug('budget = %f', self._budget)
 
-        # Initialize the agent's inventory.
-        self._inventory = []
+        # The agent's inventory is the model's shared attribute definitions,
+        # and the amounts produced of each are kept by the agent.
+        self._inventory = model.attributes
+        self.attribute_values = np.zeros(len(model.attributes))
 
         # Initialize the agent's score.
         self.score = 0
@@ -58,10 +65,31 @@ class RankingAgent(Agent):
         # The production efficiencies by attribute
         self._production_efficiencies = {}
 
+        # The previous allocation, the budget and weights it was optimized
+        # for and its objective function result, used to warm start the
+        # optimizer and to skip it when the situation is unchanged.
+        self._previous_allocation = None
+        self._previous_budget = None
+        self._previous_weights = None
+        self._previous_result = None
+
+        # The number of consecutive steps the optimum has been stable.
+        self._stable_steps = 0
+
+        # The optimizer iterations saved by warm starting, per step.
+        self.warm_start_savings = []
+
+        # The optimizer statistics, per step.
+        self.optimizer_stats = []
+
+        # Memoize objective function results when enabled in the settings.
+        self.objective_cache = None
+        if model.settings.get('objective_cache', False):
+            self.objective_cache = ObjectiveCache(
+                model.settings.get('objective_cache_size', 100_000))
+
         # Setup the attributes.
         for attribute in model.attributes:
-            inventory_attribute = copy.deepcopy(attribute)
-            self._inventory.append(inventory_attribute)
             self.attribute_funding[attribute.name] = []
             self.attribute_production[attribute.name] = []
             self.attribute_valuation[attribute.name] = []
@@ -85,15 +113,69 @@ class RankingAgent(Agent):
         This is the minus one times the sum(weight * valuation(production)) to
         be used in minimization optimization calculation.
 
+        When the model has a response surface the result is looked up from
+        its cached score curves. When the objective cache is enabled the
+        variables are rounded down to
+        the 'objective_cache_resolution' funding grid and the result for the
+        grid point is memoized by time step. The model's shared objective
+        cache memoizes results across agents and time steps by allocation,
+        production efficiencies and weights.
+
+        :param variables: The variables used in the objective function.
+        :return: The result of applying the objective function to the variables.
+        """
+
+        response_surface = self.model.response_surface
+        if response_surface is not None:
+            return response_surface.scalar_objective(self, variables,
+                                                     self.model.schedule.time)
+
+        shared_cache = self.model.objective_cache
+        if self.objective_cache is None and shared_cache is None:
+            return self._objective_function(variables)
+
+        # Quantize the allocation onto the funding grid.
+        resolution = self.model.settings.get('objective_cache_resolution', 1)
+        allocation = tuple(int(amount // resolution) for amount in variables)
+
+        key = (allocation, self.model.schedule.time)
+        if self.objective_cache is not None:
+            function_output = self.objective_cache.get(key)
+            if function_output is not None:
+                return function_output
+
+        if shared_cache is not None:
+            efficiencies = tuple(self._production_efficiencies[attribute.name]
+                                 for attribute in self._inventory)
+            weights = self.model.attribute_weights()
+            shared_key = (allocation, efficiencies, weights)
+            function_output = shared_cache.get(shared_key)
+            if function_output is None:
+                function_output = self._objective_function(
+                    [amount * resolution for amount in allocation])
+                shared_cache.put(shared_key, function_output)
+        else:
+            function_output = self._objective_function(
+                [amount * resolution for amount in allocation])
+
+        if self.objective_cache is not None:
+            self.objective_cache.put(key, function_output)
+
+        return function_output
+
+    def _objective_function(self, variables):
+        """Evaluate the objective function without memoization.
+
         :param variables: The variables used in the objective function.
         :return: The result of applying the objective function to the variables.
         """
 
         # Calculate the the attribute scores.
         attribute_scores = []
+        weights = self.model.attribute_weights()
         for index, attribute in enumerate(self._inventory):
             # Get the weight for this attribute.
-            weight = attribute.weightage(self.model.schedule.time)
+            weight = weights[index]
 
             # Get the true value of this attribute from the production function.
             efficiency = self._production_efficiencies[attribute.name]
@@ -123,6 +205,241 @@ class RankingAgent(Agent):
 
         return function_output
 
+    def batch_objective_function(self, allocations):
+        """The objective function evaluated for a batch of allocations.
+
+        This is the vectorized form of the objective function. Each row of the
+        allocations array is one candidate allocation and the result for each
+        row is the same as the objective function applied to that row.
+
+        :param allocations: A (k x M) array of k candidate allocations over
+        the M attributes.
+        :return: An array of the k objective function results.
+        """
+
+        allocations = np.atleast_2d(np.asarray(allocations, dtype=float))
+
+        response_surface = self.model.response_surface
+        if response_surface is not None:
+            return response_surface.objective(self, allocations,
+                                              self.model.schedule.time)
+
+        # Sum the weighted valuations column by column, one attribute at a time.
+        sum_attribute_scores = np.zeros(allocations.shape[0])
+        weights = self.model.attribute_weights()
+        for index, attribute in enumerate(self._inventory):
+            weight = weights[index]
+            efficiency = self._production_efficiencies[attribute.name]
+            production = attribute.production_array(allocations[:, index],
+                                                    efficiency)
+            valuation = attribute.valuation_array(production)
+            sum_attribute_scores += weight * valuation
+
+        # The sign is negative to match the objective function.
+        sign = -1
+        return sign * sum_attribute_scores
+
+    # pylint: disable=too-many-arguments
+    def objective_surface(self, x_funding, y_funding, attributes=(0, 1),
+                          allocation=None, mask_infeasible=True):
+        """The objective function over a grid of two attributes' funding.
+
+        The two attributes are funded on the meshgrid of the funding levels
+        and the other attributes keep the funding in the allocation. The
+        whole grid is scored by one batch objective function call.
+
+        :param x_funding: The funding levels of the first attribute.
+        :param y_funding: The funding levels of the second attribute.
+        :param attributes: The indices or names of the two attributes.
+        :param allocation: The funding of the other attributes, by default
+        none.
+        :param mask_infeasible: Mask the allocations over the budget.
+        :return: The (x, y, objective) arrays of shape (len(y_funding),
+        len(x_funding)). The objective is a masked array.
+        """
+
+        names = [attribute.name for attribute in self._inventory]
+        columns = [names.index(attribute) if isinstance(attribute, str)
+                   else attribute for attribute in attributes]
+
+        x_grid, y_grid = np.meshgrid(np.asarray(x_funding, dtype=float),
+                                     np.asarray(y_funding, dtype=float))
+        allocations = np.zeros((x_grid.size, len(self._inventory)))
+        if allocation is not None:
+            allocations[:] = allocation
+        allocations[:, columns[0]] = x_grid.ravel()
+        allocations[:, columns[1]] = y_grid.ravel()
+
+        objective = self.batch_objective_function(allocations).reshape(
+            x_grid.shape)
+        infeasible = np.zeros(x_grid.shape, dtype=bool)
+        if mask_infeasible:
+            infeasible = allocations.sum(axis=1).reshape(x_grid.shape) \
+                > self._budget
+        return x_grid, y_grid, np.ma.masked_array(objective, infeasible)
+
+    @property
+    def differentiable(self):
+        """Whether the objective function has an analytic gradient.
+
+        :return: True if every attribute has production and valuation
+        derivatives.
+        """
+
+        return all(attribute.differentiable for attribute in self._inventory)
+
+    def objective_gradient(self, variables):
+        """The gradient of the objective function.
+
+        By the chain rule each component is minus the weight times the
+        valuation derivative at the production times the production
+        derivative at the funding.
+
+        :param variables: The variables used in the objective function.
+        :return: The array of the partial derivatives by attribute.
+        """
+
+        gradient = np.zeros(len(self._inventory))
+        weights = self.model.attribute_weights()
+        for index, attribute in enumerate(self._inventory):
+            efficiency = self._production_efficiencies[attribute.name]
+            production = attribute.production(variables[index], efficiency)
+            gradient[index] = -(weights[index]
+                                * attribute.valuation_derivative(production)
+                                * attribute.production_derivative(
+                                    variables[index], efficiency))
+        return gradient
+
+    # pylint: disable=too-many-arguments
+    def grid_attribute_mix(self, resolution=100, exact=True,
+                           max_points=100_000, refinement_factor=10,
+                           objective=None):
+        """Find the best allocation on a lattice within the budget.
+
+        In exact mode every allocation on the lattice is scored, in chunks
+        of at most max_points allocations, so the result is guaranteed to be
+        optimal on the lattice. Otherwise the search starts on the finest
+        lattice spaced by the resolution times a power of the refinement
+        factor that has at most max_points allocations. It then refines the
+        lattice by the refinement factor around the best allocation until
+        the spacing is the resolution. The neighborhood is the box of one
+        coarse spacing in each direction when it has at most max_points
+        allocations. Otherwise, since the box grows exponentially with the
+        number of attributes, it is searched coordinate-wise, by moving
+        funding along one attribute or between two attributes, until no
+        move improves. Refinement can miss optima narrower than the coarse
+        spacing.
+
+        :param resolution: The spacing of the lattice in dollars.
+        :param exact: Score the whole lattice instead of refining.
+        :param max_points: The most allocations scored at once.
+        :param refinement_factor: The ratio between successive spacings.
+        :param objective: Function scoring a (k x M) array of allocations,
+        the batch objective function by default.
+        :return: The best allocation as a list.
+        """
+
+        objective = objective or self.batch_objective_function
+        dimension = len(self._inventory)
+
+        if exact:
+            best_allocation, best_value = None, np.inf
+            for lattice in budget_lattice_chunks(self._budget, resolution,
+                                                 dimension, max_points):
+                values = objective(lattice)
+                index = np.argmin(values)
+                if values[index] < best_value:
+                    best_allocation, best_value = lattice[index], values[index]
+            return best_allocation.tolist()
+
+        level = 0
+        while budget_lattice_size(self._budget,
+                                  resolution * refinement_factor ** level,
+                                  dimension) > max_points:
+            level += 1
+        candidates = budget_lattice(self._budget,
+                                    resolution * refinement_factor ** level,
+                                    dimension)
+
+        values = objective(candidates)
+        best_allocation = candidates[np.argmin(values)]
+        best_value = np.min(values)
+        offsets = np.arange(-refinement_factor, refinement_factor + 1)
+        while level > 0:
+            # Search the neighborhood of the best allocation one coarse
+            # spacing in each direction on the finer lattice.
+            level -= 1
+            spacing = resolution * refinement_factor ** level
+            if len(offsets) ** dimension <= max_points:
+                grid = np.meshgrid(*[offsets * spacing] * dimension)
+                moves = [np.column_stack([axis.ravel() for axis in grid])]
+                best_allocation, best_value = self._best_move(
+                    best_allocation, best_value, moves, objective)
+                continue
+
+            improved = True
+            while improved:
+                moves = self._coordinate_moves(dimension, offsets * spacing,
+                                               max_points)
+                allocation, best_value = self._best_move(
+                    best_allocation, best_value, moves, objective)
+                improved = allocation is not best_allocation
+                best_allocation = allocation
+
+        return best_allocation.tolist()
+
+    def _best_move(self, allocation, value, moves, objective):
+        """Find the best feasible allocation among moves from an allocation.
+
+        :param allocation: The current allocation.
+        :param value: The objective value of the current allocation.
+        :param moves: Iterable of (k x M) arrays of funding changes.
+        :param objective: Function scoring a (k x M) array of allocations.
+        :return: The best allocation and its value, the current allocation
+        object itself unless a move strictly improves it.
+        """
+
+        for move in moves:
+            candidates = allocation + move
+            candidates = candidates[(candidates >= 0).all(axis=1)
+                                    & (candidates.sum(axis=1)
+                                       <= self._budget)]
+            if not len(candidates):
+                continue
+            values = objective(candidates)
+            index = np.argmin(values)
+            if values[index] < value:
+                allocation, value = candidates[index], values[index]
+        return allocation, value
+
+    @staticmethod
+    def _coordinate_moves(dimension, steps, max_points):
+        """Generate the moves along one attribute or between two attributes.
+
+        :param dimension: The number of attributes.
+        :param steps: The array of funding steps.
+        :param max_points: The most moves in a generated array.
+        :return: Generator of (k x M) arrays of funding changes.
+        """
+
+        steps = steps[steps != 0]
+        identity = np.eye(dimension)
+        moves = []
+        size = 0
+        for first in range(dimension):
+            # Moving funding along the first attribute, or from a later
+            # attribute to it.
+            directions = identity[first] - identity[first:]
+            directions[0] = identity[first]
+            block = (steps[:, None, None] * directions).reshape(-1, dimension)
+            moves.append(block)
+            size += len(block)
+            if size >= max_points:
+                yield np.vstack(moves)
+                moves, size = [], 0
+        if moves:
+            yield np.vstack(moves)
+
     def _constraint_function(self, variables):
         """The constraint function to be used in the optimization process.
 
@@ -155,37 +472,89 @@ class RankingAgent(Agent):
         sum_bool = bool(sum(x) <= self._budget)
         return x_max and x_min and sum_bool
 
+    def _scaled_previous_allocation(self):
+        """Get the previous allocation scaled to the current budget.
+
+        :return: The scaled allocation, or None without a previous allocation.
+        """
+
+        if self._previous_allocation is None or not self._previous_budget:
+            return None
+
+        scale = self._budget / self._previous_budget
+        return np.asarray(self._previous_allocation, dtype=float) * scale
+
+    def _check_previous_allocation(self):
+        """Check the scaled previous allocation is still locally optimal.
+
+        The check only runs when the weights are unchanged and the budget
+        changed by at most the 'adaptive_budget_tolerance' fraction. It fails
+        if moving any attribute's funding by the 'adaptive_step' fraction of
+        the budget improves the objective, or if the objective is worse than
+        it was for the previous allocation.
+
+        :return: The allocation if the check passes, otherwise None.
+        """
+
+        center = self._scaled_previous_allocation()
+        if center is None or self._previous_result is None \
+                or self.model.attribute_weights() != self._previous_weights:
+            return None
+
+        settings = self.model.settings
+        budget_change = abs(self._budget - self._previous_budget)
+        if (budget_change
+                > settings.get('adaptive_budget_tolerance', 0.1)
+                * self._previous_budget):
+            return None
+
+        # Evaluate the center and a step up and down in each attribute.
+        step = settings.get('adaptive_step', 0.05) * self._budget
+        steps = step * np.eye(len(center))
+        offsets = np.vstack([np.zeros(len(center)), steps, -steps])
+        candidates = np.floor([project_to_budget_simplex(center + offset,
+                                                         self._budget)
+                               for offset in offsets])
+        results = self.batch_objective_function(candidates)
+        if results[1:].min() < results[0] or results[0] > self._previous_result:
+            return None
+
+        return [int(amount) for amount in candidates[0]]
+
     def _optimize_attribute_mix(self):
-        """Optimize the attribute mix."""
-        # Minimize a scalar function of one or more variables using
-        # Sequential Least Squares Programming (SLSQP).
-
-        number_of_initial_values = 5
-        temperature = 10
-        step_size = 100
-
-        best_attribute_mix = [0, 0]
-        best_result = self.objective_function(best_attribute_mix)
-
-        # Optimize multiple times with random initialization values.
-        for _ in range(number_of_initial_values):
-            random_array = np.random.random(len(self._inventory))
-            x0 = (random_array / random_array.sum()) * self._budget
-            LOGGER.debug("Initial x0 = ", x0)
-            solution = basinhopping(self.objective_function, x0,
-                                    T=temperature, stepsize=step_size,
-                                    accept_test=self._basin_hopping_bounds,
-                                    minimizer_kwargs={'method': 'BFGS'},
-                                    niter=2_000)
-            attribute_mix = [int(solution.x[0]), int(solution.x[1])]
-            result = self.objective_function(attribute_mix)
-            if result < best_result:
-                best_result = result
-                best_attribute_mix = attribute_mix
-
-        LOGGER.debug("Best mix = ", best_attribute_mix)
-
-        return best_attribute_mix
+        """Optimize the attribute mix.
+
+        The optimizer strategy is selected through the model settings. With
+        the 'adaptive_effort' setting the optimizer is skipped when a local
+        check shows the previous allocation is still optimal.
+
+        :return: The funding allocation by attribute.
+        """
+
+        if self.model.settings.get('adaptive_effort', False):
+            start_time = time.perf_counter()
+            attribute_mix = self._check_previous_allocation()
+            if attribute_mix is not None:
+                LOGGER.debug('Skipped optimizer, attribute_mix = %s',
+                             attribute_mix)
+                evaluations = 2 * len(self._inventory) + 1
+                self.optimizer_stats.append({
+                    'evaluations': evaluations, 'acceptance_rate': None,
+                    'restart_values': [], 'best_restart': None,
+                    'wall_time': time.perf_counter() - start_time,
+                    'skipped': True})
+                return attribute_mix
+
+        return self.model.optimizer.optimize(self)
+
+    @property
+    def skip_rate(self):
+        """The fraction of steps in which the optimizer was skipped."""
+
+        if not self.optimizer_stats:
+            return 0
+        skipped = sum(stats['skipped'] for stats in self.optimizer_stats)
+        return skipped / len(self.optimizer_stats)
 
     def _buy_attributes(self):
         """Buy attributes based on budget."""
@@ -193,14 +562,23 @@ class RankingAgent(Agent):
         # Use optimization to determine funding allocation.
         funding_allocation = self._optimize_attribute_mix()
         LOGGER.debug('funding_allocation = %s', funding_allocation)
+        self._previous_allocation = funding_allocation
+        self._previous_budget = self._budget
+        self._previous_weights = self.model.attribute_weights()
+
+        # Only the adaptive effort check compares against the previous result.
+        if self.model.settings.get('adaptive_effort', False):
+            self._previous_result = self.objective_function(funding_allocation)
 
         # Randomly allocate funding to attributes.
         for index, attribute in enumerate(self._inventory):
             allocated_funds = funding_allocation[index]
             self.attribute_funding[attribute.name].append(allocated_funds)
             efficiency = self._production_efficiencies[attribute.name]
-            attribute.value = attribute.production(allocated_funds, efficiency)
-            self.attribute_production[attribute.name].append(attribute.value)
+            self.attribute_values[index] = attribute.production(
+                allocated_funds, efficiency)
+            self.attribute_production[attribute.name].append(
+                self.attribute_values[index])
             self._budget -= allocated_funds
 
     def _increment_budget(self):
@@ -219,10 +597,11 @@ class RankingAgent(Agent):
 
         # For each attribute in inventory add the attribute value times the
         # attribute weight to the score
-        for attribute in self._inventory:
-            value = attribute.valuation(attribute.value)
+        weights = self.model.attribute_weights()
+        for index, attribute in enumerate(self._inventory):
+            value = attribute.valuation(self.attribute_values[index])
             self.attribute_valuation[attribute.name].append(value)
-            weight = attribute.weightage(self.model.schedule.time)
+            weight = weights[index]
             self.attribute_weight[attribute.name].append(weight)
             self.score += value * weight
 
@@ -1,4 +1,5 @@
 """The ranking model class file."""
+import copy
 import logging.config
 import numpy as np
 import pandas as pd
@@ -6,7 +7,11 @@ from mesa import Model
 from mesa.datacollection import DataCollector
 from mesa.time import RandomActivation
 
+from .objective_cache import ObjectiveCache
+from .optimizers import create_optimizer
 from .ranking_agent import RankingAgent
+from .response_surface import ResponseSurface
+from .weight_schedule import WeightSchedule
 
 __author__ = "David Balash"
 __copyright__ = "Copyright 2019, Agent Based Models"
@@ -31,7 +36,30 @@ class RankingModel(Model):
 
         :param number_of_agents: The number of agents.
         :param attributes: The list of attributes.
-        :param settings: The settings dictionary.
+        :param settings: The settings dictionary. The optional 'optimizer'
+        setting names the optimizer strategy (see optimizers.OPTIMIZERS) and
+        'optimizer_options' holds its keyword arguments, including the
+        'max_time' and 'max_evaluations' budgets per agent per step. The
+        'objective_cache' and 'shared_objective_cache' settings enable the
+        per agent and shared objective caches, bounded by
+        'objective_cache_size' results, on a funding grid with a spacing of
+        'objective_cache_resolution' dollars. The 'response_surface'
+        setting makes the agents evaluate their objective from a
+        ResponseSurface with a funding grid spacing of
+        'response_surface_resolution' dollars. The 'adaptive_effort' setting
+        lets agents skip the optimizer while their previous allocation is
+        still optimal (see RankingAgent._check_previous_allocation). The
+        'production_tables' setting serves the agents' production from
+        lookup tables up to 'production_table_max_funding' dollars, within
+        'production_table_tolerance' of the production functions. Without a
+        'production_table_max_funding' the tables start at twice the
+        'expenditure_max' and are rebuilt at twice the largest agent budget
+        when a budget outgrows them. The
+        'weight_schedule' setting is a WeightSchedule, a (time steps x
+        attributes) array of weights starting at time step zero, or the path
+        of a CSV file (see WeightSchedule.from_csv) used instead of the
+        weightage functions. The weights at each time step must sum to one
+        within 'weight_tolerance'.
         :param random_seed: The seed for the random number generator.
         """
 
@@ -42,10 +70,49 @@ class RankingModel(Model):
         LOGGER.debug('random_seed = %s', random_seed)
 
         self.reset_randomizer(random_seed)
+
+        # The numpy generator of the optimizers' random draws, seeded with
+        # the model so that runs with a seed are reproducible.
+        self.rng = np.random.default_rng(random_seed)
         self.agents = []
         self.attributes = attributes
         self.settings = settings if settings is not None else {}
 
+        # The optimizer strategy used by the agents to choose an attribute mix.
+        self.optimizer = create_optimizer(
+            self.settings.get('optimizer'),
+            **self.settings.get('optimizer_options', {}))
+
+        # The objective cache shared by all agents over all time steps.
+        self.objective_cache = None
+        if self.settings.get('shared_objective_cache', False):
+            self.objective_cache = ObjectiveCache(
+                self.settings.get('objective_cache_size', 100_000))
+
+        # The surrogate response surface used by the agents' objectives.
+        self.response_surface = None
+        if self.settings.get('response_surface', False):
+            self.response_surface = ResponseSurface(
+                self.settings.get('response_surface_resolution', 1))
+
+        # Serve the production of the shared attributes from lookup tables,
+        # on copies of the attributes so that other models built from the
+        # same attributes are not affected.
+        if self.settings.get('production_tables', False):
+            self.attributes = [copy.copy(attribute)
+                               for attribute in self.attributes]
+            for attribute in self.attributes:
+                attribute.enable_production_tables(
+                    self.settings.get('production_table_max_funding',
+                                      2 * self.settings['expenditure_max']),
+                    self.settings.get('production_table_tolerance', 1e-3))
+
+        # The attribute weights, loaded from the settings or precomputed from
+        # the weightage functions at the start of each run.
+        self.weight_schedule = self._load_weight_schedule(
+            self.settings.get('weight_schedule'))
+        self._weight_schedule_loaded = self.weight_schedule is not None
+
         # The RandomActivation scheduler activates all the agents once per
         # step, in random order.
         self.schedule = RandomActivation(self)
@@ -62,7 +129,11 @@ class RankingModel(Model):
                               'normalized_score'],
                   'societal_value': ['period', 'societal_value'],
                   'ranking_dynamics': ['period', 'distance', 'society_delta',
-                                       'gamma']}
+                                       'gamma'],
+                  'optimizer_stats': ['element', 'period', 'evaluations',
+                                      'acceptance_rate', 'restart_values',
+                                      'best_restart', 'wall_time',
+                                      'skipped']}
 
         # Add a table per attribute
         for attribute in self.attributes:
@@ -77,14 +148,36 @@ class RankingModel(Model):
         """Run the model for the input number of time steps.
 
         :param number_of_steps: The number of time steps to run the model.
+        :raises ValueError: If a loaded weight schedule does not cover the
+        run, or the weights at a time step do not sum to one.
         """
 
+        start = self.schedule.time
+        stop = start + number_of_steps
+        schedule = self.weight_schedule
+        if schedule is None or start < schedule.start or stop > schedule.stop:
+            if self._weight_schedule_loaded:
+                raise ValueError('The weight schedule {} does not cover the '
+                                 'time steps [{}, {})'.format(schedule, start,
+                                                              stop))
+            self.weight_schedule = WeightSchedule.from_attributes(
+                self.attributes, number_of_steps, start,
+                self.settings.get('weight_tolerance', 1e-6))
+
         for _ in range(number_of_steps):
             self.step()
 
     def step(self):
         """Advance the model by one step."""
 
+        # Extend the production tables to the budgets saved over the run.
+        if self.settings.get('production_tables', False) and \
+                'production_table_max_funding' not in self.settings:
+            self._extend_production_tables()
+
+        # Let the optimizer work on the whole population before the agents step.
+        self.optimizer.prepare(self.agents)
+
         # When we call the schedule’s step method, it shuffles the order of the
         # agents, then activates them all, one at a time.
         self.schedule.step()
@@ -101,9 +194,58 @@ class RankingModel(Model):
         # Update the ranking dynamics table
         self._update_ranking_dynamics()
 
+        # Update the optimizer stats table
+        self._update_optimizer_stats()
+
         # Collect data.
         self.data_collector.collect(self)
 
+    def attribute_weights(self, time_step=None):
+        """Get the attribute weights at a time step.
+
+        The weights are read from the weight schedule. Time steps outside a
+        schedule precomputed by run, for example when step is called
+        directly, fall back to the weightage functions.
+
+        :param time_step: The time step, the current time step by default.
+        :return: The tuple of attribute weights, in attribute order.
+        """
+
+        if time_step is None:
+            time_step = self.schedule.time
+
+        schedule = self.weight_schedule
+        if schedule is not None and (self._weight_schedule_loaded
+                                     or schedule.covers(time_step)):
+            return schedule(time_step)
+        return tuple(attribute.weightage(time_step)
+                     for attribute in self.attributes)
+
+    def _load_weight_schedule(self, weight_schedule):
+        """Load the weight schedule setting.
+
+        :param weight_schedule: A WeightSchedule, an array of weights, the
+        path of a CSV file or None.
+        :return: The WeightSchedule, or None.
+        """
+
+        tolerance = self.settings.get('weight_tolerance', 1e-6)
+        if weight_schedule is None or isinstance(weight_schedule,
+                                                 WeightSchedule):
+            schedule = weight_schedule
+        elif isinstance(weight_schedule, str):
+            schedule = WeightSchedule.from_csv(weight_schedule,
+                                               self.attributes, tolerance)
+        else:
+            schedule = WeightSchedule(weight_schedule, tolerance=tolerance)
+
+        if schedule is not None \
+                and schedule.weights.shape[1] != len(self.attributes):
+            raise ValueError('The weight schedule has {} attributes, not {}'
+                             .format(schedule.weights.shape[1],
+                                     len(self.attributes)))
+        return schedule
+
     def _current_high_score(self):
         """Get the current high score.
 
@@ -127,6 +269,21 @@ class RankingModel(Model):
         return int(round(np.interp(score, score_interval,
                                    self.NORMALIZED_SCORE_RANGE)))
 
+    def _extend_production_tables(self):
+        """Rebuild the production tables when an agent's budget outgrows them.
+
+        The tables are rebuilt at twice the largest budget, so they are
+        rebuilt a logarithmic number of times as the budgets grow.
+        """
+
+        # pylint: disable=protected-access
+        budget = max((agent._budget for agent in self.agents), default=0)
+        for attribute in self.attributes:
+            if attribute.production_table_max_funding < budget:
+                attribute.enable_production_tables(
+                    2 * budget,
+                    self.settings.get('production_table_tolerance', 1e-3))
+
     def _update_ranking(self):
         """Update each agent's ranking based on agent score."""
 
@@ -233,6 +390,18 @@ class RankingModel(Model):
         self.data_collector.add_table_row('ranking_dynamics',
                                           ranking_dynamics_row)
 
+    def _update_optimizer_stats(self):
+        """Update the optimizer stats table with each agent's search."""
+
+        step_index = self.schedule.time - 1
+        for agent in self.agents:
+            stats = agent.optimizer_stats[step_index]
+            optimizer_stats_row = {'element': agent.unique_id,
+                                   'period': self.schedule.time}
+            optimizer_stats_row.update(stats)
+            self.data_collector.add_table_row('optimizer_stats',
+                                              optimizer_stats_row)
+
     def _update_societal_value(self):
         """Update the societal value table."""
 
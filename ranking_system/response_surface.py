@@ -0,0 +1,160 @@
+"""Surrogate response surface for the agent objective functions.
+
+The objective function only depends on the allocation, the agent's
+production efficiencies and the attribute weights at the time step. The
+response surface caches the valuation of each attribute's production on a
+funding grid for each production efficiency, and builds the objective from
+table lookups into those curves.
+"""
+import logging
+import numpy as np
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+LOGGER = logging.getLogger('ranking_system.response_surface')
+
+
+class ResponseSurface:
+    """Cached attribute score curves on a funding grid."""
+
+    def __init__(self, resolution=1, size=30_001):
+        """Initialize the response surface.
+
+        :param resolution: The spacing of the funding grid in dollars.
+        :param size: The initial number of funding grid points. The curves
+        grow when an allocation is beyond the end of the grid.
+        """
+
+        self.resolution = resolution
+        self.size = size
+
+        # Valuation curves by attribute name and production efficiency.
+        self._valuation_curves = {}
+
+        # Weight and weighted valuation curves by attribute name and
+        # production efficiency.
+        self._score_curves = {}
+
+    def valuation_curve(self, attribute, efficiency, size=0):
+        """Get the valuation of the production on the funding grid.
+
+        :param attribute: The attribute.
+        :param efficiency: The production efficiency.
+        :param size: The least number of funding grid points needed.
+        :return: The valuation curve.
+        """
+
+        key = (attribute.name, efficiency)
+        curve = self._valuation_curves.get(key)
+        if curve is None or len(curve) < size:
+            size = max(size, self.size if curve is None else 2 * len(curve))
+            LOGGER.debug('attribute = %s  efficiency = %f  size = %d',
+                         attribute.name, efficiency, size)
+            funding = np.arange(size) * self.resolution
+            curve = attribute.valuation_array(
+                attribute.production_array(funding, efficiency))
+            self._valuation_curves[key] = curve
+            self._score_curves.pop(key, None)
+        return curve
+
+    def score_curve(self, attribute, efficiency, weight, size=0):
+        """Get the weighted valuation on the funding grid.
+
+        The weighted curve is cached until the weight of the attribute
+        changes.
+
+        :param attribute: The attribute.
+        :param efficiency: The production efficiency.
+        :param weight: The attribute weight.
+        :param size: The least number of funding grid points needed.
+        :return: The score curve.
+        """
+
+        curve = self.valuation_curve(attribute, efficiency, size)
+        key = (attribute.name, efficiency)
+        cached = self._score_curves.get(key)
+        if cached is None or cached[0] != weight:
+            cached = (weight, weight * curve)
+            self._score_curves[key] = cached
+        return cached[1]
+
+    # pylint: disable=protected-access
+    def scalar_objective(self, agent, variables, time_step):
+        """Evaluate the agent objective function for a single allocation.
+
+        This avoids the array overhead of the objective function for the
+        scalar optimizers.
+
+        :param agent: The agent.
+        :param variables: The allocation.
+        :param time_step: The time step of the attribute weights.
+        :return: The objective function result.
+        """
+
+        sum_attribute_scores = 0
+        weights = agent.model.attribute_weights(time_step)
+        for column, attribute in enumerate(agent._inventory):
+            efficiency = agent._production_efficiencies[attribute.name]
+            weight = weights[column]
+            index = int(max(variables[column], 0) // self.resolution)
+            curve = self.score_curve(attribute, efficiency, weight, index + 1)
+            sum_attribute_scores += curve[index]
+
+        # The sign is negative to match the agent objective function.
+        sign = -1
+        return sign * sum_attribute_scores
+
+    def objective(self, agent, allocations, time_step):
+        """Evaluate the agent objective function from the cached curves.
+
+        Allocations are rounded down to the funding grid.
+
+        :param agent: The agent.
+        :param allocations: A (k x M) array of k allocations.
+        :param time_step: The time step of the attribute weights.
+        :return: An array of the k objective function results.
+        """
+
+        allocations = np.atleast_2d(np.asarray(allocations, dtype=float))
+        indices = (np.maximum(allocations, 0) // self.resolution).astype(int)
+
+        sum_attribute_scores = np.zeros(allocations.shape[0])
+        weights = agent.model.attribute_weights(time_step)
+        for column, attribute in enumerate(agent._inventory):
+            efficiency = agent._production_efficiencies[attribute.name]
+            weight = weights[column]
+            curve = self.score_curve(attribute, efficiency, weight,
+                                     indices[:, column].max() + 1)
+            sum_attribute_scores += curve[indices[:, column]]
+
+        # The sign is negative to match the agent objective function.
+        sign = -1
+        return sign * sum_attribute_scores
+
+    def clear(self):
+        """Remove all cached curves."""
+
+        self._valuation_curves.clear()
+        self._score_curves.clear()
+
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -1,6 +1,10 @@
 """Unit test for the Attribute class."""
 import unittest
+import numpy as np
 from attribute import Attribute
+from attribute import StepValuation
+from ranking_system import ClassSizeAttribute
+from ranking_system import SpendingPerStudentAttribute
 
 __author__ = "David Balash"
 __copyright__ = "Copyright 2019, Agent Based Models"
@@ -49,7 +53,7 @@ class TestAttribute(unittest.TestCase):
         """Test the repr function."""
 
         attribute_name = self.attribute.name
-        attribute_repr = 'Attribute[name={}, value=0]'.format(attribute_name)
+        attribute_repr = 'Attribute[name={}]'.format(attribute_name)
         self.assertEqual(attribute_repr, self.attribute.__repr__())
 
     def test_production(self):
@@ -64,6 +68,36 @@ class TestAttribute(unittest.TestCase):
         self.assertEqual(self.attribute.valuation(100), 100,
                          'Valuation not correct.')
 
+    def test_production_array(self):
+        """Test the production function with arrays."""
+
+        productions = self.attribute.production([0, 100, 200], 0.5)
+        np.testing.assert_array_equal(productions, [0, 50, 100],
+                                      'Productions not correct.')
+        productions = self.attribute.production_array([[100]], [0.5, 1])
+        np.testing.assert_array_equal(productions, [[50, 100]],
+                                      'Broadcast productions not correct.')
+
+    def test_valuation_array(self):
+        """Test the valuation function with a scalar only function."""
+
+        attribute = Attribute(self.attribute_name, weightage_function_mock,
+                              lambda value: 100 if value > 50 else 0,
+                              production_function_mock)
+        valuations = attribute.valuation([10, 60, 100])
+        np.testing.assert_array_equal(valuations, [0, 100, 100],
+                                      'Valuations not correct.')
+        self.assertFalse(attribute._vectorized[attribute._valuation_function],
+                         'Scalar function not detected.')
+        self.assertEqual(attribute.valuation(60), 100,
+                         'Scalar valuation not correct.')
+
+    def test_weightage_array(self):
+        """Test the weightage function with an array."""
+
+        np.testing.assert_allclose(self.attribute.weightage([1, 5]),
+                                   [1 / 100, 5 / 100])
+
     def test_weightage(self):
         """Test the weightage function."""
 
@@ -71,6 +105,116 @@ class TestAttribute(unittest.TestCase):
                          'Weight not correct.')
 
 
+class TestBuiltInAttributes(unittest.TestCase):
+    """Unit test class to test the built-in attributes with arrays."""
+
+    def test_arrays(self):
+        """Test the array results match the scalar results."""
+
+        funding = np.linspace(0, 20_000, 401)
+        for attribute in [ClassSizeAttribute(), SpendingPerStudentAttribute()]:
+            productions = attribute.production(funding, 0.75)
+            valuations = attribute.valuation(productions)
+            for index, amount in enumerate(funding):
+                production = attribute.production(amount, 0.75)
+                self.assertAlmostEqual(productions[index], production)
+                self.assertEqual(valuations[index],
+                                 attribute.valuation(production))
+            self.assertTrue(attribute._vectorized[
+                attribute._valuation_function], 'Valuation not vectorized.')
+            np.testing.assert_array_equal(attribute.weightage([4, 5]),
+                                          [attribute.weightage(4),
+                                           attribute.weightage(5)])
+
+    def test_production_derivatives(self):
+        """Test the production derivatives against finite differences."""
+
+        funding = np.linspace(100, 20_000, 50)
+        step = 1e-3
+        for attribute in [ClassSizeAttribute(), SpendingPerStudentAttribute()]:
+            expected = (attribute.production(funding + step, 0.75)
+                        - attribute.production(funding - step, 0.75))
+            np.testing.assert_allclose(
+                attribute.production_derivative(funding, 0.75),
+                expected / (2 * step), atol=1e-6)
+            self.assertAlmostEqual(
+                float(attribute.production_derivative(1_000, 0.75)),
+                attribute.production_derivative([1_000], 0.75)[0],
+                msg='Scalar production derivative not correct.')
+            self.assertFalse(attribute.differentiable,
+                             'Step valuation is differentiable.')
+            with self.assertRaises(ValueError):
+                attribute.valuation_derivative(50)
+
+    def test_sweep(self):
+        """Test the sweep matches the scalar curves over a grid."""
+
+        funding = np.linspace(0, 20_000, 101)
+        efficiencies = [0.25, 0.5, 0.75]
+        for attribute in [ClassSizeAttribute(), SpendingPerStudentAttribute()]:
+            sweep = attribute.sweep(funding, efficiencies, time_step=7)
+            self.assertEqual(sweep.score.shape, (3, 101),
+                             'Grid shape not correct.')
+            for row, efficiency in enumerate(efficiencies):
+                for column in (0, 37, 100):
+                    production = attribute.production(funding[column],
+                                                      efficiency)
+                    valuation = attribute.valuation(production)
+                    self.assertAlmostEqual(sweep.production[row, column],
+                                           production)
+                    self.assertEqual(sweep.valuation[row, column], valuation)
+                    self.assertAlmostEqual(
+                        sweep.score[row, column],
+                        attribute.weightage(7) * valuation)
+            np.testing.assert_array_equal(
+                attribute.sweep(funding, 0.5, weight=1).score,
+                sweep.valuation[1], 'Line sweep not correct.')
+
+
+class TestStepValuation(unittest.TestCase):
+    """Unit test class to test the StepValuation class functions."""
+
+    def test_above(self):
+        """Test values must be strictly above a breakpoint to pass it."""
+
+        valuation = StepValuation([2_500, 5_000], [0, 50, 100])
+        values = [0, 2_500, 2_500.1, 5_000, 5_001]
+        expected = [0, 0, 50, 50, 100]
+        self.assertEqual([valuation(value) for value in values], expected,
+                         'Scalar valuations not correct.')
+        np.testing.assert_array_equal(valuation(np.array(values)), expected)
+
+    def test_below(self):
+        """Test values must be strictly below a breakpoint to stay under."""
+
+        valuation = StepValuation([20, 30], [100, 50, 0], direction='below')
+        values = [10, 19.99, 20, 29, 30, 60]
+        expected = [100, 100, 50, 50, 0, 0]
+        self.assertEqual([valuation(value) for value in values], expected,
+                         'Scalar valuations not correct.')
+        np.testing.assert_array_equal(valuation(np.array(values)), expected)
+
+    def test_invalid(self):
+        """Test invalid step tables raise a ValueError."""
+
+        with self.assertRaises(ValueError):
+            StepValuation([1, 2], [0, 1])
+        with self.assertRaises(ValueError):
+            StepValuation([2, 1], [0, 1, 2])
+        with self.assertRaises(ValueError):
+            StepValuation([1, 2], [0, 1, 2], direction='sideways')
+
+    def test_breakpoints(self):
+        """Test the attribute exposes the valuation breakpoints."""
+
+        self.assertEqual(ClassSizeAttribute().valuation_breakpoints,
+                         (20, 30, 40, 50), 'Breakpoints not correct.')
+        attribute = Attribute('Test', lambda t: 0.5, lambda v: v,
+                              lambda f, e: f)
+        self.assertIsNone(attribute.valuation_breakpoints,
+                          'Breakpoints not None.')
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,175 @@
+"""Unit test for the command line entry point."""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from ranking_system.cli import create_attribute
+from ranking_system.cli import load_config
+from ranking_system.cli import main
+from ranking_system.cli import run_experiment
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+class TestCli(unittest.TestCase):
+    """Unit test class to test the command line entry point."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = {
+            'agents': 2, 'steps': 3, 'random_seed': 1234,
+            'settings': {'expenditure_min': 5_000, 'expenditure_max': 15_000},
+            'optimizer': {'name': 'grid', 'options': {'resolution': 100}},
+            'attributes': [
+                {'name': 'Spending', 'weight': 0.5,
+                 'valuation': {'type': 'PiecewiseStep',
+                               'breakpoints': [5_000], 'values': [0, 100]},
+                 'production': {'type': 'LinearEfficiency'}},
+                {'name': 'Size', 'weight': 0.5,
+                 'valuation': {'type': 'PiecewiseStep', 'breakpoints': [50],
+                               'values': [100, 0], 'direction': 'below'},
+                 'production': {'type': 'SaturatingTanh', 'initial': 200,
+                                'final': 0, 'max_funding': 15_000,
+                                'steepness': 3}}],
+            'outputs': {'directory': self.directory.name,
+                        'tables': ['ranking', 'societal_value']}}
+        self.path = os.path.join(self.directory.name, 'experiment.json')
+        with open(self.path, 'w') as config_file:
+            json.dump(self.config, config_file)
+
+    def tearDown(self):
+        """Remove the output files."""
+
+        self.directory.cleanup()
+
+    def test_load_config(self):
+        """Test the JSON, YAML and TOML configs load the same experiment."""
+
+        self.assertEqual(load_config(self.path), self.config,
+                         'JSON config not correct.')
+
+        yaml_path = os.path.join(self.directory.name, 'experiment.yaml')
+        with open(yaml_path, 'w') as config_file:
+            config_file.write('agents: 2\nsteps: 3\n'
+                              'attributes: [class_size]\n')
+        toml_path = os.path.join(self.directory.name, 'experiment.toml')
+        with open(toml_path, 'w') as config_file:
+            config_file.write('agents = 2\nsteps = 3\n'
+                              'attributes = ["class_size"]\n')
+        expected = {'agents': 2, 'steps': 3, 'attributes': ['class_size']}
+        self.assertEqual(load_config(yaml_path), expected,
+                         'YAML config not correct.')
+        self.assertEqual(load_config(toml_path), expected,
+                         'TOML config not correct.')
+
+        with self.assertRaises(ValueError):
+            load_config(os.path.join(self.directory.name, 'experiment.ini'))
+
+        with mock.patch.dict(sys.modules, {'yaml': None}):
+            with self.assertRaisesRegex(ImportError, 'PyYAML'):
+                load_config(yaml_path)
+
+    def test_create_attribute(self):
+        """Test the built-in and curve attributes."""
+
+        self.assertEqual(create_attribute('class_size').name,
+                         'Average Class Size', 'Built-in not correct.')
+        attribute = create_attribute(self.config['attributes'][1])
+        self.assertEqual(attribute.weightage(7), 0.5, 'Weight not correct.')
+        self.assertEqual(attribute.valuation_breakpoints, (50,),
+                         'Valuation not correct.')
+        with self.assertRaises(ValueError):
+            create_attribute('unknown')
+
+    def test_run_experiment(self):
+        """Test the parallel replicates match the sequential replicates."""
+
+        sequential = run_experiment(self.config, replicates=3, workers=1)
+        parallel = run_experiment(self.config, replicates=3, workers=2)
+        self.assertEqual([summary['random_seed'] for summary in parallel],
+                         [1234, 1235, 1236], 'Seeds not correct.')
+        self.assertEqual(
+            [summary['societal_value'] for summary in parallel],
+            [summary['societal_value'] for summary in sequential],
+            'Parallel replicates not reproducible.')
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.directory.name,
+                                           'replicate_2'))),
+            ['ranking.csv', 'societal_value.csv'], 'Outputs not correct.')
+
+    def test_seed_reproducible(self):
+        """Test runs with the same seed give the same results."""
+
+        del self.config['outputs']
+        for optimizer in [{'name': 'basinhopping',
+                           'options': {'number_of_initial_values': 2,
+                                       'niter': 20}},
+                          'slsqp', 'differential_evolution',
+                          {'name': 'population',
+                           'options': {'number_of_candidates': 200}}]:
+            self.config['optimizer'] = optimizer
+            summaries = [run_experiment(self.config, replicates=2, workers=1)
+                         for _ in range(2)]
+            self.assertEqual(summaries[0][0]['societal_value'],
+                             summaries[1][0]['societal_value'],
+                             'Run with the same seed not reproducible.')
+            self.assertEqual(
+                [summary['societal_value'] for summary in summaries[0]],
+                [summary['societal_value'] for summary in summaries[1]],
+                'Replicates not reproducible.')
+
+    def test_headless(self):
+        """Test a headless run never imports the plotting modules."""
+
+        script = ('import sys\n'
+                  'from ranking_system.cli import main\n'
+                  'main([{!r}, "--headless", "--workers", "1"])\n'
+                  'assert "matplotlib" not in sys.modules\n'
+                  'assert "IPython" not in sys.modules\n').format(self.path)
+        package_directory = os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)))
+        environment = dict(os.environ, PYTHONPATH=package_directory)
+        result = subprocess.run([sys.executable, '-c', script],
+                                cwd=self.directory.name, env=environment,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('replicate 0', result.stdout, 'Summary not printed.')
+
+    def test_main_overrides(self):
+        """Test the command line options override the config."""
+
+        output = os.path.join(self.directory.name, 'override')
+        self.assertEqual(main([self.path, '--steps', '1', '--seed', '7',
+                               '--output', output, '--workers', '1']), 0,
+                         'Exit status not correct.')
+        self.assertEqual(os.listdir(output), ['replicate_0'],
+                         'Output directory not correct.')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
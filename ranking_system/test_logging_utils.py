@@ -0,0 +1,138 @@
+"""Unit test for the logging utilities."""
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from ranking_system.logging_utils import RateLimitFilter
+from ranking_system.logging_utils import SamplingFilter
+from ranking_system.logging_utils import setup_logging
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+def make_record(level=logging.DEBUG, message='message', args=None):
+    """Make a log record."""
+    return logging.LogRecord('test', level, __file__, 1, message, args, None)
+
+
+class TestLoggingUtils(unittest.TestCase):
+    """Unit test class to test the logging utilities."""
+
+    def setUp(self):
+        """Setup the test in a temporary directory for the log files."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        self.logger_name = 'test_logging_utils'
+        self.logger = logging.getLogger(self.logger_name)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        """Remove the handlers, filters and log files."""
+
+        for logger in (self.logger, logging.getLogger(self.logger_name
+                                                      + '.hot')):
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+            for log_filter in list(logger.filters):
+                logger.removeFilter(log_filter)
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_sampling_filter(self):
+        """Test one in every n debug records pass, and all warnings."""
+
+        sampling_filter = SamplingFilter(3)
+        passed = [sampling_filter.filter(make_record()) for _ in range(9)]
+        self.assertEqual(passed, [True, False, False] * 3,
+                         'Sampling not correct.')
+        self.assertTrue(sampling_filter.filter(make_record(logging.WARNING)),
+                        'Warning not passed.')
+
+    def test_rate_limit_filter(self):
+        """Test the records per second are limited."""
+
+        now = [0.0]
+        rate_filter = RateLimitFilter(5, clock=lambda: now[0])
+        passed = [rate_filter.filter(make_record()) for _ in range(8)]
+        self.assertEqual(sum(passed), 5, 'Rate limit not correct.')
+        self.assertEqual(rate_filter.dropped, 3, 'Dropped count not correct.')
+        now[0] = 0.4
+        passed = [rate_filter.filter(make_record()) for _ in range(8)]
+        self.assertEqual(sum(passed), 2, 'Refill not correct.')
+        self.assertTrue(rate_filter.filter(make_record(logging.ERROR)),
+                        'Error not passed.')
+
+    def test_queue_logging(self):
+        """Test the records are written by the listener thread."""
+
+        listener = setup_logging(self.logger_name, level=logging.DEBUG,
+                                 use_queue=True,
+                                 sample_every={self.logger_name + '.hot': 10})
+        hot_logger = logging.getLogger(self.logger_name + '.hot')
+        # Record the threads that write to the file.
+        threads = set()
+        file_handler = listener.handlers[1]
+        emit = file_handler.emit
+
+        def record_thread(record):
+            threads.add(threading.current_thread())
+            emit(record)
+
+        file_handler.emit = record_thread
+
+        values = [1.5]
+        self.logger.debug('values = %s', values)
+        values.append(2.5)
+        for index in range(100):
+            hot_logger.debug('index = %d', index)
+        listener.stop()
+        listener.stop()
+
+        with open(self.logger_name + '.log') as log_file:
+            lines = log_file.read().splitlines()
+        self.assertEqual(len(lines), 11, 'Sampled records not correct.')
+        self.assertTrue(lines[0].endswith('values = [1.5]'),
+                        'Message not merged when logged.')
+        self.assertIn('[test_logging_utils.py:', lines[0],
+                      'Record details not correct.')
+        self.assertTrue(threads, 'No records written.')
+        self.assertNotIn(threading.current_thread(), threads,
+                         'Records written on the logging thread.')
+
+    def test_direct_logging(self):
+        """Test the handlers are attached directly without a queue."""
+
+        self.assertIsNone(setup_logging(self.logger_name),
+                          'Listener returned without a queue.')
+        self.assertEqual(
+            [type(handler).__name__ for handler in self.logger.handlers],
+            ['StreamHandler', 'RotatingFileHandler'],
+            'Handlers not correct.')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -0,0 +1,138 @@
+"""Unit test for the math utility functions."""
+import unittest
+import numpy as np
+from ranking_system.math_utils import LinearEfficiency
+from ranking_system.math_utils import Logistic
+from ranking_system.math_utils import PiecewiseStep
+from ranking_system.math_utils import SaturatingTanh
+from ranking_system.math_utils import SmoothStep
+from ranking_system.math_utils import budget_lattice
+from ranking_system.math_utils import budget_lattice_chunks
+from ranking_system.math_utils import budget_lattice_size
+from ranking_system.math_utils import project_to_budget_simplex
+from ranking_system.math_utils import sample_budget_simplex
+from ranking_system.math_utils import smooth_step
+from ranking_system.math_utils import smooth_step_derivative
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+class TestMathUtils(unittest.TestCase):
+    """Unit test class to test the math utility functions."""
+
+    def test_smooth_step_derivative(self):
+        """Test the smooth step derivative against finite differences."""
+
+        values = np.linspace(-45, 245, 30)
+        for output_range in [[0, 100], [100, 0]]:
+            step = 1e-4
+            expected = (smooth_step(values + step, [0, 200], output_range)
+                        - smooth_step(values - step, [0, 200], output_range))
+            np.testing.assert_allclose(
+                smooth_step_derivative(values, [0, 200], output_range),
+                expected / (2 * step), atol=1e-6)
+
+    def test_production_curves(self):
+        """Test the production curve derivatives and inverses."""
+
+        funding = np.linspace(100, 14_900, 38)
+        step = 1e-3
+        for curve in [LinearEfficiency(2), SaturatingTanh(200, 0, 15_000, 3),
+                      Logistic(10, 100, 5_000, 0.001)]:
+            expected = (curve(funding + step, 0.8)
+                        - curve(funding - step, 0.8)) / (2 * step)
+            np.testing.assert_allclose(curve.derivative(funding, 0.8),
+                                       expected, rtol=1e-5)
+            np.testing.assert_allclose(
+                curve.inverse(curve(funding, 0.8), 0.8), funding, rtol=1e-6)
+            self.assertAlmostEqual(curve(1_000, 0.8),
+                                   curve(np.array([1_000]), 0.8)[0],
+                                   msg='Scalar curve not correct.')
+
+        curve = SaturatingTanh(200, 0, 15_000, 3)
+        self.assertEqual(curve(20_000, 0.8), curve(15_000, 0.8),
+                         'Funding beyond the maximum produced more.')
+        self.assertEqual(curve.inverse(0, 0.8), np.inf,
+                         'Unreached amount does not need infinite funding.')
+
+    def test_valuation_curves(self):
+        """Test the valuation curve derivatives and inverses."""
+
+        curve = SmoothStep([0, 200], [100, 0])
+        values = np.linspace(5, 195, 20)
+        np.testing.assert_allclose(curve.inverse(curve(values)), values)
+
+        curve = PiecewiseStep([20, 30, 40, 50], [100, 75, 50, 25, 0],
+                              direction='below')
+        np.testing.assert_array_equal(curve.inverse([100, 75, 60, 0, 101]),
+                                      [20, 30, 30, np.inf, np.nan])
+        np.testing.assert_array_equal(curve.derivative([10, 20]), [0, 0])
+        curve = PiecewiseStep([2_500, 5_000], [0, 50, 100])
+        np.testing.assert_array_equal(curve.inverse([0, 50, 60]),
+                                      [-np.inf, 2_500, 5_000])
+
+    def test_sample_budget_simplex(self):
+        """Test the sampled allocations spend the whole budget."""
+
+        allocations = sample_budget_simplex(1_000, 3, size=10)
+        self.assertEqual(allocations.shape, (10, 3), 'Shape not correct.')
+        self.assertTrue(np.all(allocations >= 0), 'Negative allocation.')
+        np.testing.assert_allclose(allocations.sum(axis=1), 1_000)
+
+    def test_budget_lattice(self):
+        """Test the budget lattice holds every allocation within the budget."""
+
+        lattice = budget_lattice(350, 100, 3)
+        self.assertEqual(len(lattice), 20, 'Lattice size not correct.')
+        self.assertEqual(len(np.unique(lattice, axis=0)), 20,
+                         'Lattice allocations not unique.')
+        self.assertLessEqual(lattice.sum(axis=1).max(), 300,
+                             'Lattice allocation exceeds the budget.')
+
+    def test_budget_lattice_chunks(self):
+        """Test the chunks cover the lattice with bounded sizes."""
+
+        lattice = budget_lattice(1_000, 100, 3)
+        self.assertEqual(budget_lattice_size(1_000, 100, 3), len(lattice),
+                         'Lattice size not correct.')
+        for max_points in [1_000, 100]:
+            chunks = list(budget_lattice_chunks(1_000, 100, 3, max_points))
+            self.assertTrue(all(len(chunk) <= max_points for chunk in chunks),
+                            'Chunk larger than max points.')
+            np.testing.assert_array_equal(np.concatenate(chunks), lattice)
+
+    def test_project_to_budget_simplex(self):
+        """Test the projection onto the budget simplex."""
+
+        np.testing.assert_allclose(project_to_budget_simplex([10, 20], 100),
+                                   [10, 20])
+        np.testing.assert_allclose(project_to_budget_simplex([-10, 20], 100),
+                                   [0, 20])
+        np.testing.assert_allclose(project_to_budget_simplex([80, 60], 100),
+                                   [60, 40])
+        np.testing.assert_allclose(project_to_budget_simplex([150, -20], 100),
+                                   [100, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
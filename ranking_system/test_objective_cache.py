@@ -0,0 +1,91 @@
+"""Unit test for the ObjectiveCache class."""
+import unittest
+from ranking_system import ClassSizeAttribute
+from ranking_system import ObjectiveCache
+from ranking_system import RankingModel
+from ranking_system import SpendingPerStudentAttribute
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+# pylint: disable=protected-access
+class TestObjectiveCache(unittest.TestCase):
+    """Unit test class to test the ObjectiveCache class functions."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.cache = ObjectiveCache(maxsize=2)
+
+    def test_get(self):
+        """Test the get function counts hits and misses."""
+
+        self.assertIsNone(self.cache.get('a'), 'Missing key not None.')
+        self.cache.put('a', -10)
+        self.assertEqual(self.cache.get('a'), -10, 'Cached result not correct.')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1),
+                         'Hits and misses not correct.')
+
+    def test_put(self):
+        """Test the least recently used result is evicted."""
+
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertEqual(len(self.cache), 2, 'Cache size not correct.')
+        self.assertIsNone(self.cache.get('b'), 'Evicted result not None.')
+        self.assertEqual(self.cache.get('a'), 1, 'Cached result not correct.')
+
+    def test_clear(self):
+        """Test the clear function."""
+
+        self.cache.put('a', 1)
+        self.cache.get('a')
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0, 'Cache not empty.')
+        self.assertEqual(self.cache.hits, 0, 'Hits not reset.')
+
+    def test_agent_objective_cache(self):
+        """Test the agent and shared objective caches."""
+
+        settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                    'objective_cache': True, 'shared_objective_cache': True,
+                    'objective_cache_resolution': 10}
+        model = RankingModel(2, [SpendingPerStudentAttribute(),
+                                 ClassSizeAttribute()],
+                             settings, random_seed=1234)
+        agent = model.agents[0]
+        result = agent.objective_function([5_004.5, 2_001.2])
+        self.assertEqual(result, agent._objective_function([5_000, 2_000]),
+                         'Quantized objective result not correct.')
+        self.assertEqual(agent.objective_function([5_000, 2_009]), result,
+                         'Memoized objective result not correct.')
+        self.assertEqual(agent.objective_cache.hits, 1,
+                         'Agent cache hits not correct.')
+        self.assertEqual(model.objective_cache.misses, 1,
+                         'Shared cache misses not correct.')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
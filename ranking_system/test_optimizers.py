@@ -0,0 +1,329 @@
+"""Unit test for the optimizer strategies."""
+import unittest
+import numpy as np
+from ranking_system import AnalyticOptimizer
+from ranking_system import Attribute
+from ranking_system import BasinHoppingOptimizer
+from ranking_system import ClassSizeAttribute
+from ranking_system import DifferentialEvolutionOptimizer
+from ranking_system import GridOptimizer
+from ranking_system import PopulationOptimizer
+from ranking_system import RankingModel
+from ranking_system import SLSQPOptimizer
+from ranking_system import SpendingPerStudentAttribute
+from ranking_system import create_optimizer
+from ranking_system import smooth_step
+from ranking_system import smooth_step_derivative
+from ranking_system.optimizers import BudgetExhausted
+from ranking_system.optimizers import BudgetedObjective
+from ranking_system.optimizers import SimplexStep
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+# pylint: disable=protected-access
+def smoothed(attribute, value_range, output_range, derivative=True):
+    """Replace the attribute's step valuation with a smooth step."""
+
+    def valuation(value):
+        return smooth_step(value, value_range, output_range)
+
+    def valuation_derivative(value):
+        return smooth_step_derivative(value, value_range, output_range)
+
+    return Attribute(attribute.name, attribute._weightage_function,
+                     valuation, attribute._production_function,
+                     attribute._production_derivative,
+                     valuation_derivative if derivative else None)
+
+
+# pylint: disable=protected-access
+class TestOptimizers(unittest.TestCase):
+    """Unit test class to test the optimizer strategies."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.attributes = [SpendingPerStudentAttribute(), ClassSizeAttribute()]
+        self.settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000}
+        self.model = RankingModel(1, self.attributes, self.settings,
+                                  random_seed=1234)
+        self.agent = self.model.agents[0]
+
+    def assert_feasible(self, attribute_mix):
+        """Assert the attribute mix is within the agent's budget."""
+
+        self.assertEqual(len(attribute_mix), len(self.attributes),
+                         'Attribute mix size not correct.')
+        self.assertTrue(all(amount >= 0 for amount in attribute_mix),
+                        'Negative funding allocated.')
+        self.assertLessEqual(sum(attribute_mix), self.agent._budget,
+                             'Attribute mix exceeds the budget.')
+
+    def test_create_optimizer(self):
+        """Test the create optimizer function."""
+
+        self.assertIsInstance(create_optimizer(), BasinHoppingOptimizer)
+        self.assertIsInstance(create_optimizer('grid', resolution=50),
+                              GridOptimizer)
+        optimizer = SLSQPOptimizer()
+        self.assertIs(create_optimizer(optimizer), optimizer)
+        with self.assertRaises(ValueError):
+            create_optimizer('unknown')
+
+    def test_model_settings(self):
+        """Test the optimizer is selected through the model settings."""
+
+        settings = dict(self.settings, optimizer='grid',
+                        optimizer_options={'resolution': 250})
+        model = RankingModel(1, self.attributes, settings, random_seed=1234)
+        self.assertIsInstance(model.optimizer, GridOptimizer)
+        self.assertEqual(model.optimizer.resolution, 250)
+
+    def test_strategies(self):
+        """Test each strategy returns a feasible attribute mix."""
+
+        optimizers = [BasinHoppingOptimizer(number_of_initial_values=1,
+                                            niter=20),
+                      SLSQPOptimizer(number_of_initial_values=2),
+                      DifferentialEvolutionOptimizer(maxiter=5, popsize=5),
+                      GridOptimizer(resolution=500),
+                      AnalyticOptimizer()]
+        for optimizer in optimizers:
+            self.assert_feasible(optimizer.optimize(self.agent))
+
+    def test_many_attributes(self):
+        """Test the optimizers with more than two attributes."""
+
+        attributes = []
+        for index in range(12):
+            attribute = (SpendingPerStudentAttribute() if index % 2
+                         else ClassSizeAttribute())
+            attribute.name = 'Attribute {}'.format(index)
+            attributes.append(attribute)
+        settings = dict(self.settings, expenditure_min=50_000,
+                        expenditure_max=60_000)
+        model = RankingModel(1, attributes, settings, random_seed=1234)
+        self.agent = model.agents[0]
+        self.attributes = attributes
+
+        basin_hopping_mix = BasinHoppingOptimizer(number_of_initial_values=1,
+                                                  niter=10)\
+            .optimize(self.agent)
+        self.assert_feasible(basin_hopping_mix)
+        analytic_mix = AnalyticOptimizer().optimize(self.agent)
+        self.assert_feasible(analytic_mix)
+        self.assertLessEqual(self.agent.objective_function(analytic_mix),
+                             self.agent.objective_function(basin_hopping_mix),
+                             'Analytic optimizer worse than basin hopping.')
+
+        # The population starts on the budget simplex, so the generations
+        # improve the objective instead of repairing overspent candidates.
+        evolution_mix = DifferentialEvolutionOptimizer(maxiter=20)\
+            .optimize(self.agent)
+        self.assert_feasible(evolution_mix)
+        self.assertGreater(self.agent.optimizer_stats[-1]['evaluations'],
+                           20 * 15 * 12, 'Too few objective evaluations.')
+        self.assertLessEqual(
+            self.agent.objective_function(evolution_mix),
+            0.9 * self.agent.objective_function(analytic_mix),
+            'Differential evolution far from the analytic optimizer.')
+
+    def test_simplex_step(self):
+        """Test the simplex step stays within the budget."""
+
+        step = SimplexStep(1_000, 500)
+        for _ in range(100):
+            x = step(np.array([900.0, 50.0, 50.0]))
+            self.assertTrue(np.all(x >= 0), 'Negative step value.')
+            self.assertLessEqual(x.sum(), 1_000 + 1e-9, 'Step exceeds budget.')
+
+    def test_population_optimizer(self):
+        """Test the population optimizer matches the grid optimizer."""
+
+        model = RankingModel(4, self.attributes, self.settings,
+                             random_seed=1234)
+        optimizer = PopulationOptimizer(resolution=250)
+        allocations, evaluations = optimizer.optimize_population(model.agents)
+        self.assertGreater(evaluations, 0, 'Evaluations not correct.')
+        for agent, allocation in zip(model.agents, allocations):
+            self.agent = agent
+            self.assert_feasible(allocation)
+            grid_mix = GridOptimizer(resolution=250).optimize(agent)
+            self.assertEqual(agent.objective_function(allocation),
+                             agent.objective_function(grid_mix),
+                             'Population allocation not optimal on the grid.')
+
+        optimizer = PopulationOptimizer(number_of_candidates=500)
+        optimizer.prepare(model.agents)
+        for agent in model.agents:
+            self.agent = agent
+            self.assert_feasible(optimizer.optimize(agent))
+            self.assertEqual(agent.optimizer_stats[-1]['evaluations'], 501,
+                             'Evaluations not correct.')
+
+        # A lattice over the evaluation budget is coarsened, not truncated.
+        optimizer = PopulationOptimizer(resolution=10, max_evaluations=1_000)
+        candidates = optimizer._candidates(model.agents)
+        self.assertLessEqual(len(candidates), 1_000,
+                             'Candidates exceed the evaluation budget.')
+        max_budget = max(agent._budget for agent in model.agents)
+        self.assertGreater(candidates[:, 0].max(), max_budget / 2,
+                           'Candidates not spread over the budget.')
+
+    def test_analytic_optimizer(self):
+        """Test the analytic optimizer is at least as good as the grid."""
+
+        analytic_mix = AnalyticOptimizer().optimize(self.agent)
+        grid_mix = GridOptimizer(resolution=100).optimize(self.agent)
+        self.assertLessEqual(self.agent.objective_function(analytic_mix),
+                             self.agent.objective_function(grid_mix),
+                             'Analytic optimizer worse than the grid.')
+
+        # A coarse budget step keeps the allocation within the budget.
+        coarse_mix = AnalyticOptimizer(max_budget_steps=7).optimize(self.agent)
+        self.assert_feasible(coarse_mix)
+        self.assertLessEqual(
+            self.agent.objective_function(coarse_mix),
+            self.agent.objective_function([0] * len(coarse_mix)),
+            'Coarse analytic optimizer worse than no funding.')
+
+    def test_analytic_gradient(self):
+        """Test the analytic gradient of a smoothed objective function."""
+
+        optimized = {}
+        for derivative in [True, False]:
+            attributes = [smoothed(SpendingPerStudentAttribute(), [0, 10_000],
+                                   [0, 100], derivative),
+                          smoothed(ClassSizeAttribute(), [0, 200], [100, 0],
+                                   derivative)]
+            model = RankingModel(1, attributes, self.settings,
+                                 random_seed=1234)
+            agent = model.agents[0]
+            self.assertEqual(agent.differentiable, derivative,
+                             'Differentiable not correct.')
+            if derivative:
+                variables = np.array([3_000.0, 2_000.0])
+                step = 1e-3
+                expected = [(agent.objective_function(variables + offset)
+                             - agent.objective_function(variables - offset))
+                            / (2 * step) for offset in np.eye(2) * step]
+                np.testing.assert_allclose(
+                    agent.objective_gradient(variables), expected, rtol=1e-5)
+
+            optimizer = BasinHoppingOptimizer(number_of_initial_values=1,
+                                              niter=20)
+            attribute_mix = optimizer.optimize(agent)
+            optimized[derivative] = (agent.objective_function(attribute_mix),
+                                     agent.optimizer_stats[-1]['evaluations'])
+
+        # The analytic gradient saves the finite difference evaluations.
+        self.assertAlmostEqual(optimized[True][0], optimized[False][0],
+                               places=3, msg='Optimum not correct.')
+        self.assertLess(optimized[True][1], optimized[False][1],
+                        'Analytic gradient used more evaluations.')
+
+    def test_breakpoint_funding_levels(self):
+        """Test the breakpoint funding levels match the scanned levels."""
+
+        optimizer = AnalyticOptimizer()
+        for attribute in self.agent._inventory:
+            scanned = Attribute(attribute.name, attribute.weightage,
+                                lambda value, valuation=attribute.valuation:
+                                valuation(value), attribute.production)
+            self.assertEqual(optimizer._funding_levels(self.agent, attribute),
+                             optimizer._funding_levels(self.agent, scanned),
+                             'Breakpoint funding levels not correct.')
+
+    def test_optimizer_stats(self):
+        """Test the optimizer stats are recorded by the agent."""
+
+        optimizer = BasinHoppingOptimizer(number_of_initial_values=3, niter=20)
+        attribute_mix = optimizer.optimize(self.agent)
+        stats = self.agent.optimizer_stats[-1]
+        self.assertGreater(stats['evaluations'], 3 * 20,
+                           'Evaluations not correct.')
+        self.assertTrue(0 <= stats['acceptance_rate'] <= 1,
+                        'Acceptance rate not correct.')
+        self.assertEqual(len(stats['restart_values']), 3,
+                         'Restart values not correct.')
+        if stats['best_restart'] is not None:
+            self.assertEqual(stats['restart_values'][stats['best_restart']],
+                             self.agent.objective_function(attribute_mix),
+                             'Best restart not correct.')
+        self.assertGreater(stats['wall_time'], 0, 'Wall time not correct.')
+
+    def test_warm_start(self):
+        """Test warm starting reduces the effort while the optimum is stable."""
+
+        optimizer = BasinHoppingOptimizer(number_of_initial_values=4, niter=40,
+                                          warm_start=True, min_niter=10,
+                                          stability_tolerance=2)
+        self.assertEqual(optimizer._effort(self.agent), (4, 40),
+                         'Effort without a previous allocation not correct.')
+        self.agent._previous_budget = self.agent._budget / 2
+        self.agent._previous_allocation = [0.1 * self.agent._previous_budget,
+                                           0.2 * self.agent._previous_budget]
+        np.testing.assert_allclose(self.agent._scaled_previous_allocation(),
+                                   [0.1 * self.agent._budget,
+                                    0.2 * self.agent._budget])
+
+        self.assert_feasible(optimizer.optimize(self.agent))
+        self.assertEqual(self.agent._stable_steps, 1,
+                         'Stable steps not correct.')
+        self.assertEqual(optimizer._effort(self.agent), (2, 20),
+                         'Warm start effort not correct.')
+        self.assertEqual(self.agent.warm_start_savings, [0],
+                         'Warm start savings not correct.')
+        optimizer.optimize(self.agent)
+        self.assertEqual(self.agent.warm_start_savings, [0, 4 * 40 - 2 * 20],
+                         'Warm start savings not correct.')
+
+    def test_evaluation_budget(self):
+        """Test the evaluation budget stops the search."""
+
+        calls = []
+        objective_function = self.agent.objective_function
+        self.agent.objective_function = lambda variables:\
+            calls.append(variables) or objective_function(variables)
+        optimizer = BasinHoppingOptimizer(max_evaluations=100)
+        self.assert_feasible(optimizer.optimize(self.agent))
+
+        # The budget plus the evaluation of the zero and best allocations.
+        self.assertLessEqual(len(calls), 100 + 2,
+                             'Evaluation budget not enforced.')
+
+        objective = BudgetedObjective(self.agent, max_evaluations=1)
+        objective([0, 0])
+        with self.assertRaises(BudgetExhausted):
+            objective([0, 0])
+
+    def test_time_budget(self):
+        """Test the time budget stops the search."""
+
+        optimizer = BasinHoppingOptimizer(max_time=0.05)
+        self.assert_feasible(optimizer.optimize(self.agent))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -0,0 +1,276 @@
+"""Unit test for the plot utility functions."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+import matplotlib.pyplot as plt
+import numpy as np
+from ranking_system import ClassSizeAttribute
+from ranking_system import RankingModel
+from ranking_system import SpendingPerStudentAttribute
+from ranking_system import dictionary_line_plot
+from ranking_system import display_ranking
+from ranking_system import display_societal_value
+from ranking_system import export_figure
+from ranking_system import export_figures
+from ranking_system import export_model_figures
+from ranking_system import find_values_by_agent
+from ranking_system import history_array
+from ranking_system import history_data_frame
+from ranking_system import table_slice
+from ranking_system.plot_utils import lttb_indices
+from ranking_system.plot_utils import min_max_indices
+from ranking_system.plot_utils import select_series
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+class TestPlotUtils(unittest.TestCase):
+    """Unit test class to test the plot utility functions."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.attributes = [SpendingPerStudentAttribute(), ClassSizeAttribute()]
+        self.settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                         'optimizer': 'grid',
+                         'optimizer_options': {'resolution': 500}}
+        self.model = RankingModel(3, self.attributes, self.settings,
+                                  random_seed=1234)
+        self.model.run(4)
+
+    def test_find_values_by_agent(self):
+        """Test the values by agent match the table rows."""
+
+        table = self.model.data_collector.get_table_dataframe('ranking')
+        values_by_agent = find_values_by_agent(self.model, 'ranking', 'score')
+        self.assertEqual(sorted(values_by_agent),
+                         sorted(agent.unique_id
+                                for agent in self.model.agents),
+                         'Agents not correct.')
+        for agent, values in values_by_agent.items():
+            rows = table[table['element'] == agent].sort_values('period')
+            self.assertEqual(values, [None] + rows['score'].tolist(),
+                             'Values not correct.')
+
+    def test_history_array(self):
+        """Test the history array has a row per agent and a column per step."""
+
+        history = history_array(self.model, 'Average Class Size', 'funding')
+        self.assertEqual(history.shape, (3, 4), 'History shape not correct.')
+        agent = sorted(self.model.agents, key=lambda agent: agent.unique_id)[0]
+        self.assertEqual(
+            history[0].tolist(),
+            [round(funds, self.model.DECIMAL_PLACES) for funds
+             in agent.attribute_funding['Average Class Size']],
+            'History not correct.')
+
+    def test_cache(self):
+        """Test the histories are cached until the model steps."""
+
+        history = history_data_frame(self.model, 'ranking', 'score')
+        self.assertIs(history_data_frame(self.model, 'ranking', 'score'),
+                      history, 'History not cached.')
+        self.model.run(1)
+        history = history_data_frame(self.model, 'ranking', 'score')
+        self.assertEqual(history.shape, (3, 5),
+                         'History not updated after the model step.')
+
+    def test_table_slice(self):
+        """Test the table slice matches the filtered table page."""
+
+        table = self.model.data_collector.get_table_dataframe('ranking')
+        agents = [agent.unique_id for agent in self.model.agents[:2]]
+        expected = table[table['period'].isin([2, 4])
+                         & table['element'].isin(agents)]
+        page = table_slice(self.model, 'ranking', periods=[2, 4],
+                           agents=agents, offset=1, limit=2)
+        self.assertTrue(page.equals(expected.iloc[1:3]),
+                        'Table slice not correct.')
+        self.assertTrue(table_slice(self.model, 'ranking', periods=range(2, 4))
+                        .equals(table[table['period'].isin([2, 3])]),
+                        'Period range not correct.')
+        self.assertEqual(len(table_slice(self.model, 'ranking', periods=9)), 0,
+                         'Missing period not empty.')
+        self.assertTrue(table_slice(self.model, 'ranking',
+                                    periods=np.int64(2))
+                        .equals(table[table['period'] == 2]),
+                        'Numpy integer period not correct.')
+        with self.assertRaises(ValueError):
+            table_slice(self.model, 'societal_value', agents=agents)
+
+    def test_display_societal_value(self):
+        """Test the societal value total leaves the table unchanged."""
+
+        table = self.model.data_collector.tables['societal_value']
+        values = list(table['societal_value'])
+        with mock.patch('ranking_system.plot_utils.display') as display:
+            display_societal_value(self.model, periods=[2, 3, 4], limit=1)
+        page = display.call_args[0][0]
+        self.assertEqual(list(page.index), [1, 'Total'],
+                         'Page not correct.')
+        self.assertAlmostEqual(page.loc['Total', 'Societal Value'],
+                               sum(values[1:]), 2, 'Total not correct.')
+        self.assertEqual(table['societal_value'], values, 'Table modified.')
+        self.assertEqual(len(table['period']), 4, 'Table rows modified.')
+
+    def test_display_ranking(self):
+        """Test the whole ranking table is displayed by default."""
+
+        self.model.run(1)
+        with mock.patch('ranking_system.plot_utils.display') as display:
+            display_ranking(self.model)
+        self.assertEqual(len(display.call_args[0][0]),
+                         len(self.model.data_collector.tables['ranking']
+                             ['period']), 'Table not displayed in full.')
+
+
+class TestDownsampling(unittest.TestCase):
+    """Unit test class to test the plot downsampling functions."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.y_values = np.sin(np.linspace(0, 20, 10_000))
+        self.y_values[1234] = 5
+        self.y_values[4321] = -5
+        self.x_values = np.arange(len(self.y_values))
+
+    def tearDown(self):
+        """Close the test figures."""
+
+        plt.close('all')
+
+    def test_lttb(self):
+        """Test LTTB keeps the end points and the spikes."""
+
+        indices = lttb_indices(self.x_values, self.y_values, 500)
+        self.assertEqual(len(indices), 500, 'Number of points not correct.')
+        self.assertEqual((indices[0], indices[-1]), (0, 9_999),
+                         'End points not kept.')
+        self.assertTrue(np.all(np.diff(indices) > 0),
+                        'Indices not in increasing order.')
+        self.assertTrue({1234, 4321} <= set(indices.tolist()),
+                        'Spikes not kept.')
+
+    def test_min_max(self):
+        """Test min max keeps the extremes of every bucket."""
+
+        indices = min_max_indices(self.y_values, 250)
+        self.assertLessEqual(len(indices), 500, 'Too many points kept.')
+        self.assertTrue({1234, 4321} <= set(indices.tolist()),
+                        'Spikes not kept.')
+        np.testing.assert_array_equal(min_max_indices(self.y_values[:10], 250),
+                                      np.arange(10))
+
+    def test_select_series(self):
+        """Test selecting the top and sampled series."""
+
+        data = {'University {}'.format(index): [None, index, 10 - index]
+                for index in range(10)}
+        self.assertEqual(list(select_series(data, top=3)),
+                         ['University 0', 'University 1', 'University 2'],
+                         'Top series not correct.')
+        sample = select_series(data, sample=4, random_seed=1)
+        self.assertEqual(len(sample), 4, 'Sample size not correct.')
+        self.assertEqual(select_series(data, sample=4, random_seed=1), sample,
+                         'Sample not reproducible.')
+
+    def test_dictionary_line_plot(self):
+        """Test long, wide plots are downsampled without markers."""
+
+        data = {index: list(self.y_values + index) for index in range(50)}
+        dictionary_line_plot(data, 'time', 'value', 'title', max_points=400,
+                             top=5)
+        lines = plt.gca().get_lines()
+        self.assertEqual(len(lines), 5, 'Number of series not correct.')
+        for line in lines:
+            self.assertEqual(len(line.get_xdata()), 400,
+                             'Series not downsampled.')
+            self.assertEqual(line.get_marker(), 'None',
+                             'Markers not suppressed.')
+
+
+class TestFigureExport(unittest.TestCase):
+    """Unit test class to test the headless figure export."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.charts = [{'data': {index: [None] + list(range(index, index + 5))
+                                 for index in range(3)},
+                        'xlabel': 'time', 'ylabel': 'value',
+                        'title': 'Chart {}'.format(number)}
+                       for number in range(3)]
+
+    def tearDown(self):
+        """Remove the exported files."""
+
+        self.directory.cleanup()
+
+    def test_export_figure(self):
+        """Test a chart is written without opening a pyplot figure."""
+
+        figures = plt.get_fignums()
+        for image_format, header in (('png', b'\x89PNG'), ('svg', b'<?xml')):
+            path = os.path.join(self.directory.name, 'chart.' + image_format)
+            self.assertEqual(export_figure(self.charts[0], path), path,
+                             'Path not returned.')
+            with open(path, 'rb') as image_file:
+                self.assertTrue(image_file.read().startswith(header),
+                                'Image format not correct.')
+        self.assertEqual(plt.get_fignums(), figures, 'Pyplot figure opened.')
+
+    def test_export_figures_in_parallel(self):
+        """Test the charts are exported across worker processes."""
+
+        paths = [os.path.join(self.directory.name, '{}.png'.format(index))
+                 for index in range(len(self.charts))]
+        self.assertEqual(export_figures(self.charts, paths, workers=2), paths,
+                         'Paths not returned in order.')
+        for path in paths:
+            self.assertGreater(os.path.getsize(path), 0, 'Image not written.')
+
+    def test_export_model_figures(self):
+        """Test the model line plots are exported by title."""
+
+        model = RankingModel(2, [SpendingPerStudentAttribute(),
+                                 ClassSizeAttribute()],
+                             {'expenditure_min': 5_000,
+                              'expenditure_max': 15_000, 'optimizer': 'grid',
+                              'optimizer_options': {'resolution': 100}},
+                             random_seed=1234)
+        model.run(3)
+        paths = export_model_figures(model, self.directory.name,
+                                     image_format='svg', workers=1)
+        self.assertEqual(len(paths), 5, 'Number of figures not correct.')
+        self.assertIn(os.path.join(self.directory.name,
+                                   'societal_value_over_time.svg'), paths,
+                      'File name not correct.')
+        self.assertTrue(all(os.path.exists(path) for path in paths),
+                        'Images not written.')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
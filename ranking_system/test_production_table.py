@@ -0,0 +1,172 @@
+"""Unit test for the ProductionTable class."""
+import unittest
+import numpy as np
+from ranking_system import ClassSizeAttribute
+from ranking_system import ProductionTable
+from ranking_system import RankingModel
+from ranking_system import SpendingPerStudentAttribute
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+# pylint: disable=protected-access
+class TestProductionTable(unittest.TestCase):
+    """Unit test class to test the ProductionTable class functions."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.exact = ClassSizeAttribute()
+        self.attribute = ClassSizeAttribute()
+        self.attribute.enable_production_tables(30_000, tolerance=1e-3)
+
+    def test_error_bound(self):
+        """Test the table is within the tolerance of the exact production."""
+
+        for tolerance in [1, 1e-3, 1e-6]:
+            table = ProductionTable(
+                lambda funding: self.exact.production_array(funding, 0.7),
+                30_000, tolerance)
+            self.assertLessEqual(table.max_error, tolerance,
+                                 'Table error not within the tolerance.')
+            funding = np.random.uniform(0, 30_000, 1_000)
+            np.testing.assert_allclose(table(funding),
+                                       self.exact.production(funding, 0.7),
+                                       rtol=0, atol=2 * tolerance)
+
+    def test_production(self):
+        """Test the attribute production is served from the tables."""
+
+        for funding in [0, 1_234.5, 15_000, 30_000, 45_000, -10]:
+            self.assertAlmostEqual(self.attribute.production(funding, 0.6),
+                                   self.exact.production(funding, 0.6),
+                                   places=3, msg='Production not correct.')
+        self.assertEqual(list(self.attribute._production_tables), [0.6],
+                         'Production tables not cached by efficiency.')
+        with self.assertRaises(ValueError):
+            ClassSizeAttribute().production_table(0.6)
+
+    def test_inverse(self):
+        """Test the inverse finds the funding for a target production."""
+
+        for target in [150, 100, 40]:
+            funding = self.attribute.production_inverse(target, 0.7)
+            self.assertAlmostEqual(self.exact.production(funding, 0.7), target,
+                                   places=3, msg='Inverse not correct.')
+        self.assertEqual(self.attribute.production_inverse(250, 0.7), 0,
+                         'Reached target does not need funding.')
+        self.assertEqual(self.attribute.production_inverse(0, 0.7), np.inf,
+                         'Unreached target does not need infinite funding.')
+
+        attribute = SpendingPerStudentAttribute()
+        attribute.enable_production_tables(30_000)
+        np.testing.assert_allclose(
+            attribute.production_inverse([-1, 100, 5_000, 10**9], 0.6),
+            [0, 100 / 0.6, 5_000 / 0.6, 10**9 / 0.6])
+
+    def test_production_array(self):
+        """Test the array production is served from the same tables."""
+
+        funding = np.array([[0, 1_234.5, 15_000], [30_000, 45_000, -10]])
+        efficiency = np.array([[0.6], [0.7]])
+        amounts = self.attribute.production_array(funding, efficiency)
+        for row, column in np.ndindex(funding.shape):
+            self.assertEqual(
+                amounts[row, column],
+                self.attribute.production(funding[row, column],
+                                          efficiency[row, 0]),
+                'Array production not served from the tables.')
+        self.assertEqual(sorted(self.attribute._production_tables), [0.6, 0.7],
+                         'Production tables not cached by efficiency.')
+        np.testing.assert_array_equal(
+            self.attribute.sweep(funding[0], 0.6).production, amounts[0],
+            'Sweep not served from the tables.')
+
+    def test_past_table(self):
+        """Test funding past the table warns and uses the exact production."""
+
+        with self.assertLogs('ranking_system.production_table',
+                             'WARNING') as logs:
+            amounts = self.attribute.production_array([40_000, 50_000], 0.6)
+            self.attribute.production(60_000, 0.6)
+        self.assertEqual(len(logs.output), 1, 'Warning not logged once.')
+        np.testing.assert_array_equal(
+            amounts, self.exact.production_array([40_000, 50_000], 0.6),
+            'Production past the table not exact.')
+
+    def test_model_settings(self):
+        """Test the model settings enable the agents' production tables."""
+
+        settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                    'production_tables': True,
+                    'production_table_tolerance': 1e-4, 'optimizer': 'grid'}
+        model = RankingModel(2, [SpendingPerStudentAttribute(),
+                                 ClassSizeAttribute()], settings,
+                             random_seed=1234)
+        model.step()
+        for agent in model.agents:
+            for attribute in agent._inventory:
+                efficiency = agent._production_efficiencies[attribute.name]
+                table = attribute.production_table(efficiency)
+                self.assertEqual(table.max_funding, 30_000,
+                                 'Table funding range not correct.')
+                self.assertLessEqual(table.max_error, 1e-4,
+                                     'Table error not within the tolerance.')
+
+    def test_model_budget_growth(self):
+        """Test the model extends the tables to the agents' budgets."""
+
+        settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                    'production_tables': True, 'optimizer': 'grid'}
+        model = RankingModel(2, [SpendingPerStudentAttribute(),
+                                 ClassSizeAttribute()], settings,
+                             random_seed=1234)
+        for agent in model.agents:
+            agent._budget = 100_000
+        model.step()
+        for attribute in model.attributes:
+            self.assertEqual(attribute.production_table_max_funding, 200_000,
+                             'Tables not extended to the budget.')
+
+    def test_model_attributes_not_changed(self):
+        """Test the tables are enabled on the model's own attributes."""
+
+        attributes = [SpendingPerStudentAttribute(), ClassSizeAttribute()]
+        settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                    'optimizer': 'grid'}
+        with_tables = RankingModel(1, attributes,
+                                   dict(settings, production_tables=True),
+                                   random_seed=1234)
+        without_tables = RankingModel(1, attributes, settings,
+                                      random_seed=1234)
+        for index, attribute in enumerate(attributes):
+            self.assertIsNone(attribute._production_tables,
+                              'Tables enabled on the given attributes.')
+            self.assertIs(without_tables.attributes[index], attribute,
+                          'Attributes copied without tables.')
+            self.assertEqual(with_tables.attributes[index]._production_tables,
+                             {}, 'Tables not enabled on the model.')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -1,9 +1,13 @@
 """Unit test for the Ranking Agent class."""
-import numpy as np
+import pickle
 import unittest
+import numpy as np
+from ranking_system import Attribute
 from ranking_system import ClassSizeAttribute
+from ranking_system import LinearEfficiency
 from ranking_system import RankingAgent
 from ranking_system import RankingModel
+from ranking_system import SmoothStep
 from ranking_system import SpendingPerStudentAttribute
 from scipy.optimize import basinhopping
 
@@ -43,10 +47,11 @@ class TestRankingAgent(unittest.TestCase):
         # Create a new ranking agent
         self.agent_1 = RankingAgent('Agent_1', self.model)
 
-    def brute_force_attribute_mix(self):
+    def brute_force_attribute_mix(self, step=100):
+        """Find the best attribute mix on a lattice with a double loop."""
+
         best = 0
         best_attribute_mix = [0, 0]
-        step = 100
 
         for amount_1 in range(0, int(self.agent_1._budget) + step, step):
             for amount_2 in range(0, int(self.agent_1._budget) + step, step):
@@ -58,17 +63,90 @@ class TestRankingAgent(unittest.TestCase):
                     best = result
                     best_attribute_mix = [amount_1, amount_2]
 
-        print('brute force attribute mix = ', best_attribute_mix)
+        return best_attribute_mix
 
     def test_optimize_attribute_mix(self):
         """Test the agent optimize attribute mix function."""
         attribute_mix = self.agent_1._optimize_attribute_mix()
         print('attribute_mix = ', attribute_mix)
-        self.brute_force_attribute_mix()
+        print('grid attribute mix = ', self.agent_1.grid_attribute_mix())
         self.agent_1.model.schedule.step()
         attribute_mix = self.agent_1._optimize_attribute_mix()
         print('attribute_mix = ', attribute_mix)
-        self.brute_force_attribute_mix()
+        print('grid attribute mix = ', self.agent_1.grid_attribute_mix())
+
+    def test_grid_attribute_mix(self):
+        """Test the grid solver against the brute force double loop."""
+
+        for _ in range(2):
+            expected = self.agent_1.objective_function(
+                self.brute_force_attribute_mix(step=250))
+            for max_points in [100_000, 10]:
+                attribute_mix = self.agent_1.grid_attribute_mix(
+                    resolution=250, max_points=max_points)
+                self.assertAlmostEqual(
+                    self.agent_1.objective_function(attribute_mix), expected,
+                    msg='Exact grid attribute mix not optimal.')
+            self.agent_1._budget += 10_000
+
+        # Coarse to fine refinement stays on the lattice and in the budget.
+        attribute_mix = self.agent_1.grid_attribute_mix(
+            resolution=1, exact=False, max_points=1_000)
+        self.assertLessEqual(sum(attribute_mix), self.agent_1._budget,
+                             'Attribute mix exceeds the budget.')
+        self.assertLessEqual(
+            self.agent_1.objective_function(attribute_mix),
+            self.agent_1.objective_function(
+                self.agent_1.grid_attribute_mix(resolution=1_000)),
+            'Refined attribute mix worse than the coarse lattice.')
+
+    def test_grid_attribute_mix_many_attributes(self):
+        """Test the refinement stays bounded with many attributes."""
+
+        attributes = [Attribute('Attribute {}'.format(index),
+                                lambda time_step: 1 / 12,
+                                SmoothStep([0, 1_000 * (index + 1)], [0, 100]),
+                                LinearEfficiency())
+                      for index in range(12)]
+        model = RankingModel(1, attributes, self.settings, random_seed=1234)
+        agent = model.agents[0]
+        attribute_mix = agent.grid_attribute_mix(resolution=10, exact=False,
+                                                 max_points=10_000)
+        self.assertEqual(len(attribute_mix), 12, 'Attribute mix not correct.')
+        self.assertTrue(all(amount >= 0 for amount in attribute_mix),
+                        'Negative funding.')
+        self.assertLessEqual(sum(attribute_mix), agent._budget + 1e-6,
+                             'Attribute mix exceeds the budget.')
+        equal_mix = [agent._budget / 12] * 12
+        self.assertLess(agent.objective_function(attribute_mix),
+                        agent.objective_function(equal_mix),
+                        'Refined attribute mix worse than an equal split.')
+
+    def test_objective_surface(self):
+        """Test the objective surface against the scalar objective."""
+
+        amounts = np.arange(0, 15_001, 500)
+        x_grid, y_grid, surface = self.agent_1.objective_surface(amounts,
+                                                                 amounts[:20])
+        self.assertEqual(surface.shape, (20, len(amounts)),
+                         'Surface shape not correct.')
+        for row, column in [(0, 0), (3, 17), (19, 30)]:
+            allocation = [x_grid[row, column], y_grid[row, column]]
+            self.assertEqual(bool(surface.mask[row, column]),
+                             sum(allocation) > self.agent_1._budget,
+                             'Infeasible mask not correct.')
+            self.assertAlmostEqual(surface.data[row, column],
+                                   self.agent_1._objective_function(
+                                       allocation),
+                                   msg='Surface objective not correct.')
+
+        # Slice along the attributes in the other order by name.
+        _, _, swapped = self.agent_1.objective_surface(
+            amounts[:20], amounts, attributes=['Average Class Size',
+                                               'Average Spending Per Student'],
+            mask_infeasible=False)
+        np.testing.assert_allclose(swapped, surface.data.T)
+        self.assertFalse(np.ma.is_masked(swapped), 'Surface masked.')
 
     def test_optimize_attribute_initial_conditions(self):
         for _ in range(5):
@@ -127,6 +205,51 @@ class TestRankingAgent(unittest.TestCase):
               "  objective function result = ",
               self.agent_1.objective_function([sol.x[0], sol.x[1]]))
 
+    def test_batch_objective_function(self):
+        """Test the batch objective function against the objective function."""
+
+        allocations = np.random.random((50, len(self.agent_1._inventory)))
+        allocations *= self.agent_1._budget
+        results = self.agent_1.batch_objective_function(allocations)
+        self.assertEqual(results.shape, (50,),
+                         'Batch result shape not correct.')
+        for allocation, result in zip(allocations, results):
+            self.assertAlmostEqual(result,
+                                   self.agent_1.objective_function(allocation),
+                                   msg='Batch objective result not correct.')
+
+    def test_adaptive_effort(self):
+        """Test the optimizer is skipped while the allocation is stable."""
+
+        settings = dict(self.settings, adaptive_effort=True, optimizer='grid',
+                        optimizer_options={'resolution': 250})
+        model = RankingModel(1, self.attributes, settings,
+                             random_seed=1234)
+        agent = model.agents[0]
+        agent._buy_attributes()
+        self.assertFalse(agent.optimizer_stats[-1]['skipped'],
+                         'Optimizer skipped without a previous allocation.')
+
+        # The same budget and weights pass the local check.
+        agent._budget = agent._previous_budget
+        attribute_mix = agent._optimize_attribute_mix()
+        self.assertTrue(agent.optimizer_stats[-1]['skipped'],
+                        'Optimizer not skipped.')
+        self.assertEqual(agent.objective_function(attribute_mix),
+                         agent._previous_result, 'Allocation not optimal.')
+        self.assertEqual(agent.skip_rate, 0.5, 'Skip rate not correct.')
+
+        # Changed weights run the full optimizer.
+        agent._previous_weights = (0.5, 0.5)
+        agent._optimize_attribute_mix()
+        self.assertFalse(agent.optimizer_stats[-1]['skipped'],
+                         'Optimizer skipped after the weights changed.')
+
+        # Without adaptive effort the previous result is not evaluated.
+        self.agent_1._buy_attributes()
+        self.assertIsNone(self.agent_1._previous_result,
+                          'Previous result evaluated without adaptive effort.')
+
     def test_buy_attributes(self):
         """Test the buy attributes function."""
 
@@ -149,6 +272,32 @@ class TestRankingAgent(unittest.TestCase):
         print("valuation = ", self.agent_1.attribute_valuation)
         print("weight = ", self.agent_1.attribute_weight)
 
+    def test_shared_attributes(self):
+        """Test the agents share the attributes and keep their own values."""
+
+        settings = dict(self.settings, optimizer='grid',
+                        production_tables=True)
+        model = RankingModel(2, self.attributes, settings, random_seed=1234)
+        agent_1, agent_2 = model.agents
+        self.assertIs(agent_1._inventory, agent_2._inventory,
+                      'Attributes not shared.')
+        model.step()
+        for agent in model.agents:
+            for index, attribute in enumerate(agent._inventory):
+                self.assertEqual(agent.attribute_values[index],
+                                 agent.attribute_production[attribute.name][-1],
+                                 'Attribute value not correct.')
+
+        # The production tables are left out of the pickles and rebuilt.
+        agent = pickle.loads(pickle.dumps(agent_1))
+        np.testing.assert_array_equal(agent.attribute_values,
+                                      agent_1.attribute_values)
+        self.assertEqual(agent._inventory[0]._production_tables, {},
+                         'Production tables pickled.')
+        self.assertEqual(agent.objective_function([1_000, 2_000]),
+                         agent_1.objective_function([1_000, 2_000]),
+                         'Objective function not correct after unpickling.')
+
     def test_step(self):
         """Test the step function."""
 
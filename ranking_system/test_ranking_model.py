@@ -52,6 +52,21 @@ class TestRankingModel(unittest.TestCase):
         self.model.step()
         self.assertEqual(self.model.schedule.steps, 1, 'Model steps not equal.')
 
+    def test_optimizer_stats(self):
+        """Test the optimizer stats table."""
+
+        settings = dict(self.settings, optimizer='population',
+                        optimizer_options={'resolution': 500})
+        model = RankingModel(self.number_of_agents, self.attributes, settings,
+                             random_seed=1234)
+        model.run(2)
+        optimizer_stats =\
+            model.data_collector.get_table_dataframe('optimizer_stats')
+        self.assertEqual(len(optimizer_stats), 2 * self.number_of_agents,
+                         'Optimizer stats rows not correct.')
+        self.assertTrue((optimizer_stats['evaluations'] > 0).all(),
+                        'Optimizer evaluations not recorded.')
+
     def test_current_high_score(self):
         """Test the current high score function."""
 
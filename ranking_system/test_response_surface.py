@@ -0,0 +1,83 @@
+"""Unit test for the ResponseSurface class."""
+import unittest
+import numpy as np
+from ranking_system import ClassSizeAttribute
+from ranking_system import RankingModel
+from ranking_system import ResponseSurface
+from ranking_system import SpendingPerStudentAttribute
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+# pylint: disable=protected-access
+class TestResponseSurface(unittest.TestCase):
+    """Unit test class to test the ResponseSurface class functions."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.attributes = [SpendingPerStudentAttribute(), ClassSizeAttribute()]
+        self.settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                         'response_surface': True}
+        self.model = RankingModel(2, self.attributes, self.settings,
+                                  random_seed=1234)
+        self.agent = self.model.agents[0]
+
+    def test_objective(self):
+        """Test the response surface matches the objective function."""
+
+        allocations = np.random.randint(0, 20_000, (100, 2))
+        results = self.agent.batch_objective_function(allocations)
+        for allocation, result in zip(allocations, results):
+            self.assertEqual(result,
+                             self.agent._objective_function(allocation),
+                             'Response surface result not correct.')
+            self.assertEqual(result, self.agent.objective_function(allocation),
+                             'Response surface result not correct.')
+
+    def test_grow(self):
+        """Test the curves grow for allocations beyond the funding grid."""
+
+        response_surface = ResponseSurface(resolution=10, size=100)
+        attribute = self.attributes[0]
+        self.assertEqual(len(response_surface.valuation_curve(attribute, 0.5)),
+                         100, 'Curve size not correct.')
+        self.assertEqual(len(response_surface.valuation_curve(attribute, 0.5,
+                                                              150)),
+                         200, 'Curve size not correct.')
+
+    def test_score_curve(self):
+        """Test the score curve is only rebuilt when the weight changes."""
+
+        response_surface = ResponseSurface(size=100)
+        attribute = self.attributes[0]
+        curve = response_surface.score_curve(attribute, 0.5, 0.7)
+        self.assertIs(response_surface.score_curve(attribute, 0.5, 0.7), curve,
+                      'Score curve rebuilt with the same weight.')
+        np.testing.assert_allclose(
+            response_surface.score_curve(attribute, 0.5, 0.6),
+            curve * 0.6 / 0.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
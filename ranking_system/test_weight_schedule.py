@@ -0,0 +1,123 @@
+"""Unit test for the WeightSchedule class."""
+import os
+import tempfile
+import unittest
+import numpy as np
+from ranking_system import ClassSizeAttribute
+from ranking_system import RankingModel
+from ranking_system import SpendingPerStudentAttribute
+from ranking_system import WeightSchedule
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+# pylint: disable=protected-access
+class TestWeightSchedule(unittest.TestCase):
+    """Unit test class to test the WeightSchedule class functions."""
+
+    def setUp(self):
+        """Setup the test."""
+
+        self.attributes = [SpendingPerStudentAttribute(), ClassSizeAttribute()]
+        self.settings = {'expenditure_min': 5_000, 'expenditure_max': 15_000,
+                         'optimizer': 'grid',
+                         'optimizer_options': {'resolution': 50}}
+
+    def test_from_attributes(self):
+        """Test the schedule matches the weightage functions."""
+
+        schedule = WeightSchedule.from_attributes(self.attributes, 10, start=2)
+        self.assertEqual((schedule.start, schedule.stop, len(schedule)),
+                         (2, 12, 10), 'Schedule horizon not correct.')
+        for time_step in range(2, 12):
+            self.assertEqual(schedule(time_step),
+                             tuple(attribute.weightage(time_step)
+                                   for attribute in self.attributes),
+                             'Schedule weights not correct.')
+        with self.assertRaises(IndexError):
+            schedule(12)
+
+    def test_validation(self):
+        """Test weights that do not sum to one raise a ValueError."""
+
+        with self.assertRaises(ValueError):
+            WeightSchedule([[0.5, 0.5], [0.5, 0.6]])
+        with self.assertRaises(ValueError):
+            WeightSchedule([0.5, 0.5])
+        WeightSchedule([[0.5, 0.5], [0.5, 0.6]], tolerance=0.2)
+
+    def test_from_csv(self):
+        """Test loading the weights from a CSV file."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.csv')
+            with open(path, 'w') as csv_file:
+                csv_file.write('period,Average Class Size,'
+                               'Average Spending Per Student\n'
+                               '3,0.25,0.75\n4,0.5,0.5\n')
+            schedule = WeightSchedule.from_csv(path, self.attributes)
+            self.assertEqual(schedule(3), (0.75, 0.25),
+                             'Weights not in attribute order.')
+            self.assertEqual(schedule.stop, 5, 'Schedule stop not correct.')
+
+            with open(path, 'w') as csv_file:
+                csv_file.write('Average Class Size\n1\n')
+            with self.assertRaises(ValueError):
+                WeightSchedule.from_csv(path, self.attributes)
+
+    def test_model_run(self):
+        """Test the model precomputes the weights when it runs."""
+
+        model = RankingModel(2, self.attributes, self.settings,
+                             random_seed=1234)
+        model.run(7)
+        self.assertEqual((model.weight_schedule.start,
+                          model.weight_schedule.stop), (0, 7),
+                         'Schedule horizon not correct.')
+        for agent in model.agents:
+            for attribute in self.attributes:
+                self.assertEqual(agent.attribute_weight[attribute.name],
+                                 [attribute.weightage(time_step)
+                                  for time_step in range(7)],
+                                 'Agent weights not correct.')
+
+    def test_loaded_schedule(self):
+        """Test a loaded schedule replaces the weightage functions."""
+
+        settings = dict(self.settings,
+                        weight_schedule=[[0.5, 0.5], [0.9, 0.1]])
+        model = RankingModel(2, self.attributes, settings, random_seed=1234)
+        model.run(2)
+        for agent in model.agents:
+            self.assertEqual(agent.attribute_weight[self.attributes[0].name],
+                             [0.5, 0.9], 'Agent weights not correct.')
+        with self.assertRaises(ValueError):
+            model.run(1)
+
+        with self.assertRaises(ValueError):
+            RankingModel(2, self.attributes,
+                         dict(self.settings, weight_schedule=[[1.0]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -0,0 +1,170 @@
+"""Precomputed attribute weights over the simulation horizon.
+
+The attribute weights only depend on the time step, so the model computes
+them once per time step and attribute before a run, instead of calling the
+weightage functions for every objective function evaluation. Schedules can
+also be loaded from arrays or CSV files.
+"""
+import logging
+import numpy as np
+import pandas as pd
+
+__author__ = "David Balash"
+__copyright__ = "Copyright 2019, Agent Based Models"
+__license__ = "GPLv3"
+__version__ = "0.0.1"
+__status__ = "Prototype"
+
+
+LOGGER = logging.getLogger('ranking_system.weight_schedule')
+
+
+class WeightSchedule:
+    """A (time steps x attributes) matrix of attribute weights."""
+
+    def __init__(self, weights, start=0, tolerance=1e-6):
+        """Initialize the weight schedule.
+
+        :param weights: The (time steps x attributes) array of weights. Row i
+        holds the weights at time step start + i.
+        :param start: The time step of the first row.
+        :param tolerance: The tolerance on the weights summing to one.
+        :raises ValueError: If the weights are not a matrix, or the weights
+        at a time step do not sum to one.
+        """
+
+        weights = np.array(weights, dtype=float)
+        if weights.ndim != 2:
+            raise ValueError('Weights must be a (time steps x attributes) '
+                             'matrix, not shape {}'.format(weights.shape))
+
+        invalid = np.flatnonzero(np.abs(weights.sum(axis=1) - 1) > tolerance)
+        if len(invalid):
+            raise ValueError('Weights do not sum to one at time steps {}'
+                             .format((invalid + start).tolist()))
+
+        LOGGER.debug('start = %d  shape = %s', start, weights.shape)
+
+        self.weights = weights
+        self.weights.setflags(write=False)
+        self.start = start
+
+        # Tuples are faster than array rows for single weight lookups.
+        self._rows = [tuple(row) for row in weights.tolist()]
+
+    @classmethod
+    def from_attributes(cls, attributes, number_of_steps, start=0,
+                        tolerance=1e-6):
+        """Evaluate the attributes' weightage functions over the horizon.
+
+        :param attributes: The list of attributes.
+        :param number_of_steps: The number of time steps.
+        :param start: The first time step.
+        :param tolerance: The tolerance on the weights summing to one.
+        :return: The WeightSchedule.
+        """
+
+        time_steps = np.arange(start, start + number_of_steps)
+        weights = np.column_stack([
+            np.broadcast_to(attribute.weightage(time_steps), time_steps.shape)
+            for attribute in attributes])
+        return cls(weights, start, tolerance)
+
+    @classmethod
+    def from_csv(cls, path, attributes, tolerance=1e-6):
+        """Load the weights from a CSV file with a column per attribute.
+
+        The columns are named after the attributes. An optional 'period'
+        column gives the time step of the first row, which otherwise is
+        zero.
+
+        :param path: The path of the CSV file.
+        :param attributes: The list of attributes, in column order.
+        :param tolerance: The tolerance on the weights summing to one.
+        :return: The WeightSchedule.
+        :raises ValueError: If a column is missing or the periods are not
+        consecutive.
+        """
+
+        frame = pd.read_csv(path)
+        names = [attribute.name for attribute in attributes]
+        missing = [name for name in names if name not in frame.columns]
+        if missing:
+            raise ValueError('Weight schedule {} has no columns {}'.format(
+                path, missing))
+
+        start = 0
+        if 'period' in frame.columns:
+            periods = frame['period'].to_numpy()
+            start = int(periods[0])
+            if not np.array_equal(periods,
+                                  np.arange(start, start + len(periods))):
+                raise ValueError('Weight schedule {} periods are not '
+                                 'consecutive'.format(path))
+        return cls(frame[names].to_numpy(), start, tolerance)
+
+    @property
+    def stop(self):
+        """The time step after the last row.
+
+        :return: The stop time step.
+        """
+
+        return self.start + len(self._rows)
+
+    def covers(self, time_step):
+        """Check the schedule has the weights at the time step.
+
+        :param time_step: The time step.
+        :return: True if the time step is in the schedule.
+        """
+
+        return self.start <= time_step < self.stop
+
+    def __call__(self, time_step):
+        """Get the attribute weights at the time step.
+
+        :param time_step: The time step.
+        :return: The tuple of attribute weights.
+        :raises IndexError: If the time step is not in the schedule.
+        """
+
+        if not self.start <= time_step < self.stop:
+            raise IndexError('Time step {} is not in the weight schedule '
+                             '[{}, {})'.format(time_step, self.start,
+                                               self.stop))
+        return self._rows[time_step - self.start]
+
+    def __len__(self):
+        """The number of time steps in the schedule.
+
+        :return: The number of time steps.
+        """
+
+        return len(self._rows)
+
+    def __repr__(self):
+        """The representation function will return the string representation.
+
+        :return: The string representation of the WeightSchedule class.
+        """
+
+        return 'WeightSchedule[start={}, stop={}, attributes={}]'.format(
+            self.start, self.stop, self.weights.shape[1])
+
+
+# Agent based models
+# Copyright (C) 2019 David Balash
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
@@ -1,6 +1,5 @@
 """Run the ranking model."""
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 from ranking_system import *
 
@@ -21,6 +20,8 @@ DISPLAY_3D_PLOTS = False
 DISPLAY_VALUATION_PLOTS = True
 DISPLAY_PRODUCTION_PLOTS = False
 DISPLAY_SCORE_PLOTS = False
+# Directory to export the line plots to as PNG files, for headless batch runs
+EXPORT_FIGURES_DIRECTORY = None
 
 # Model settings
 number_of_steps = 10
@@ -44,67 +45,30 @@ def weightage_average_class_size(t):
 # Create valuation functions
 # Return the true valuation of attribute i at time t
 
-def valuation_average_spending_per_student(average_spending_per_student):
-    """Valuation given to the average spending per student attribute"""
-
-    # Step like function for average spending per student
-    if average_spending_per_student > 10_000:
-        # Spending more than 10,000 per student receives the most credit
-        return 100
-    elif average_spending_per_student > 7_500:
-        # Spending between 7,500 and 10,000 per student scores second highest
-        return 75
-    elif average_spending_per_student > 5_000:
-        # Spending between 5,000 and 7,500 per student scores third highest
-        return 50
-    elif average_spending_per_student > 2_500:
-        # Spending between 2,500 and 5,000 per student scores fourth highest
-        return 25
-    else:
-        # Spending less than 2,500 per student receives no credit
-        return 0
-
-
-def valuation_average_class_size(average_class_size):
-    """Valuation given to the average class size attribute"""
-
-    # Step like function for average class size
-    if average_class_size < 20:
-        # Classes with fewer than 20 students receive the most credit
-        return 100
-    elif average_class_size < 30:
-        # Classes with 20 to 29 students score second highest
-        return 75
-    elif average_class_size < 40:
-        # Classes with 30 to 39 students score third highest
-        return 50
-    elif average_class_size < 50:
-        # Classes with 40 to 49 students score fourth highest
-        return 25
-    else:
-        # Classes that are 50 or more students receive no credit
-        return 0
+# Step like function for average spending per student
+# Spending less than 2,500 per student receives no credit, each further
+# 2,500 per student scores 25 more up to 100 for more than 10,000
+valuation_average_spending_per_student = StepValuation(
+    [2_500, 5_000, 7_500, 10_000], [0, 25, 50, 75, 100], direction='above')
 
+# Step like function for average class size
+# Classes with fewer than 20 students receive the most credit, each further
+# 10 students scores 25 less down to no credit for 50 or more students
+valuation_average_class_size = StepValuation(
+    [20, 30, 40, 50], [100, 75, 50, 25, 0], direction='below')
 
-# Create production functions
 
-def production_average_spending_per_student(dollars, production_efficiency):
-    """Production function for the average spending per student attribute"""
-    # Educational: spending on instruction, research, and student services
-    # Non-educational: spending on sports, dorms, and hospitals
-    # Universities will differ in the percentage of dollars spent on educational
-    # versus non-educational resources.
-    # The educational spending percentage may change from year to year.
-    educational_spending_percentage = production_efficiency
-    return dollars * educational_spending_percentage
+# Create production functions
 
+# Educational: spending on instruction, research, and student services
+# Non-educational: spending on sports, dorms, and hospitals
+# Universities will differ in the percentage of dollars spent on educational
+# versus non-educational resources.
+# The educational spending percentage may change from year to year.
+production_average_spending_per_student = LinearEfficiency()
 
-def production_average_class_size(dollars, production_efficiency):
-    """Production function for the average class size attribute"""
-    max_value = 15_000
-    steepness = 3 * production_efficiency
-    return 200 - (200 * np.tanh(np.interp(dollars, [0, max_value],
-                                          [0, steepness])))
+# The average class size falls from 200 along a tanh up to 15,000 dollars
+production_average_class_size = SaturatingTanh(200, 0, 15_000, 3)
 
 
 # Create a list of M attributes
@@ -171,30 +135,22 @@ else:
     display_ranking_dynamics(model, all_rows=True)
 
     if DISPLAY_PRODUCTION_PLOTS:
-        productions = []
-        for amount in range(15_000):
-            productions.append(production_average_class_size(amount, 0.75))
+        amounts = np.arange(15_000)
+        class_size, spending_per_student = attributes[1], attributes[0]
 
         _, axes = plt.subplots()
-        axes.plot(productions)
+        axes.plot(amounts, class_size.sweep(amounts, 0.75).production)
         axes.set(xlabel='amount', ylabel='class size',
                  title='Class size by amount')
 
-        productions = []
-        for amount in range(15_000):
-            productions.append(production_average_spending_per_student(amount,
-                                                                       0.75))
-
         _, axes = plt.subplots()
-        axes.plot(productions)
+        axes.plot(amounts, spending_per_student.sweep(amounts, 0.75).production)
         axes.set(xlabel='amount', ylabel='spending per student',
                  title='Spending per student by amount')
 
     if DISPLAY_VALUATION_PLOTS:
         amounts = np.linspace(0, 15_000, 1_000_000)
-        valuations = []
-        for amount in amounts:
-            valuations.append(valuation_average_spending_per_student(amount))
+        valuations = valuation_average_spending_per_student(amounts)
 
         _, axes = plt.subplots()
         axes.plot(amounts, valuations)
@@ -202,9 +158,7 @@ else:
                  title='Score by spending per student')
 
         class_sizes = np.linspace(0, 60, 10_000)
-        valuations = []
-        for class_size in class_sizes:
-            valuations.append(valuation_average_class_size(class_size))
+        valuations = valuation_average_class_size(class_sizes)
 
         _, axes = plt.subplots()
         axes.plot(class_sizes, valuations)
@@ -212,43 +166,26 @@ else:
                  title='Score by class size')
 
     if DISPLAY_SCORE_PLOTS:
+        amounts = np.arange(15_000)
         for attribute in model.attributes:
-            scores = []
-            for amount in range(15_000):
-                # Get the weight for this attribute.
-                weight = attribute.weightage(1)
-
-                # Get the value of this attribute from the production function.
-                efficiency = 0.75
-                production = attribute.production(amount, efficiency)
-
-                # Get the valuation of the attribute from valuation function.
-                valuation = attribute.valuation(production)
-
-                # Calculate the score of this attribute.
-                score = weight * valuation
-
-                scores.append(score)
+            # The weighted valuation of the production at each amount.
+            sweep = attribute.sweep(amounts, 0.75, time_step=1)
             _, axes = plt.subplots()
-            axes.plot(scores)
+            axes.plot(amounts, sweep.score)
             axes.set(xlabel='amount', ylabel='score',
                      title='{} score by spending amount'.format(attribute.name))
 
     if DISPLAY_3D_PLOTS:
         fig = plt.figure()
-        ax = Axes3D(fig)
+        ax = fig.add_subplot(projection='3d')
 
-        xs = []
-        ys = []
-        zs = []
+        # The objective over the funding of both attributes within the budget.
+        amounts = np.arange(0, 15_000 + 100, 100)
+        xs, ys, zs = model.agents[0].objective_surface(amounts, amounts)
 
-        for x in range(0, 15_000 + 100, 100):
-            for y in range(0, 15_000 + 100, 100):
-                xs.append(x)
-                ys.append(y)
-                zs.append(model.agents[0].objective_function([x, y]))
-
-        ax.plot(xs, ys, zs)
+        ax.plot_surface(xs, ys, zs.filled(np.nan))
+        ax.set(xlabel=attributes[0].name, ylabel=attributes[1].name,
+               zlabel='objective')
 
     if DISPLAY_LINE_PLOTS:
         # Plot the normalized score over time
@@ -270,6 +207,11 @@ else:
                                        'societal_value', [None]),
                   'time', 'societal value', 'Societal value over time')
 
+    # Export the line plots without a display, in this process since the
+    # script has no main guard for worker processes to import it under.
+    if EXPORT_FIGURES_DIRECTORY:
+        export_model_figures(model, EXPORT_FIGURES_DIRECTORY, workers=1)
+
     # Show the plots
     plt.show()
 